@@ -1,14 +1,33 @@
 # app.py
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse, HTMLResponse
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, HTMLResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from pipeline.abilities.knowledge_base_search import KnowledgeBaseSearch
-from datetime import datetime
+from src.langie.batching import MicroBatcher
+from src.langie.checkpoints import CheckpointExists, CheckpointStore
+from src.langie.metrics import REGISTRY
+from src.langie.models import InputPayload
+from src.langie.retriever import warmup_in_background
+from src.langie.semantic_cache import DEFAULT_MAX_DISTANCE, DEFAULT_SIZE, DEFAULT_TTL, SemanticCache
+from src.langie.tickets import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, TicketStore
+from datetime import datetime, timezone
+from typing import Optional
 import json
 import os
+import time
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    # Load the embedding model and open the KB in the background: startup (and
+    # /health) doesn't wait for it, and the first /chat usually finds it ready
+    if os.getenv("LANGIE_WARMUP", "1") != "0":
+        warmup_in_background(kb_search.retriever)
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 # Mount static files (frontend)
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -16,87 +35,279 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 # Load pipeline components
 kb_search = KnowledgeBaseSearch(config={"db_path": "data/chroma", "collection": "faq", "top_k": 3})
 
-# File to store tickets
-TICKETS_FILE = "data/tickets.json"
-
-# Ticket counter (for TKT-XXX IDs)
-def get_next_ticket_id():
-    if not os.path.exists(TICKETS_FILE):
-        return "TKT-001"
-    with open(TICKETS_FILE, "r") as f:
-        try:
-            tickets = json.load(f)
-            if not tickets:
-                return "TKT-001"
-            last_id = tickets[-1]["ticket_id"]
-            num = int(last_id.split("-")[1])
-            return f"TKT-{num + 1:03d}"
-        except Exception:
-            return "TKT-001"
-
-# Save ticket
-def save_ticket(ticket):
-    tickets = []
-    if os.path.exists(TICKETS_FILE):
-        with open(TICKETS_FILE, "r") as f:
-            try:
-                tickets = json.load(f)
-            except json.JSONDecodeError:
-                tickets = []
-    tickets.append(ticket)
-    with open(TICKETS_FILE, "w") as f:
-        json.dump(tickets, f, indent=4)
+# Coalesce concurrent KB lookups into one batched embedding + query call
+KB_BATCH_SIZE = int(os.getenv("LANGIE_KB_BATCH_SIZE", "16"))
+KB_BATCH_WAIT = float(os.getenv("LANGIE_KB_BATCH_WAIT_MS", "5")) / 1000
+
+# Resolved answers reused for paraphrased queries (0 entries disables)
+semantic_cache = SemanticCache(
+    kb_search.retriever,
+    max_distance=float(os.getenv("LANGIE_SEMANTIC_CACHE_DISTANCE", str(DEFAULT_MAX_DISTANCE))),
+    maxsize=int(os.getenv("LANGIE_SEMANTIC_CACHE_SIZE", str(DEFAULT_SIZE))),
+    ttl=float(os.getenv("LANGIE_SEMANTIC_CACHE_TTL", str(DEFAULT_TTL))) or None,
+)
+
+def kb_lookup(states):
+    """
+    Batched KB step for /chat: answer from the semantic cache where possible,
+    search the KB for the rest. The cache lookup's embeddings land in the
+    retriever's embedding cache, so the search doesn't encode them again.
+    """
+    cached = semantic_cache.get_many([s.get("input", {}).get("text", "") for s in states])
+    todo = [i for i, hit in enumerate(cached) if hit is None]
+    searched = dict(zip(todo, kb_search.run_many([states[i] for i in todo]) if todo else []))
+    results = []
+    for i, state in enumerate(states):
+        if cached[i] is not None:
+            state["cached_response"] = cached[i]
+        results.append(searched.get(i, state))
+    return results
+
+kb_batcher = MicroBatcher(kb_lookup, max_batch_size=KB_BATCH_SIZE, max_wait=KB_BATCH_WAIT)
+
+# Ticket storage (SQLite/WAL); imports data/tickets.json once on first start
+tickets = TicketStore("data/tickets.db", legacy_json="data/tickets.json")
+
+# Threshold score to mark as resolved, one per score scale: dense hits score a
+# Chroma distance, lexical hits (they carry `bm25`) score 1 / (1 + bm25). On
+# the shipped KB, lexical hits for the FAQ questions themselves score <= 0.19
+# and loose keyword matches >= 0.3, which splits them the way 0.25 splits dense
+# distances, so lexical and degraded-to-lexical searches decide alike.
+SCORE_THRESHOLD = float(os.getenv("LANGIE_SCORE_THRESHOLD", "0.25"))
+LEXICAL_SCORE_THRESHOLD = float(os.getenv("LANGIE_LEXICAL_SCORE_THRESHOLD", "0.2"))
+
+def hit_status(hit: dict) -> str:
+    """resolved/pending for a KB hit, against the threshold of its score scale."""
+    threshold = LEXICAL_SCORE_THRESHOLD if "bm25" in hit else SCORE_THRESHOLD
+    return "resolved" if hit.get("score", 0) >= threshold else "pending"
+
+# Full pipeline runs (/run): suspended at WAIT until the customer answers (/tickets/{id}/answer)
+PIPELINE_CONFIG = os.getenv("LANGIE_CONFIG", "config/stages.yaml")
+CHECKPOINT_DB = os.getenv("LANGIE_CHECKPOINT_DB", "data/checkpoints.db")
+_agent = None
 
-# Threshold score to mark as resolved
-SCORE_THRESHOLD = 0.25
+def get_agent():
+    """Pipeline agent with the checkpoint store, created on first use."""
+    global _agent
+    if _agent is None:
+        from src.langie.pipeline import LangGraphAgent
+        _agent = LangGraphAgent(PIPELINE_CONFIG, checkpoints=CheckpointStore(CHECKPOINT_DB))
+    return _agent
 
 class ChatPayload(BaseModel):
     customer_name: str
     email: str
     query: str
 
+class AnswerPayload(BaseModel):
+    answer: str
+
 @app.get("/", response_class=HTMLResponse)
 async def index():
     with open("static/index.html") as f:
         return f.read()
 
-@app.post("/chat")
-async def chat(payload: ChatPayload):
+@app.get("/health")
+async def health():
+    """
+    Liveness; `kb_warm` turns true once the model and index are loaded,
+    `kb_degraded` while searches fall back to lexical because the model isn't.
+    """
+    retriever = kb_search.retriever
+    return {"status": "ok", "kb_warm": retriever.warm, "kb_mode": retriever.mode,
+            "kb_degraded": retriever.degraded}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of pipeline and /chat metrics."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+def sse(event: dict) -> str:
+    """One server-sent event frame, named after the event's `event` field."""
+    return f"event: {event.get('event', 'message')}\ndata: {json.dumps(event, default=str)}\n\n"
+
+def event_stream(events):
+    """Serve an (async) iterator of events as text/event-stream; a failure ends it with an `error` event."""
+    if hasattr(events, "__aiter__"):
+        async def frames():
+            try:
+                async for event in events:
+                    yield sse(event)
+            except Exception as e:
+                yield sse({"event": "error", "detail": str(e)})
+    else:
+        def frames():
+            # a sync generator: Starlette iterates it on a worker thread
+            try:
+                for event in events:
+                    yield sse(event)
+            except Exception as e:
+                yield sse({"event": "error", "detail": str(e)})
+
+    return StreamingResponse(frames(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+async def chat_events(payload: ChatPayload):
+    """
+    The /chat flow, as the events /chat/stream sends: `stage_end` after the
+    KB lookup (RETRIEVE) and the answer choice (DECIDE), `draft` with the
+    reply, `stage_end` once the ticket is stored (UPDATE), then `done` with
+    the ticket /chat returns.
+    """
+    started = time.perf_counter()
     state = {
         "input": {"text": payload.query},
         "customer_name": payload.customer_name,
         "email": payload.email
     }
 
-    # Run KB search
-    state = kb_search.run(state)
+    # Run KB search (batched with concurrent requests, off the event loop)
+    kb_started = time.perf_counter()
+    state = await kb_batcher.submit(state)
+    kb_seconds = time.perf_counter() - kb_started
+    REGISTRY.histogram("langie_kb_search_duration_seconds", "KB lookup latency (incl. batching wait)").observe(
+        kb_seconds
+    )
+    cached = state.get("cached_response")
     knowledge_base = state.get("knowledge_base", [])
+    REGISTRY.counter("langie_kb_hits_total", "KB results returned", {"source": "chat"}).inc(len(knowledge_base))
+    yield {"event": "stage_end", "stage": "RETRIEVE", "duration_ms": round(kb_seconds * 1000, 3)}
 
     # Determine main response and status
-    if knowledge_base:
+    decide_started = time.perf_counter()
+    if cached:
+        # A paraphrase of a recently resolved query: reuse its answer
+        top_answer = cached["response"]
+        status = "resolved"
+    elif knowledge_base:
         top_answer_data = knowledge_base[0]
         top_answer = top_answer_data.get("answer", "No response generated")
-        status = "resolved" if top_answer_data.get("score", 0) >= SCORE_THRESHOLD else "pending"
+        status = hit_status(top_answer_data)
     else:
         top_answer = "No response generated"
         status = "pending"
 
-    ticket_id = get_next_ticket_id()
-
-    ticket = {
-        "ticket_id": ticket_id,
+    fields = {
         "customer_name": payload.customer_name,
         "email": payload.email,
         "query": payload.query,
         "response": top_answer,
-        "alternatives": [
+        "alternatives": cached["alternatives"] if cached else [
             {"answer": r.get("answer", ""), "score": r.get("score", 0)} for r in knowledge_base
         ],
         "status": status,
         "timestamp": datetime.utcnow().isoformat()
     }
+    yield {"event": "stage_end", "stage": "DECIDE",
+           "duration_ms": round((time.perf_counter() - decide_started) * 1000, 3)}
+    yield {"event": "draft", "stage": "DECIDE", "response": top_answer}
+
+    update_started = time.perf_counter()
+    if status == "resolved" and not cached:
+        await run_in_threadpool(
+            semantic_cache.put, payload.query,
+            {"response": top_answer, "alternatives": fields["alternatives"]},
+        )
 
-    # Save ticket to JSON file
-    save_ticket(ticket)
+    # Allocate the ticket ID and persist in one transaction (blocking SQLite: off the event loop)
+    ticket = await run_in_threadpool(tickets.create, fields)
+    yield {"event": "stage_end", "stage": "UPDATE",
+           "duration_ms": round((time.perf_counter() - update_started) * 1000, 3)}
+
+    REGISTRY.counter("langie_tickets_total", "Tickets created", {"status": status}).inc()
+    REGISTRY.histogram("langie_chat_duration_seconds", "/chat request latency").observe(
+        time.perf_counter() - started
+    )
+    yield {"event": "done", "state": ticket}
+
+@app.post("/chat")
+async def chat(payload: ChatPayload):
+    async for event in chat_events(payload):
+        if event["event"] == "done":
+            return JSONResponse(event["state"])
 
+@app.post("/chat/stream")
+async def chat_stream(payload: ChatPayload):
+    """/chat streamed as server-sent events (what the web UI uses)."""
+    return event_stream(chat_events(payload))
+
+def iso_utc(value: Optional[str], name: str) -> Optional[str]:
+    """An ISO-8601 date/time as the naive-UTC isoformat tickets are stamped with."""
+    if value is None:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be an ISO-8601 date or date-time")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.isoformat()
+
+@app.get("/tickets")
+async def list_tickets(email: Optional[str] = None, status: Optional[str] = None,
+                       since: Optional[str] = None, until: Optional[str] = None,
+                       limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                       cursor: Optional[str] = None):
+    """
+    Tickets newest first, filtered by email (case-insensitive), status and
+    [since, until). Follow `next_cursor` (as `cursor`) for the next page.
+    """
+    try:
+        page = await run_in_threadpool(
+            tickets.list, email=email, status=status, since=iso_utc(since, "since"),
+            until=iso_utc(until, "until"), limit=limit, cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONResponse(page)
+
+@app.get("/tickets/count")
+async def count_tickets(email: Optional[str] = None, status: Optional[str] = None,
+                        since: Optional[str] = None, until: Optional[str] = None):
+    """Number of tickets matching the same filters as GET /tickets."""
+    count = await run_in_threadpool(
+        tickets.count, email=email, status=status, since=iso_utc(since, "since"), until=iso_utc(until, "until"),
+    )
+    return {"count": count}
+
+@app.get("/tickets/{ticket_id}")
+async def get_ticket(ticket_id: str):
+    ticket = await run_in_threadpool(tickets.get, ticket_id)
+    if ticket is None:
+        raise HTTPException(status_code=404, detail=f"Unknown ticket {ticket_id}")
     return JSONResponse(ticket)
+
+@app.post("/run")
+async def run_pipeline(payload: InputPayload):
+    """
+    Run the full pipeline; returns `suspended_at` when it waits on a
+    clarifying answer. 409 if it would suspend a ticket_id that is already waiting.
+    """
+    try:
+        state = await run_in_threadpool(get_agent().run, payload.model_dump())
+    except CheckpointExists as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return JSONResponse(state)
+
+@app.post("/run/stream")
+async def run_pipeline_stream(payload: InputPayload):
+    """
+    Run the full pipeline, streaming progress as server-sent events:
+    `stage_end` per finished stage, `draft` with the reply once CREATE has
+    written it, then `done` with the state /run would return (or `error`).
+    """
+    def events():
+        yield from get_agent().stream(payload.model_dump())
+
+    return event_stream(events())
+
+@app.post("/tickets/{ticket_id}/answer")
+async def answer_ticket(ticket_id: str, payload: AnswerPayload):
+    """Resume a suspended run with the customer's answer."""
+    try:
+        state = await run_in_threadpool(get_agent().resume, ticket_id, payload.answer)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"No run waiting on an answer for {ticket_id}")
+    except CheckpointExists as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return JSONResponse(state)
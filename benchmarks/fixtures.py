@@ -0,0 +1,119 @@
+# benchmarks/fixtures.py
+import hashlib
+import os
+import random
+import re
+import shutil
+from typing import Any, Dict, List
+
+import numpy as np
+import chromadb
+from chromadb.api.types import EmbeddingFunction
+
+from src.langie.ingest import build_documents, sync_collection
+from src.langie.lexical import write_documents
+from src.langie.numpy_index import export_collection
+from src.langie.retriever import DEFAULT_COLLECTION, bump_kb_version
+
+EMBEDDING_DIM = 384  # same width as all-MiniLM-L6-v2
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbeddingFunction(EmbeddingFunction):
+    """
+    Deterministic, offline stand-in for the sentence-transformer model.
+
+    Unigrams and bigrams are hashed into a fixed-width signed bag of words and
+    L2-normalized, so texts sharing words land close together. No model
+    download, identical vectors across runs and machines.
+    """
+
+    model_name = "hashing-384"
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    def __call__(self, input):
+        matrix = np.zeros((len(input), self.dim), dtype=np.float32)
+        for row, text in enumerate(input):
+            tokens = _TOKEN.findall(text.lower())
+            for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+                digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+                matrix[row, digest % self.dim] += 1.0 if (digest >> 63) else -1.0
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (matrix / norms).tolist()
+
+
+TOPICS = {
+    "order": ("track my order", "change the delivery address of my order", "cancel my order", "combine two orders"),
+    "refund": ("get a refund", "check my refund status", "get refunded to a different card", "return a gift"),
+    "shipping": ("ship internationally", "upgrade to express shipping", "pick up from a store", "ship to a PO box"),
+    "account": ("reset my password", "delete my account", "change my email", "enable two-factor login"),
+    "payment": ("pay with PayPal", "split a payment", "fix a declined card", "get an invoice"),
+    "warranty": ("claim warranty", "extend my warranty", "repair a broken screen", "replace a faulty charger"),
+}
+PRODUCTS = ("smartphone", "laptop", "headphones", "smartwatch", "tablet", "camera", "speaker", "monitor",
+            "keyboard", "router", "printer", "console", "drone", "e-reader", "projector", "charger")
+ASKS = ("How do I {action} for a {product}?", "Can I {action} if I bought a {product}?",
+        "What is the process to {action} for my {product}?", "Is it possible to {action} on a {product} purchase?")
+OUT_OF_SCOPE = ("What is your hiring process?", "Tell me about stock market trends",
+                "Who is the CEO of the company?", "Write me a poem about the sea")
+
+
+def synthetic_faqs(n: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """`n` FAQ entries in the `data/kb_faq.json` shape, reproducible for a given seed."""
+    rng = random.Random(seed)
+    faqs = []
+    for i in range(n):
+        category = rng.choice(sorted(TOPICS))
+        action = rng.choice(TOPICS[category])
+        product = rng.choice(PRODUCTS)
+        question = rng.choice(ASKS).format(action=action, product=product)
+        answer = (f"To {action} for a {product}, open Help > {category.title()} in your account "
+                  f"and follow the steps (reference KB-{i:06d}).")
+        faqs.append({"id": f"syn-{i:06d}", "question": question, "answer": answer, "category": category})
+    return faqs
+
+
+def sample_queries(faqs: List[Dict[str, Any]], n: int, seed: int = 11) -> List[str]:
+    """Distinct customer-style queries: paraphrased FAQ questions plus a few out-of-scope ones."""
+    rng = random.Random(seed)
+    queries = []
+    for i in range(n):
+        if i % 10 == 9:
+            queries.append(f"{rng.choice(OUT_OF_SCOPE)} (#{i})")
+            continue
+        faq = rng.choice(faqs)
+        queries.append(f"Hi, {faq['question'].rstrip('?').lower()}? My order is #{1000 + i}.")
+    return queries
+
+
+def build_workspace(root: str, faqs: List[Dict[str, Any]], embedding_fn, repo_root: str,
+                    collection_name: str = DEFAULT_COLLECTION, batch_size: int = 2048) -> Dict[str, Any]:
+    """
+    Lay out a scratch copy of the app's working directory around a synthetic KB.
+
+    `<root>/data/chroma` holds the Chroma collection plus its NumPy export and
+    lexical documents, and `<root>/static` mirrors the repo's, so the app and
+    the pipeline can run with `root` as their working directory without
+    touching the repo's data.
+    Re-using an existing `root` only re-embeds what changed.
+    """
+    db_path = os.path.join(root, "data", "chroma")
+    os.makedirs(db_path, exist_ok=True)
+    static = os.path.join(root, "static")
+    if not os.path.exists(static):
+        shutil.copytree(os.path.join(repo_root, "static"), static)
+
+    collection = chromadb.PersistentClient(path=db_path).get_or_create_collection(
+        collection_name, embedding_function=embedding_fn
+    )
+    docs = build_documents(faqs)
+    plan = sync_collection(collection, docs, embedding_fn, batch_size=batch_size)
+    if plan.upserts or plan.deleted or not os.path.exists(os.path.join(db_path, f"{collection_name}.npy")):
+        export_collection(collection, db_path, collection_name)
+        write_documents(db_path, collection_name, docs)
+        bump_kb_version(db_path, collection_name)
+    return {"db_path": db_path, **plan.summary()}
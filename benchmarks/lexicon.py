@@ -0,0 +1,107 @@
+# benchmarks/lexicon.py
+"""
+Micro-benchmark: entity extraction cost as the lexicon grows.
+
+Compares the compiled single-pass Lexicon with the naive approach it
+replaced (one `term in text` check per term) for lexicons of increasing
+size, over the same customer queries.
+
+    python benchmarks/lexicon.py --terms 10,100,1000,5000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+from benchmarks.fixtures import sample_queries, synthetic_faqs  # noqa: E402
+from src.langie.lexicon import DEFAULT_LEXICON, Lexicon, normalize_text  # noqa: E402
+
+DEFAULT_TERMS = (10, 100, 1000, 5000)
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+KINDS = ("intent", "issue", "product")
+
+
+def synthetic_lexicon(n_terms: int, seed: int = 5) -> Dict[str, Any]:
+    """The default lexicon padded with made-up terms to `n_terms` in total."""
+    rng = random.Random(seed)
+    data = {kind: {value: list(terms) for value, terms in DEFAULT_LEXICON[kind].items()} for kind in KINDS}
+    data["patterns"] = dict(DEFAULT_LEXICON["patterns"])
+    count = sum(len(t) for kind in KINDS for t in data[kind].values())
+    while count < n_terms:
+        word = "".join(rng.choice("bcdfghklmnprstvz") + rng.choice("aeiou") for _ in range(rng.randint(2, 4)))
+        term = word if rng.random() < 0.7 else f"{word} {rng.choice(('pro', 'plus', 'max', 'mini'))}"
+        kind = rng.choice(KINDS)
+        data[kind].setdefault(f"{kind}_{count // 20}", []).append(term)
+        count += 1
+    return data
+
+
+def naive_extract(data: Dict[str, Any], text: str) -> Dict[str, str]:
+    """The pre-lexicon approach: a substring check per term, per kind."""
+    text = normalize_text(text)
+    found = {}
+    for kind in KINDS:
+        for value, terms in data[kind].items():
+            if any(term in text for term in terms):
+                found[kind] = value
+                break
+    return found
+
+
+def _per_text_us(fn, texts: List[str], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    return round((time.perf_counter() - started) / (repeat * len(texts)) * 1e6, 3)
+
+
+def run(term_counts: Sequence[int] = DEFAULT_TERMS, texts: int = 200, repeat: int = 5) -> Dict[str, Any]:
+    queries = sample_queries(synthetic_faqs(500), texts)
+    report: Dict[str, Any] = {
+        "meta": {"timestamp": datetime.utcnow().isoformat(), "texts": len(queries), "repeat": repeat},
+        "terms": {},
+    }
+    for n in term_counts:
+        data = synthetic_lexicon(n)
+        started = time.perf_counter()
+        lexicon = Lexicon.from_dict(data)
+        compile_ms = round((time.perf_counter() - started) * 1000, 3)
+        report["terms"][str(n)] = {
+            "compile_ms": compile_ms,
+            "compiled_us_per_text": _per_text_us(lexicon.extract, queries, repeat),
+            "naive_us_per_text": _per_text_us(lambda t: naive_extract(data, t), queries, repeat),
+        }
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Lexicon extraction cost vs lexicon size")
+    parser.add_argument("--terms", default=",".join(map(str, DEFAULT_TERMS)), help="Comma-separated lexicon sizes")
+    parser.add_argument("--texts", type=int, default=200, help="Queries per measurement")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the queries")
+    parser.add_argument("--output", help="Result JSON path (default: benchmarks/results/lexicon-<time>.json)")
+    args = parser.parse_args(argv)
+
+    report = run([int(n) for n in args.terms.split(",") if n.strip()], args.texts, args.repeat)
+    for n, row in report["terms"].items():
+        print(f"{n:>6} terms: compiled {row['compiled_us_per_text']:>8} µs/text, "
+              f"naive {row['naive_us_per_text']:>9} µs/text (compile {row['compile_ms']} ms)")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"lexicon-{datetime.now():%Y%m%d-%H%M%S}.json")
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
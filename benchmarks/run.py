@@ -0,0 +1,346 @@
+# benchmarks/run.py
+"""
+Offline benchmark suite: pipeline throughput, retriever latency vs KB size,
+and /chat latency. Everything runs on synthetic KBs embedded with a
+deterministic hashing model, so no network or model download is needed.
+
+    python benchmarks/run.py --sizes 1000,10000,100000
+    python benchmarks/run.py --sizes 1000 --compare benchmarks/results/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+from benchmarks.fixtures import HashingEmbeddingFunction, build_workspace, sample_queries, synthetic_faqs  # noqa: E402
+from src.langie.pipeline import LangGraphAgent  # noqa: E402
+from src.langie.retriever import (  # noqa: E402
+    BACKENDS,
+    Retriever,
+    get_embedding_function,
+    get_retriever,
+    register_embedding_function,
+)
+from src.langie.semantic_cache import SemanticCache  # noqa: E402
+from src.langie.tickets import TicketStore  # noqa: E402
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_WORKDIR = os.path.join(REPO_ROOT, "benchmarks", ".work")
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+CONFIG_PATH = os.path.join(REPO_ROOT, "config", "stages.yaml")
+SUITES = ("retriever", "pipeline", "chat")
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds for a list of durations in seconds."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"n": 0}
+    last = len(ordered) - 1
+
+    def pct(q):
+        return round(ordered[min(last, int(round(q * last)))] * 1000, 3)
+
+    return {
+        "n": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+    }
+
+
+def _timed(fn, items) -> List[float]:
+    samples = []
+    for item in items:
+        started = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+# ----------------- RETRIEVER -----------------
+def bench_retriever(db_path: str, queries: List[str], embedding_fn, batch_size: int = 16) -> Dict[str, Any]:
+    """
+    `search` latency (uncached and cached) and `search_many` throughput for
+    each dense backend, plus the lexical and hybrid modes (over Chroma).
+    """
+    variants = {backend: (backend, "dense") for backend in BACKENDS}
+    variants.update(lexical=("chroma", "lexical"), hybrid=("chroma", "hybrid"))
+    results = {}
+    for name, (backend, mode) in variants.items():
+        cold = Retriever(db_path=db_path, embedding_fn=embedding_fn, backend=backend, mode=mode, cache_size=0)
+        cold.search("warm up")  # open the collection / mmap outside the timings
+        uncached = _timed(lambda q: cold.search(q, top_k=3), queries)
+
+        started = time.perf_counter()
+        for i in range(0, len(queries), batch_size):
+            cold.search_many(queries[i:i + batch_size], top_k=3)
+        batched_elapsed = time.perf_counter() - started
+
+        warm = Retriever(db_path=db_path, embedding_fn=embedding_fn, backend=backend, mode=mode)
+        for q in queries:
+            warm.search(q, top_k=3)
+        cached = _timed(lambda q: warm.search(q, top_k=3), queries)
+
+        results[name] = {
+            "search": summarize(uncached),
+            "search_cached": summarize(cached),
+            "search_many_queries_per_sec": round(len(queries) / batched_elapsed, 2),
+            "search_many_batch_size": batch_size,
+        }
+    return results
+
+
+# ----------------- PIPELINE -----------------
+def bench_pipeline(queries: List[str], runs: int, workers: int) -> Dict[str, Any]:
+    """`LangGraphAgent.run` latency run-by-run, and throughput with `workers` threads."""
+    agent = LangGraphAgent(config_path=CONFIG_PATH)
+    payloads = [
+        {"customer_name": f"Bench {i}", "email": f"bench{i}@example.com", "query": queries[i % len(queries)],
+         "priority": "Medium", "ticket_id": f"BENCH-{i:05d}"}
+        for i in range(runs)
+    ]
+    agent.run(dict(payloads[0]))  # warm up
+
+    sequential = _timed(lambda p: agent.run(dict(p)), payloads)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda p: agent.run(dict(p)), payloads))
+    concurrent_elapsed = time.perf_counter() - started
+
+    return {
+        "sequential": {"latency": summarize(sequential),
+                       "runs_per_sec": round(len(payloads) / sum(sequential), 2)},
+        "concurrent": {"workers": workers,
+                       "runs_per_sec": round(len(payloads) / concurrent_elapsed, 2)},
+    }
+
+
+# ----------------- /chat -----------------
+def bench_chat(workspace: str, queries: List[str], requests: int, concurrency: int) -> Dict[str, Any]:
+    """
+    /chat latency through the FastAPI test client, one at a time and
+    `concurrency` at a time. Queries repeat, so after the first pass most
+    requests are answered by the semantic response cache; its hit rate is
+    reported alongside.
+    """
+    import httpx
+    from fastapi.testclient import TestClient
+
+    import app as app_module  # first import happens inside the workspace (static/, data/)
+
+    # point the app at this workspace's KB and a fresh ticket store
+    app_module.kb_search.retriever = get_retriever()
+    previous_cache, app_module.semantic_cache = app_module.semantic_cache, SemanticCache(get_retriever())
+    tickets_path = os.path.join(workspace, "data", "bench_tickets.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(tickets_path + suffix):
+            os.remove(tickets_path + suffix)
+    previous_store, app_module.tickets = app_module.tickets, TicketStore(tickets_path, legacy_json=None)
+
+    bodies = [
+        {"customer_name": f"Bench {i}", "email": f"bench{i}@example.com", "query": queries[i % len(queries)]}
+        for i in range(requests)
+    ]
+    try:
+        with TestClient(app_module.app) as client:
+            client.post("/chat", json=bodies[0])  # warm up
+            sequential = _timed(lambda b: client.post("/chat", json=b).raise_for_status(), bodies)
+
+        async def fire():
+            limit = asyncio.Semaphore(concurrency)
+            transport = httpx.ASGITransport(app=app_module.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                async def one(body):
+                    async with limit:
+                        started = time.perf_counter()
+                        (await client.post("/chat", json=body)).raise_for_status()
+                        return time.perf_counter() - started
+                started = time.perf_counter()
+                samples = await asyncio.gather(*(one(b) for b in bodies))
+                return samples, time.perf_counter() - started
+
+        before = app_module.kb_batcher.stats()
+        concurrent, elapsed = asyncio.run(fire())
+        after = app_module.kb_batcher.stats()
+    finally:
+        app_module.tickets.close()
+        app_module.tickets = previous_store
+        cache_stats, app_module.semantic_cache = app_module.semantic_cache.stats(), previous_cache
+
+    batches = after["batches"] - before["batches"]
+    return {
+        "sequential": {"latency": summarize(sequential)},
+        "concurrent": {
+            "concurrency": concurrency,
+            "latency": summarize(concurrent),
+            "requests_per_sec": round(len(bodies) / elapsed, 2),
+            "avg_kb_batch_size": round((after["items"] - before["items"]) / batches, 2) if batches else 0.0,
+        },
+        "semantic_cache_hit_rate": cache_stats["hit_rate"],
+    }
+
+
+# ----------------- SUITE -----------------
+def run_suite(sizes: Sequence[int] = DEFAULT_SIZES, queries: int = 200, runs: int = 100, requests: int = 200,
+              workers: int = 8, concurrency: int = 16, seed: int = 7, workdir: str = DEFAULT_WORKDIR,
+              suites: Sequence[str] = SUITES, verbose: bool = False) -> Dict[str, Any]:
+    """
+    Run the selected suites once per KB size and return a JSON-ready report.
+
+    Each size gets its own scratch workspace under `workdir` (kept between
+    invocations, so large KBs are only embedded once). The hashing embedding
+    is registered as the default model for the duration of the run so the
+    pipeline and the app use it too.
+    """
+    embedding_fn = HashingEmbeddingFunction()
+    previous_fn = get_embedding_function()
+    previous_cwd = os.getcwd()
+    if not verbose:
+        logging.disable(logging.ERROR)  # measure the code, not console output
+
+    report: Dict[str, Any] = {"meta": _meta(embedding_fn, seed, verbose), "sizes": {}}
+    register_embedding_function(embedding_fn)
+    try:
+        for size in sizes:
+            workspace = os.path.join(os.path.abspath(workdir), f"kb-{size}-seed{seed}")
+            faqs = synthetic_faqs(size, seed=seed)
+            started = time.perf_counter()
+            build = build_workspace(workspace, faqs, embedding_fn, REPO_ROOT)
+            build["seconds"] = round(time.perf_counter() - started, 3)
+            build.pop("db_path")
+
+            os.chdir(workspace)
+            probe = sample_queries(faqs, queries, seed=seed + size)
+            entry: Dict[str, Any] = {"build": build}
+            if "retriever" in suites:
+                entry["retriever"] = bench_retriever(os.path.join("data", "chroma"), probe, embedding_fn)
+            if "pipeline" in suites:
+                entry["pipeline"] = bench_pipeline(probe, runs, workers)
+            if "chat" in suites:
+                entry["chat"] = bench_chat(workspace, probe, requests, concurrency)
+            report["sizes"][str(size)] = entry
+            os.chdir(previous_cwd)
+    finally:
+        os.chdir(previous_cwd)
+        register_embedding_function(previous_fn)
+        logging.disable(logging.NOTSET)
+    return report
+
+
+def _meta(embedding_fn, seed: int, verbose: bool) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "embedding": embedding_fn.model_name,
+        "seed": seed,
+        "logging": "on" if verbose else "off",
+    }
+
+
+# ----------------- REGRESSION CHECK -----------------
+def _flatten(node, prefix=""):
+    if isinstance(node, dict):
+        for key, value in node.items():
+            yield from _flatten(value, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        yield prefix, node
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.25) -> List[Dict[str, Any]]:
+    """
+    Compare the p50/p95 latencies and throughputs both reports share.
+
+    Returns one row per metric with the relative change (positive = worse);
+    rows whose change exceeds `tolerance` are flagged as regressions.
+    """
+    base = dict(_flatten(baseline.get("sizes", {})))
+    rows = []
+    for key, value in _flatten(current.get("sizes", {})):
+        leaf = key.rsplit(".", 1)[-1]
+        if key not in base or not base[key] or ".build." in key:
+            continue
+        if leaf in ("p50_ms", "p95_ms"):
+            change = (value - base[key]) / base[key]
+        elif leaf.endswith("_per_sec"):
+            change = (base[key] - value) / base[key]
+        else:
+            continue
+        rows.append({"metric": key, "baseline": base[key], "current": value,
+                     "change": round(change, 4), "regression": change > tolerance})
+    return rows
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the pipeline, retriever and /chat")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Comma-separated KB sizes")
+    parser.add_argument("--suites", default=",".join(SUITES), help=f"Comma-separated subset of {SUITES}")
+    parser.add_argument("--queries", type=int, default=200, help="Distinct queries per retriever benchmark")
+    parser.add_argument("--runs", type=int, default=100, help="Pipeline runs per measurement")
+    parser.add_argument("--requests", type=int, default=200, help="/chat requests per measurement")
+    parser.add_argument("--workers", type=int, default=8, help="Threads for the concurrent pipeline run")
+    parser.add_argument("--concurrency", type=int, default=16, help="In-flight /chat requests")
+    parser.add_argument("--seed", type=int, default=7, help="Seed for the synthetic KB and queries")
+    parser.add_argument("--workdir", default=DEFAULT_WORKDIR, help="Where synthetic KBs are built (reused)")
+    parser.add_argument("--fresh", action="store_true", help="Rebuild the synthetic KBs from scratch")
+    parser.add_argument("--output", help="Result JSON path (default: benchmarks/results/bench-<time>.json)")
+    parser.add_argument("--compare", help="Baseline result JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument("--verbose", action="store_true", help="Keep logging on during the run")
+    args = parser.parse_args(argv)
+
+    suites = [s.strip() for s in args.suites.split(",") if s.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+    if args.fresh and os.path.isdir(args.workdir):
+        shutil.rmtree(args.workdir)
+
+    report = run_suite(
+        sizes=[int(s) for s in args.sizes.split(",") if s.strip()],
+        queries=args.queries, runs=args.runs, requests=args.requests, workers=args.workers,
+        concurrency=args.concurrency, seed=args.seed, workdir=args.workdir, suites=suites, verbose=args.verbose,
+    )
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {output}")
+
+    if not args.compare:
+        return 0
+    with open(args.compare) as f:
+        rows = compare(report, json.load(f), args.tolerance)
+    for row in rows:
+        marker = "❌" if row["regression"] else "  "
+        print(f"{marker} {row['metric']:<60} {row['baseline']:>10} -> {row['current']:>10} ({row['change']:+.1%})")
+    regressions = [r for r in rows if r["regression"]]
+    print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%} across {len(rows)} metrics")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
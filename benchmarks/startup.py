@@ -0,0 +1,111 @@
+# benchmarks/startup.py
+"""
+Cold-start benchmark: how long importing the entry points takes, and which
+heavy dependencies an import drags in.
+
+Each target is imported in a fresh interpreter, `--runs` times. The heavy
+modules (chromadb, sentence_transformers, torch, langgraph, numpy) should
+only load when a retriever or an agent is actually used, never on import.
+
+    python benchmarks/startup.py --runs 5 [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+TARGETS = ("src.langie.pipeline", "src.langie.cli", "app")
+HEAVY_MODULES = ("chromadb", "sentence_transformers", "torch", "langgraph", "numpy")
+
+_PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"ms": elapsed * 1000, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(module: str, cwd: str, heavy: Sequence[str] = HEAVY_MODULES) -> Dict[str, Any]:
+    """Import `module` in a fresh interpreter; its import time and the heavy modules it loaded."""
+    code = _PROBE.format(root=REPO_ROOT, module=module, heavy=tuple(heavy))
+    env = dict(os.environ, LANGIE_WARMUP="0", HF_HUB_OFFLINE="1")
+    out = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run(targets: Sequence[str] = TARGETS, runs: int = 5) -> Dict[str, Any]:
+    report: Dict[str, Any] = {
+        "meta": {"timestamp": datetime.utcnow().isoformat(), "runs": runs, "python": sys.version.split()[0]},
+        "imports": {},
+    }
+    # app.py serves static/ and creates data/ relative to the cwd: import it in a scratch copy
+    with tempfile.TemporaryDirectory(prefix="langie-startup-") as cwd:
+        shutil.copytree(os.path.join(REPO_ROOT, "static"), os.path.join(cwd, "static"))
+        for module in targets:
+            samples = [measure_import(module, cwd) for _ in range(runs)]
+            times = [s["ms"] for s in samples]
+            report["imports"][module] = {
+                "p50_ms": round(statistics.median(times), 2),
+                "min_ms": round(min(times), 2),
+                "heavy": sorted({m for s in samples for m in s["heavy"]}),
+            }
+    return report
+
+
+def check(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None,
+          tolerance: float = 0.25) -> List[str]:
+    """Problems with `report`: heavy imports at import time, or p50 slower than the baseline by > tolerance."""
+    problems = []
+    for module, row in report["imports"].items():
+        if row["heavy"]:
+            problems.append(f"{module} imports {', '.join(row['heavy'])} at import time")
+        base = ((baseline or {}).get("imports") or {}).get(module)
+        if base and base.get("p50_ms") and (row["p50_ms"] - base["p50_ms"]) / base["p50_ms"] > tolerance:
+            problems.append(f"{module} import p50 {row['p50_ms']} ms vs baseline {base['p50_ms']} ms")
+    return problems
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time (cold start) benchmark")
+    parser.add_argument("--targets", default=",".join(TARGETS), help="Comma-separated modules to import")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per target")
+    parser.add_argument("--output", help="Result JSON path (default: benchmarks/results/startup-<time>.json)")
+    parser.add_argument("--compare", help="Baseline result JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    report = run([t for t in args.targets.split(",") if t.strip()], args.runs)
+    for module, row in report["imports"].items():
+        heavy = f"  (loads {', '.join(row['heavy'])})" if row["heavy"] else ""
+        print(f"{module:<22} p50 {row['p50_ms']:>8} ms  min {row['min_ms']:>8} ms{heavy}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"startup-{datetime.now():%Y%m%d-%H%M%S}.json")
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {output}")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    problems = check(report, baseline, args.tolerance)
+    for problem in problems:
+        print(f"❌ {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,24 @@
+import importlib
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    """app.py imported afresh in tmp_path, so its data/ stores and agent are this test's own."""
+    monkeypatch.chdir(tmp_path)  # app creates data/ and serves static/ relative to the cwd
+    monkeypatch.setenv("LANGIE_WARMUP", "0")
+    shutil.copytree(Path(__file__).parent / "static", tmp_path / "static")
+    sys.modules.pop("app", None)
+    yield importlib.import_module("app")
+    sys.modules.pop("app", None)
+
+
+@pytest.fixture
+def app_client(app_module):
+    from fastapi.testclient import TestClient
+
+    return TestClient(app_module.app)
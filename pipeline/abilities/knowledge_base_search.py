@@ -1,14 +1,23 @@
 # pipeline/abilities/knowledge_base_search.py
-from src.langie.retriever import Retriever
+from src.langie.retriever import DEFAULT_MODEL, get_retriever
 
 class KnowledgeBaseSearch:
     def __init__(self, config=None):
         # Config may hold db path, collection name, top-k, etc.
         db_path = config.get("db_path", "data/chroma") if config else "data/chroma"
         collection = config.get("collection", "faq") if config else "faq"
+        model_name = config.get("embedding_model", DEFAULT_MODEL) if config else DEFAULT_MODEL
+        backend = config.get("backend", "chroma") if config else "chroma"
+        mode = config.get("mode") if config else None  # dense | lexical | hybrid
         self.top_k = config.get("top_k", 3) if config else 3
 
-        self.retriever = Retriever(db_path=db_path, collection_name=collection)
+        cache = {k: config[k] for k in ("cache_size", "cache_ttl") if config and k in config}
+
+        # Shared with the pipeline/MCP client; loads on first search
+        self.retriever = get_retriever(
+            db_path=db_path, collection_name=collection, model_name=model_name, backend=backend, mode=mode,
+            **cache
+        )
 
     def run(self, state: dict):
         query = state.get("input", {}).get("text", "")
@@ -18,17 +27,34 @@ class KnowledgeBaseSearch:
             return state
 
         results = self.retriever.search(query, top_k=self.top_k)
+        return self._apply(state, results)
+
+    def run_many(self, states: list):
+        """Batched `run`: one embedding call and one KB query for all states."""
+        queries = [s.get("input", {}).get("text", "") for s in states]
+        todo = [i for i, q in enumerate(queries) if q]
+        batched = self.retriever.search_many([queries[i] for i in todo], top_k=self.top_k) if todo else []
+        results = dict(zip(todo, batched))
+        return [
+            self._apply(state, results[i]) if i in results else self.run(state)
+            for i, state in enumerate(states)
+        ]
 
+    def _apply(self, state: dict, results: list):
         # Normalize into pipeline output
         kb_results = []
         for r in results:
-            kb_results.append({
+            hit = {
                 "id": r.get("id"),
                 "question": r.get("question"),
                 "answer": r.get("answer"),
                 "score": r.get("score", 1.0),
                 "metadata": r.get("metadata", {})
-            })
+            }
+            # Lexical hits keep their raw BM25 score: it marks the 1 / (1 + bm25) scale
+            if "bm25" in r:
+                hit["bm25"] = r["bm25"]
+            kb_results.append(hit)
 
         state["knowledge_base"] = kb_results
 
@@ -39,4 +65,3 @@ class KnowledgeBaseSearch:
             state["response"] = "No response generated"
 
         return state
-
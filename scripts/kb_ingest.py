@@ -1,52 +1,182 @@
 # scripts/kb_ingest.py
-import json
+import argparse
 import os
+import sys
 import chromadb
-from sentence_transformers import SentenceTransformer
-from chromadb.utils import embedding_functions
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.langie.ingest import build_documents, load_faq, sync_collection  # noqa: E402
+from src.langie.lexical import lexical_path, write_documents  # noqa: E402
+from src.langie.numpy_index import export_collection, index_paths  # noqa: E402
+from src.langie.retriever import DEFAULT_MODEL, bump_kb_version, get_embedding_function, kb_version_path  # noqa: E402
+from src.langie.shards import load_manifest, partition, shard_collection_name, write_manifest  # noqa: E402
 
 DATA_PATH = "data/kb_faq.json"
 DB_PATH = "data/chroma"
 COLLECTION_NAME = "faq"
+BATCH_SIZE = 256
+
+
+def ingest(data_path: str = DATA_PATH, db_path: str = DB_PATH, collection_name: str = COLLECTION_NAME,
+           batch_size: int = BATCH_SIZE, dry_run: bool = False, model_name: str = DEFAULT_MODEL,
+           numpy_export: bool = False, lexical_only: bool = False, shard_by=None):
+    """
+    Incrementally sync the FAQ JSON into ChromaDB.
 
-def load_faq(path: str):
-    """Load FAQ JSON file into a list of dicts with 'question' and 'answer'."""
-    with open(path, "r") as f:
-        return json.load(f)
+    Each `Q:/A:` document is content-hashed; only new or changed entries are
+    embedded and upserted, and entries removed from the JSON are deleted.
+    With `numpy_export`, the collection's embeddings are also dumped to the
+    memory-mapped index used by `Retriever(backend="numpy")`. The documents
+    are always written for the lexical (BM25) index as well; `lexical_only`
+    writes just those, without loading the embedding model or touching Chroma.
+
+    With `shard_by` (entity kinds, e.g. ["intent", "product"]) the FAQs are
+    also partitioned into one collection per category (see `langie.shards`),
+    reusing the embeddings just stored in the global collection, which stays
+    as the routing fallback.
+    """
+    if lexical_only:
+        faqs = load_faq(data_path)
+        docs = build_documents(faqs)
+        if not dry_run:
+            path = write_documents(db_path, collection_name, docs)
+            if shard_by:
+                shards = partition(faqs, docs, shard_by)
+                for shard in shards.values():
+                    name = shard_collection_name(collection_name, shard["kind"], shard["value"])
+                    write_documents(db_path, name, shard["docs"])
+                    bump_kb_version(db_path, name)
+                _drop_stale_shards(None, db_path, collection_name, shards)
+                write_manifest(db_path, collection_name, shard_by, shards)
+                print(f"✅ Wrote {len(shards)} lexical shard indexes")
+            bump_kb_version(db_path, collection_name)
+            print(f"✅ Wrote {len(docs)} FAQ entries to the lexical index at {path}")
+        return None
 
-def ingest():
     # Init Chroma client (persistent)
-    client = chromadb.PersistentClient(path=DB_PATH)
+    client = chromadb.PersistentClient(path=db_path)
 
-    # Use a SentenceTransformer wrapper (works offline too)
-    embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name="all-MiniLM-L6-v2"  # downloaded once, then cached locally
-    )
+    # Same (lazily loaded) SentenceTransformer wrapper the Retriever uses
+    embedding_fn = get_embedding_function(model_name)
 
     # Create or load collection with the embedding function
     collection = client.get_or_create_collection(
-        name=COLLECTION_NAME,
+        name=collection_name,
         embedding_function=embedding_fn
     )
 
-    # Load FAQ data
-    faqs = load_faq(DATA_PATH)
+    faqs = load_faq(data_path)
+    docs = build_documents(faqs)
+    plan = sync_collection(collection, docs, embedding_fn, batch_size=batch_size, dry_run=dry_run)
+    summary = plan.summary()
+
+    if dry_run:
+        print(f"🔎 Dry run for {db_path}/{collection_name}: "
+              f"{summary['added']} to add, {summary['changed']} to update, "
+              f"{summary['deleted']} to delete, {summary['unchanged']} unchanged")
+        return plan
+
+    changed = bool(plan.upserts or plan.deleted)
+    if numpy_export and (changed or not os.path.exists(index_paths(db_path, collection_name)[0])):
+        exported = export_collection(collection, db_path, collection_name)
+        print(f"✅ Exported {exported} embeddings to {index_paths(db_path, collection_name)[0]}")
+        changed = True
+
+    if changed or not os.path.exists(lexical_path(db_path, collection_name)):
+        write_documents(db_path, collection_name, docs)
+        changed = True
+
+    if shard_by and _sync_shards(client, collection, faqs, docs, shard_by, embedding_fn, db_path,
+                                 collection_name, batch_size=batch_size, numpy_export=numpy_export):
+        changed = True  # routers reload the shard manifest on the global version bump
+
+    if changed:
+        # Invalidate query/result caches of running retrievers
+        bump_kb_version(db_path, collection_name)
+
+    print(f"✅ Synced {len(docs)} FAQ entries into ChromaDB at {db_path}: "
+          f"{summary['added']} added, {summary['changed']} updated, "
+          f"{summary['deleted']} deleted, {summary['unchanged']} unchanged")
+    return plan
+
+
+def _sync_shards(client, collection, faqs, docs, shard_by, embedding_fn, db_path: str, collection_name: str,
+                 batch_size: int = BATCH_SIZE, numpy_export: bool = False) -> bool:
+    """Sync one collection per category; True if any shard or the manifest changed."""
+    shards = partition(faqs, docs, shard_by)
+    stored = _StoredEmbeddings(collection, docs)
+    changed = False
+    for key, shard in sorted(shards.items()):
+        name = shard_collection_name(collection_name, shard["kind"], shard["value"])
+        target = client.get_or_create_collection(name=name, embedding_function=embedding_fn)
+        plan = sync_collection(target, shard["docs"], stored, batch_size=batch_size)
+        shard_changed = bool(plan.upserts or plan.deleted)
+        if numpy_export and (shard_changed or not os.path.exists(index_paths(db_path, name)[0])):
+            export_collection(target, db_path, name)
+            shard_changed = True
+        if shard_changed or not os.path.exists(lexical_path(db_path, name)):
+            write_documents(db_path, name, shard["docs"])
+            bump_kb_version(db_path, name)
+            changed = True
+        print(f"  ↳ shard {key}: {len(shard['docs'])} entries in {name}")
+
+    previous = load_manifest(db_path, collection_name)
+    changed = _drop_stale_shards(client, db_path, collection_name, shards) or changed
+    write_manifest(db_path, collection_name, shard_by, shards)
+    return changed or previous != load_manifest(db_path, collection_name)
+
+
+def _drop_stale_shards(client, db_path: str, collection_name: str, shards) -> bool:
+    """Delete shard collections (and their sidecars) no longer in the partition."""
+    previous = load_manifest(db_path, collection_name) or {}
+    current = {shard_collection_name(collection_name, s["kind"], s["value"]) for s in shards.values()}
+    stale = {s["collection"] for s in previous.get("shards", {}).values()} - current
+    for name in stale:
+        if client is not None:
+            try:
+                client.delete_collection(name)
+            except Exception:
+                pass  # already gone
+        for path in (lexical_path(db_path, name), kb_version_path(db_path, name), *index_paths(db_path, name)):
+            if os.path.exists(path):
+                os.remove(path)
+    return bool(stale)
+
+
+class _StoredEmbeddings:
+    """
+    Embedding function for shard syncs: looks documents up by id in the
+    global collection (already synced) instead of running the model again.
+    """
+
+    def __init__(self, collection, docs):
+        self.collection = collection
+        self.ids = {d["text"]: d["id"] for d in docs}
 
-    ids, texts, metadatas = [], [], []
-    for i, item in enumerate(faqs):
-        q = item.get("question", "").strip()
-        a = item.get("answer", "").strip()
+    def __call__(self, texts):
+        ids = [self.ids[t] for t in texts]
+        found = self.collection.get(ids=ids, include=["embeddings"])
+        by_id = dict(zip(found["ids"], found["embeddings"]))
+        return [by_id[i] for i in ids]
 
-        ids.append(f"faq-{i}")
-        texts.append(f"Q: {q}\nA: {a}")  # embed both Q & A
-        metadatas.append({"question": q, "answer": a})
 
-    # Clean old data (safe refresh)
-    if ids:
-        collection.delete(ids=ids)
-        collection.add(ids=ids, documents=texts, metadatas=metadatas)
+def main():
+    parser = argparse.ArgumentParser(description="Sync the FAQ JSON into ChromaDB")
+    parser.add_argument("--data", default=DATA_PATH, help="Path to FAQ JSON")
+    parser.add_argument("--db-path", default=DB_PATH, help="ChromaDB persistence directory")
+    parser.add_argument("--collection", default=COLLECTION_NAME, help="Collection name")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Documents embedded per model call")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would change")
+    parser.add_argument("--numpy", action="store_true", help="Also export the memory-mapped NumPy index")
+    parser.add_argument("--lexical-only", action="store_true",
+                        help="Only write the lexical (BM25) index; needs no embedding model")
+    parser.add_argument("--shard-by", default="",
+                        help="Comma-separated entity kinds (intent,issue,product) to also shard the KB by")
+    args = parser.parse_args()
+    shard_by = [kind.strip() for kind in args.shard_by.split(",") if kind.strip()]
+    ingest(args.data, args.db_path, args.collection, batch_size=args.batch_size, dry_run=args.dry_run,
+           numpy_export=args.numpy, lexical_only=args.lexical_only, shard_by=shard_by)
 
-    print(f"✅ Ingested {len(faqs)} FAQ entries into ChromaDB at {DB_PATH}")
 
 if __name__ == "__main__":
-    ingest()
+    main()
@@ -1,8 +1,7 @@
-from rich.console import Console
-
-console = Console()
-
 def main():
+    from rich.console import Console
+
+    console = Console()
     console.rule("[bold green]Langie Agent")
     console.print("✅ Repo is live. Next step: add config + engine.", style="bold cyan")
 
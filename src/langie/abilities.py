@@ -4,8 +4,13 @@ import re
 from datetime import datetime
 from typing import Any, Dict, List
 
+from .lexicon import get_lexicon
+
 logger = logging.getLogger(__name__)
 
+# Order id in a clarification answer ("#123" or a bare "123")
+ANSWER_ORDER_ID = re.compile(r"#?\d+")
+
 # -------------------------------
 # STAGE 1: INTAKE
 # -------------------------------
@@ -32,9 +37,11 @@ def parse_request_text(state: Dict[str, Any]) -> Dict[str, Any]:
     Extract obvious patterns deterministically (fast-path).
     """
     text = state.get("query", "") or ""
-    order_id_match = re.search(r"#\d+", text)
-    if order_id_match:
-        state["entities"]["order_id"] = order_id_match.group()
+    lexicon = get_lexicon()
+    found = lexicon.extract(text)
+    for name in lexicon.patterns:  # identifiers (order_id, ...) from config/lexicon.yaml
+        if name in found:
+            state["entities"][name] = found[name]
     state["raw_query"] = text
     state["parsed_query_tokens"] = text.split()
     return state
@@ -43,29 +50,20 @@ def parse_request_text(state: Dict[str, Any]) -> Dict[str, Any]:
 def extract_entities(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     ATLAS: Identify product/issue/intent (simulate external system).
-    Pragmatic heuristic so the pipeline is fully functional out-of-the-box.
+    One pass of the compiled lexicon (config/lexicon.yaml) over the query.
     """
-    text = (state.get("raw_query") or state.get("query") or "").lower()
-    intent = None
-    issue = None
-    product = None
-
-    if "refund" in text:
-        intent = "refund_request"
-    if any(k in text for k in ["delay", "late", "haven't arrived", "hasn’t arrived"]):
-        issue = "delivery_delay"
-    if "invoice" in text:
-        product = "invoice_service"
+    text = state.get("raw_query") or state.get("query") or ""
+    lexicon = get_lexicon()
+    found = lexicon.extract(text)
+    matched = {kind: found[kind] for kind in lexicon.kinds if kind in found}
 
     # Merge into existing entities (non-destructive)
     ents = state.get("entities", {})
-    if intent: ents["intent"] = intent
-    if issue: ents["issue"] = issue
-    if product: ents["product"] = product
+    ents.update(matched)
     state["entities"] = ents
 
     # Lightweight confidence for conditional stages
-    state["confidence"] = 0.9 if any([intent, issue, product]) else 0.5
+    state["confidence"] = 0.9 if matched else 0.5
     return state
 
 
@@ -139,9 +137,10 @@ def clarify_question(state: Dict[str, Any]) -> Dict[str, Any]:
 def extract_answer(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     ATLAS: Simulate capturing a concise answer from a user/human channel.
-    If you already have 'clarification_answer' in state, keep it.
+    If you already have 'clarification_answer' in state (e.g. from
+    LangGraphAgent.resume), keep it; nothing to capture if nothing was asked.
     """
-    if "clarification_answer" not in state:
+    if "clarification_answer" not in state and state.get("clarifying_question"):
         # stub a response so the demo can run deterministically
         state["clarification_answer"] = "Order id is #12345"
     return state
@@ -152,7 +151,7 @@ def store_answer(state: Dict[str, Any]) -> Dict[str, Any]:
     STATE MGMT: Fold the answer back into entities.
     """
     ans = state.get("clarification_answer", "")
-    m = re.search(r"#?\d+", ans)
+    m = ANSWER_ORDER_ID.search(ans)
     if m:
         state.setdefault("entities", {})["order_id"] = m.group().lstrip("#")
     state.setdefault("answers", []).append(ans)
@@ -190,26 +189,23 @@ def store_data(state: Dict[str, Any]) -> Dict[str, Any]:
 def solution_evaluation(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     COMMON: Score potential solutions 1-100.
-    Deterministic heuristic: more KB hits → higher score.
+    Deterministic heuristic: more KB hits → higher score. The stage's
+    `escalate_when` condition (stages.yaml) turns the score into `decision`.
     """
     hits = int(state.get("kb_hits") or len(state.get("kb_results", []) or []))
     # cap at 100, simple linear heuristic
     score = max(0, min(100, 60 + 10 * min(hits, 4)))
     state["solution_score"] = score
-    state["decision"] = "resolve" if score >= 90 else "consider_escalation"
     return state
 
 
 def escalation_decision(state: Dict[str, Any]) -> Dict[str, Any]:
     """
-    ATLAS: Assign to human if score < 90.
+    ATLAS: Assign to a human. Runs only when the stage's `escalate_when`
+    condition (stages.yaml) holds.
     """
-    score = int(state.get("solution_score", 0))
-    if score < 90:
-        state["escalate_to"] = "human_agent"
-        state["ticket_status"] = "needs_escalation"
-    else:
-        state["ticket_status"] = "resolved"
+    state["escalate_to"] = "human_agent"
+    state["ticket_status"] = "needs_escalation"
     return state
 
 
@@ -0,0 +1,122 @@
+# src/langie/checkpoints.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_PATH = "data/checkpoints.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    ticket_id TEXT PRIMARY KEY,
+    stage     TEXT NOT NULL,
+    updated   TEXT NOT NULL,
+    state     BLOB NOT NULL
+)
+"""
+_INDEX = "CREATE INDEX IF NOT EXISTS checkpoints_updated ON checkpoints (updated)"
+
+
+class CheckpointExists(ValueError):
+    """A run is already waiting on this ticket."""
+
+
+def _dumps(state: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(state, default=str, separators=(",", ":")).encode("utf-8"))
+
+
+def _loads(blob: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class CheckpointStore:
+    """
+    SQLite-backed store (WAL mode) for suspended pipeline runs.
+
+    One row per ticket waiting on a customer: the stage to resume at and the
+    run state as compressed JSON. Waiting tickets live on disk only, so the
+    number of them doesn't grow the process's memory.
+    """
+
+    def __init__(self, path: str = DEFAULT_CHECKPOINT_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.execute(_INDEX)
+
+    def save(self, ticket_id: str, stage: str, state: Dict[str, Any], replace: bool = True) -> None:
+        """
+        Persist (or replace) the checkpoint of `ticket_id`, to resume at
+        `stage`. With `replace=False` an existing checkpoint is kept and
+        CheckpointExists is raised instead.
+        """
+        blob = _dumps(state)
+        verb = "INSERT OR REPLACE" if replace else "INSERT"
+        with self._lock:
+            try:
+                self._conn.execute(
+                    f"{verb} INTO checkpoints (ticket_id, stage, updated, state) VALUES (?, ?, ?, ?)",
+                    (ticket_id, stage, datetime.utcnow().isoformat(), blob),
+                )
+            except sqlite3.IntegrityError:
+                raise CheckpointExists(f"A run is already waiting on an answer for {ticket_id}") from None
+
+    def get(self, ticket_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """(stage, state) of a waiting ticket, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT stage, state FROM checkpoints WHERE ticket_id = ?", (ticket_id,)
+            ).fetchone()
+        return (row[0], _loads(row[1])) if row else None
+
+    def take(self, ticket_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Remove and return a checkpoint in one transaction, so concurrent
+        resumes of the same ticket can't both pick it up.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT stage, state FROM checkpoints WHERE ticket_id = ?", (ticket_id,)
+                ).fetchone()
+                if row:
+                    self._conn.execute("DELETE FROM checkpoints WHERE ticket_id = ?", (ticket_id,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return (row[0], _loads(row[1])) if row else None
+
+    def delete(self, ticket_id: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM checkpoints WHERE ticket_id = ?", (ticket_id,))
+        return cursor.rowcount > 0
+
+    def waiting(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Oldest waiting tickets first: [{ticket_id, stage, updated}]."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ticket_id, stage, updated FROM checkpoints ORDER BY updated LIMIT ?", (limit,)
+            ).fetchall()
+        return [{"ticket_id": t, "stage": s, "updated": u} for t, s, u in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
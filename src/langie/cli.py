@@ -1,11 +1,18 @@
 import argparse
 import json
-from .logger import get_logger
+import sys
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from .checkpoints import DEFAULT_CHECKPOINT_PATH, CheckpointStore
+from .logger import get_logger, set_log_level
 from pathlib import Path
-from .pipeline import LangGraphAgent
+from .pipeline import DEFAULT_LOG_LIMIT, LangGraphAgent
 
 logging = get_logger(__name__)
 
+# Per-process agent for `langie batch` workers (built once by _init_worker)
+_worker_agent = None
+
 def run(args):
     """Run the Langie bot with either sample or provided JSON input."""
     sample = {
@@ -19,15 +26,101 @@ def run(args):
         sample = json.loads(Path(args.input).read_text())
 
     if args.debug:
-        logging.basicConfig(level=logging.DEBUG)
-    else:
-        logging.basicConfig(level=logging.INFO)
+        set_log_level("DEBUG")
 
-    agent = LangGraphAgent(config_path=args.config)
+    checkpoints = CheckpointStore(args.checkpoints) if getattr(args, "checkpoints", None) else None
+    agent = LangGraphAgent(config_path=args.config, log_limit=args.log_limit, checkpoints=checkpoints)
     final = agent.run(sample)
 
     print("\n--- Final payload ---")
-    print(json.dumps(final, indent=2))
+    print(json.dumps(final, indent=2, default=str))
+    if final.get("suspended_at"):
+        print(f"\n⏸️ Waiting on the customer at {final['suspended_at']}; continue with: "
+              f"langie resume --ticket-id {final['ticket_id']} --answer '...'")
+
+
+def resume(args):
+    """Resume a run suspended in the checkpoint store with the customer's answer."""
+    agent = LangGraphAgent(config_path=args.config, log_limit=args.log_limit,
+                           checkpoints=CheckpointStore(args.checkpoints))
+    try:
+        final = agent.resume(args.ticket_id, args.answer)
+    except KeyError:
+        logging.error("❌ No suspended run for %s in %s", args.ticket_id, args.checkpoints)
+        sys.exit(1)
+
+    print("\n--- Final payload ---")
+    print(json.dumps(final, indent=2, default=str))
+
+
+def _init_worker(config_path: str, log_limit=DEFAULT_LOG_LIMIT):
+    """Process-pool initializer: compile the pipeline once per worker."""
+    global _worker_agent
+    _worker_agent = LangGraphAgent(config_path=config_path, log_limit=log_limit)
+
+
+def _process_line(item):
+    """Run one JSONL payload; returns the output line (never raises)."""
+    line_no, line = item
+    try:
+        result = _worker_agent.run(json.loads(line))
+        return json.dumps({"line": line_no, "result": result}, default=str)
+    except Exception as e:
+        return json.dumps({"line": line_no, "error": f"{type(e).__name__}: {e}"})
+
+
+def _read_payloads(path: str):
+    """Stream (line_no, line) pairs, skipping blank lines."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if line.strip():
+                yield line_no, line
+
+
+def batch(args):
+    """Process a JSONL file of payloads with a pool of worker processes."""
+    payloads = _read_payloads(args.input)
+    log_limit = getattr(args, "log_limit", DEFAULT_LOG_LIMIT)
+    out = open(args.output, "w", encoding="utf-8") if args.output != "-" else sys.stdout
+    done = 0
+    try:
+        if args.workers <= 1:
+            _init_worker(args.config, log_limit)
+            for item in payloads:
+                out.write(_process_line(item) + "\n")
+                done += 1
+        else:
+            # Bounded in-flight window: the input is never read far ahead of the output
+            window = args.workers * args.prefetch
+            with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                     initargs=(args.config, log_limit)) as pool:
+                if args.unordered:
+                    pending = set()
+                    for item in payloads:
+                        pending.add(pool.submit(_process_line, item))
+                        if len(pending) >= window:
+                            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            for fut in finished:
+                                out.write(fut.result() + "\n")
+                                done += 1
+                    for fut in pending:
+                        out.write(fut.result() + "\n")
+                        done += 1
+                else:
+                    pending = deque()
+                    for item in payloads:
+                        pending.append(pool.submit(_process_line, item))
+                        if len(pending) >= window:
+                            out.write(pending.popleft().result() + "\n")
+                            done += 1
+                    while pending:
+                        out.write(pending.popleft().result() + "\n")
+                        done += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    logging.info("Processed %d payloads from %s", done, args.input)
+    return done
 
 
 def main():
@@ -46,7 +139,56 @@ def main():
     run_parser.add_argument(
         "--debug", action="store_true", default=False, help="Enable debug logging"
     )
+    run_parser.add_argument(
+        "--log-limit", type=int, default=DEFAULT_LOG_LIMIT, help="Events kept in the run log (0 = none)"
+    )
+    run_parser.add_argument(
+        "--checkpoints", default=None,
+        help=f"SQLite checkpoint store; suspend at WAIT instead of using a stub answer (e.g. {DEFAULT_CHECKPOINT_PATH})"
+    )
     run_parser.set_defaults(func=run)
 
+    resume_parser = subparsers.add_parser("resume", help="Resume a run suspended waiting on the customer")
+    resume_parser.add_argument(
+        "--config", "-c", default="config/stages.yaml", help="Path to stages YAML"
+    )
+    resume_parser.add_argument(
+        "--ticket-id", "-t", required=True, help="Ticket ID of the suspended run"
+    )
+    resume_parser.add_argument(
+        "--answer", "-a", required=True, help="The customer's answer to the clarifying question"
+    )
+    resume_parser.add_argument(
+        "--checkpoints", default=DEFAULT_CHECKPOINT_PATH, help="SQLite checkpoint store"
+    )
+    resume_parser.add_argument(
+        "--log-limit", type=int, default=DEFAULT_LOG_LIMIT, help="Events kept in the run log (0 = none)"
+    )
+    resume_parser.set_defaults(func=resume)
+
+    batch_parser = subparsers.add_parser("batch", help="Process a JSONL file of payloads in parallel")
+    batch_parser.add_argument(
+        "--config", "-c", default="config/stages.yaml", help="Path to stages YAML"
+    )
+    batch_parser.add_argument(
+        "--input", "-i", required=True, help="JSONL file, one input payload per line"
+    )
+    batch_parser.add_argument(
+        "--output", "-o", default="-", help="JSONL file for results ('-' for stdout)"
+    )
+    batch_parser.add_argument(
+        "--workers", "-w", type=int, default=4, help="Worker processes (1 = run in-process)"
+    )
+    batch_parser.add_argument(
+        "--unordered", action="store_true", default=False, help="Write results as they finish"
+    )
+    batch_parser.add_argument(
+        "--prefetch", type=int, default=4, help="In-flight payloads per worker"
+    )
+    batch_parser.add_argument(
+        "--log-limit", type=int, default=DEFAULT_LOG_LIMIT, help="Events kept in each run log (0 = none)"
+    )
+    batch_parser.set_defaults(func=batch)
+
     args = parser.parse_args()
     args.func(args)
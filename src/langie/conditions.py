@@ -0,0 +1,237 @@
+# src/langie/conditions.py
+"""
+Condition expressions for stages.yaml (`condition:` on conditional stages,
+`escalate_when:` on the non-deterministic stage).
+
+    solution_score < 80
+    priority in ['High', 'Urgent'] and not flags.sla_risk
+    missing entities.order_id or confidence <= 0.5
+
+Grammar (lowest to highest precedence):
+
+    expr       := and_expr ('or' and_expr)*
+    and_expr   := not_expr ('and' not_expr)*
+    not_expr   := 'not' not_expr | 'exists' path | 'missing' path | comparison
+    comparison := operand (('==' | '!=' | '<' | '<=' | '>' | '>=' | 'in' | 'not in') operand)?
+    operand    := path | number | string | true | false | null | '[' literals ']' | '(' expr ')'
+
+A path is a dotted lookup into the ticket state (`entities.order_id`);
+an unknown key yields null. A bare operand is tested for truthiness,
+`exists x` means x is set (not null) and `missing x` the opposite.
+Comparing incompatible values (e.g. null < 80) is false rather than an
+error.
+
+Expressions are parsed once, when the plan is compiled, into a tree of
+closures; evaluating one per ticket is a few dict lookups and compares.
+Anything outside the grammar raises ConditionError at load time instead of
+silently evaluating to false.
+"""
+import operator
+import re
+from typing import Any, Callable, Dict, List, Tuple
+
+# Conditions understood before expressions existed
+ALIASES = {
+    "missing_entities": "not entities",
+    "low_confidence": "solution_score < 80",
+}
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<number>-?\d+(?:\.\d+)?)
+      | (?P<string>'[^']*'|"[^"]*")
+      | (?P<op>==|!=|<=|>=|<|>|\(|\)|\[|\]|,)
+      | (?P<name>[A-Za-z_][\w]*(?:\.[\w]+)*)
+    )""", re.VERBOSE)
+
+_COMPARE = {
+    "==": operator.eq, "!=": operator.ne,
+    "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+    "in": lambda a, b: a in b,
+    "not in": lambda a, b: a not in b,
+}
+_KEYWORDS = {"and", "or", "not", "in", "exists", "missing"}
+_CONSTANTS = {"true": True, "false": False, "null": None, "none": None}
+
+Evaluator = Callable[[Dict[str, Any]], Any]
+
+
+class ConditionError(ValueError):
+    """Raised when a condition expression can't be parsed."""
+
+
+class Condition:
+    """A compiled condition: call it with the ticket state to get a bool."""
+
+    __slots__ = ("source", "_fn")
+
+    def __init__(self, source: str, fn: Evaluator):
+        self.source = source
+        self._fn = fn
+
+    def __call__(self, state: Dict[str, Any]) -> bool:
+        return bool(self._fn(state))
+
+    def __str__(self) -> str:
+        return self.source
+
+    def __repr__(self) -> str:
+        return f"Condition({self.source!r})"
+
+
+def _path(dotted: str) -> Evaluator:
+    keys = tuple(int(k) if k.isdigit() else k for k in dotted.split("."))
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda state: state.get(key)
+
+    def lookup(state):
+        value: Any = state
+        for key in keys:
+            try:
+                value = value[key]
+            except (KeyError, IndexError, TypeError):
+                return None
+        return value
+    return lookup
+
+
+def _compare(op: Callable[[Any, Any], bool], left: Evaluator, right: Evaluator) -> Evaluator:
+    def compare(state):
+        try:
+            return op(left(state), right(state))
+        except TypeError:
+            return False
+    return compare
+
+
+class _Parser:
+    def __init__(self, source: str):
+        self.source = source
+        self.tokens: List[Tuple[str, str, int]] = []
+        pos = 0
+        while pos < len(source):
+            match = _TOKEN.match(source, pos)
+            if not match or match.end() == pos:
+                if source[pos:].strip():
+                    raise self.error(f"unexpected {source[pos:].strip()[0]!r}", pos)
+                break
+            kind = match.lastgroup
+            self.tokens.append((kind, match.group(kind), match.start(kind)))
+            pos = match.end()
+        self.i = 0
+
+    def error(self, message: str, pos: int = None) -> ConditionError:
+        if pos is None:
+            pos = self.tokens[self.i][2] if self.i < len(self.tokens) else len(self.source)
+        return ConditionError(f"{message} at position {pos} in condition {self.source!r}")
+
+    def peek(self, value: str = None, offset: int = 0) -> bool:
+        if self.i + offset >= len(self.tokens):
+            return False
+        kind, text, _ = self.tokens[self.i + offset]
+        return value is None or (text.lower() if kind == "name" else text) == value
+
+    def take(self, value: str = None) -> Tuple[str, str, int]:
+        if not self.peek(value):
+            raise self.error(f"expected {value!r}" if value else "unexpected end")
+        token = self.tokens[self.i]
+        self.i += 1
+        return token
+
+    def parse(self) -> Evaluator:
+        fn = self.expr()
+        if self.i < len(self.tokens):
+            raise self.error(f"unexpected {self.tokens[self.i][1]!r}")
+        return fn
+
+    def expr(self) -> Evaluator:
+        terms = [self.and_expr()]
+        while self.peek("or"):
+            self.take()
+            terms.append(self.and_expr())
+        if len(terms) == 1:
+            return terms[0]
+        return lambda state: any(term(state) for term in terms)
+
+    def and_expr(self) -> Evaluator:
+        terms = [self.not_expr()]
+        while self.peek("and"):
+            self.take()
+            terms.append(self.not_expr())
+        if len(terms) == 1:
+            return terms[0]
+        return lambda state: all(term(state) for term in terms)
+
+    def not_expr(self) -> Evaluator:
+        if self.peek("not"):
+            self.take()
+            inner = self.not_expr()
+            return lambda state: not inner(state)
+        if self.peek("exists") or self.peek("missing"):
+            negate = self.take()[1].lower() == "missing"
+            value = _path(self.path())
+            if negate:
+                return lambda state: value(state) is None
+            return lambda state: value(state) is not None
+        return self.comparison()
+
+    def comparison(self) -> Evaluator:
+        left = self.operand()
+        if self.peek("not") and self.peek("in", 1):
+            self.take(), self.take()
+            op = "not in"
+        elif any(self.peek(o) for o in _COMPARE if o != "not in"):
+            op = self.take()[1].lower()
+        else:
+            return left
+        return _compare(_COMPARE[op], left, self.operand())
+
+    def path(self) -> str:
+        kind, text, pos = self.take()
+        if kind != "name" or text.lower() in _KEYWORDS or text.lower() in _CONSTANTS:
+            raise self.error(f"expected a field name, got {text!r}", pos)
+        return text
+
+    def literal(self) -> Any:
+        kind, text, pos = self.take()
+        if kind == "number":
+            return float(text) if "." in text else int(text)
+        if kind == "string":
+            return text[1:-1]
+        if kind == "name" and text.lower() in _CONSTANTS:
+            return _CONSTANTS[text.lower()]
+        raise self.error(f"expected a literal, got {text!r}", pos)
+
+    def operand(self) -> Evaluator:
+        if self.peek("("):
+            self.take()
+            inner = self.expr()
+            self.take(")")
+            return inner
+        if self.peek("["):
+            self.take()
+            items = []
+            while not self.peek("]"):
+                items.append(self.literal())
+                if not self.peek("]"):
+                    self.take(",")
+            self.take("]")
+            values = tuple(items)
+            return lambda state: values
+        if not self.peek():
+            raise self.error("unexpected end")
+        kind, text, _ = self.tokens[self.i]
+        if kind == "name" and text.lower() not in _CONSTANTS:
+            return _path(self.path())
+        value = self.literal()
+        return lambda state: value
+
+
+def compile_condition(source: str) -> Condition:
+    """Compile a condition expression (or legacy alias); empty means always true."""
+    text = (source or "").strip()
+    if not text:
+        return Condition("", lambda state: True)
+    expression = ALIASES.get(text.lower(), text)
+    return Condition(text, _Parser(expression).parse())
@@ -0,0 +1,165 @@
+# src/langie/graph.py
+import logging
+from typing import Annotated, Any, Dict, List, Optional, Protocol, Sequence, TypedDict
+
+from .plan import StagePlan
+
+logger = logging.getLogger(__name__)
+
+
+def merge_ticket(current: Optional[Dict[str, Any]], update: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reducer for the ticket channel; lets parallel branches each contribute keys."""
+    if current is update or update is None:
+        return current
+    merged = dict(current or {})
+    merged.update(update)
+    return merged
+
+
+class GraphState(TypedDict):
+    ticket: Annotated[Dict[str, Any], merge_ticket]
+
+
+class StageRunner(Protocol):
+    """What the compiled graph needs from the agent to execute a stage."""
+
+    def run_waves(self, state: Dict[str, Any], waves: Sequence) -> None: ...
+
+    def begin_stage(self, state: Dict[str, Any], stage: StagePlan) -> None: ...
+
+    def end_stage(self, state: Dict[str, Any], stage: StagePlan) -> None: ...
+
+    def should_suspend(self, state: Dict[str, Any], stage: StagePlan) -> bool: ...
+
+    def suspend(self, state: Dict[str, Any], stage: StagePlan) -> None: ...
+
+
+def _node(fn):
+    def node(graph_state: GraphState) -> Dict[str, Any]:
+        ticket = graph_state["ticket"]
+        fn(ticket)
+        return {"ticket": ticket}
+    return node
+
+
+def build_graph(plan: Sequence[StagePlan], runner: StageRunner, checkpointer=None):
+    """
+    Compile an execution plan into a LangGraph `StateGraph`.
+
+    - deterministic stages become one node each;
+    - conditional stages are entered through a conditional edge that skips
+      them (and logs the skip) when their condition is false;
+    - non-deterministic stages become an evaluate node, an escalate node and
+      a finalize node, with a conditional edge on the stage's `escalate_when`;
+    - stages with `suspend_when` are entered through a conditional edge that
+      may instead go to a `<STAGE>_suspend` node, which ends the run; a
+      conditional entry point then resumes at the stage named by the
+      ticket's `_resume_at`.
+    """
+    from langgraph.graph import END, START, StateGraph  # heavy; only needed once an agent is built
+
+    graph = StateGraph(GraphState)
+    entry: List[str] = []  # first node of each stage
+    exit_: List[str] = []  # last node of each stage
+    suspend: Dict[str, str] = {}  # stage name -> its suspend node
+
+    for stage in plan:
+        if stage.suspend_when is not None:
+            suspend[stage.name] = f"{stage.name}_suspend"
+            graph.add_node(suspend[stage.name], _node(lambda state, stage=stage: runner.suspend(state, stage)))
+            graph.add_edge(suspend[stage.name], END)
+
+        if stage.mode == "non-deterministic":
+            evaluate, escalate, finalize = stage.name, f"{stage.name}_escalate", f"{stage.name}_finalize"
+
+            def run_evaluate(state, stage=stage):
+                runner.begin_stage(state, stage)
+                runner.run_waves(state, stage.evaluate)
+                # the route taken, recorded for update_payload / the output
+                state["decision"] = "consider_escalation" if stage.escalate_when(state) else "resolve"
+
+            def run_finalize(state, stage=stage):
+                runner.run_waves(state, stage.finalize)
+                runner.end_stage(state, stage)
+
+            graph.add_node(evaluate, _node(run_evaluate))
+            graph.add_node(escalate, _node(lambda state, stage=stage: runner.run_waves(state, stage.escalate)))
+            graph.add_node(finalize, _node(run_finalize))
+            graph.add_conditional_edges(
+                evaluate,
+                lambda gs, stage=stage, escalate=escalate, finalize=finalize: (
+                    escalate if gs["ticket"]["decision"] == "consider_escalation" else finalize
+                ),
+                [escalate, finalize],
+            )
+            graph.add_edge(escalate, finalize)
+            entry.append(evaluate)
+            exit_.append(finalize)
+        else:
+            def run_stage(state, stage=stage):
+                runner.begin_stage(state, stage)
+                if stage.mode in ("deterministic", "conditional"):
+                    runner.run_waves(state, stage.steps)
+                else:
+                    logger.warning("⚠️ Unknown stage mode %s for stage %s", stage.mode, stage.name)
+                runner.end_stage(state, stage)
+
+            graph.add_node(stage.name, _node(run_stage))
+            entry.append(stage.name)
+            exit_.append(stage.name)
+
+    def gated(stage: StagePlan) -> bool:
+        return stage.mode == "conditional" or stage.suspend_when is not None
+
+    def route_from(i: int):
+        """Router to the first stage at or after `i` that should run (or to its suspend node)."""
+        def route(gs: GraphState) -> str:
+            ticket = gs["ticket"]
+            for j in range(i, len(plan)):
+                stage = plan[j]
+                if stage.mode == "conditional" and not stage.condition(ticket):
+                    logger.info("⏩ Skipping conditional stage %s (cond=%s)", stage.name, stage.condition)
+                    continue
+                if stage.name in suspend and runner.should_suspend(ticket, stage):
+                    return suspend[stage.name]
+                return entry[j]
+            return END
+        return route
+
+    def reachable_from(i: int) -> List[str]:
+        """Every stage up to and including the first non-conditional one, plus suspend nodes."""
+        reachable = []
+        for j in range(i, len(plan)):
+            reachable.append(entry[j])
+            if plan[j].name in suspend:
+                reachable.append(suspend[plan[j].name])
+            if plan[j].mode != "conditional":
+                break
+        else:
+            reachable.append(END)
+        return reachable
+
+    for i in range(len(plan) + 1):
+        if i == 0 and suspend:
+            continue  # entry point below
+        source = START if i == 0 else exit_[i - 1]
+        if i == len(plan):
+            graph.add_edge(source, END)
+        elif not gated(plan[i]):
+            graph.add_edge(source, entry[i])
+        else:
+            graph.add_conditional_edges(source, route_from(i), reachable_from(i))
+
+    if suspend and plan:
+        index = {stage.name: j for j, stage in enumerate(plan)}
+        first = route_from(0)
+
+        def route_start(gs: GraphState) -> str:
+            stage = gs["ticket"].get("_resume_at")
+            if stage in index:
+                return entry[index[stage]]
+            return first(gs)
+
+        graph.add_conditional_edges(START, route_start, list(dict.fromkeys(entry + reachable_from(0))))
+
+    return graph.compile(checkpointer=checkpointer)
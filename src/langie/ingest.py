@@ -0,0 +1,111 @@
+# src/langie/ingest.py
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+
+def load_faq(path: str) -> List[Dict[str, Any]]:
+    """Load FAQ JSON file into a list of dicts with 'question' and 'answer'."""
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def build_documents(faqs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Turn FAQ entries into KB documents: {"id", "text", "metadata"}.
+
+    The text is "Q: ...\\nA: ..." (both are embedded); metadata carries the
+    question, answer and a hash of the text so re-ingestion can skip
+    unchanged entries. IDs come from the FAQ's own `id` when present.
+    """
+    docs = []
+    for i, item in enumerate(faqs):
+        q = item.get("question", "").strip()
+        a = item.get("answer", "").strip()
+        text = f"Q: {q}\nA: {a}"
+        docs.append({
+            "id": item.get("id") or f"faq-{i}",
+            "text": text,
+            "metadata": {"question": q, "answer": a, "content_hash": content_hash(text)},
+        })
+    return docs
+
+
+@dataclass
+class SyncPlan:
+    added: List[Dict[str, Any]] = field(default_factory=list)
+    changed: List[Dict[str, Any]] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def upserts(self) -> List[Dict[str, Any]]:
+        return self.added + self.changed
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "added": len(self.added),
+            "changed": len(self.changed),
+            "deleted": len(self.deleted),
+            "unchanged": self.unchanged,
+        }
+
+
+def plan_sync(docs: List[Dict[str, Any]], existing: Dict[str, str]) -> SyncPlan:
+    """Diff `docs` against `existing` (id -> content hash already in the KB)."""
+    plan = SyncPlan()
+    seen = set()
+    for doc in docs:
+        seen.add(doc["id"])
+        if doc["id"] not in existing:
+            plan.added.append(doc)
+        elif existing[doc["id"]] != doc["metadata"]["content_hash"]:
+            plan.changed.append(doc)
+        else:
+            plan.unchanged += 1
+    plan.deleted = [doc_id for doc_id in existing if doc_id not in seen]
+    return plan
+
+
+def existing_hashes(collection, page_size: int = 5000) -> Dict[str, str]:
+    """id -> content hash for everything in a Chroma collection (None if unhashed)."""
+    hashes = {}
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        for doc_id, meta in zip(page["ids"], page["metadatas"]):
+            hashes[doc_id] = (meta or {}).get("content_hash")
+        if len(page["ids"]) < page_size:
+            return hashes
+        offset += page_size
+
+
+def sync_collection(collection, docs, embedding_fn, batch_size: int = 256, dry_run: bool = False) -> SyncPlan:
+    """
+    Bring a Chroma collection in line with `docs`.
+
+    Only new or changed documents are embedded (in `batch_size` chunks) and
+    upserted; documents no longer present are deleted.
+    """
+    plan = plan_sync(docs, existing_hashes(collection))
+    if dry_run:
+        return plan
+
+    upserts = plan.upserts
+    for start in range(0, len(upserts), batch_size):
+        batch = upserts[start:start + batch_size]
+        texts = [d["text"] for d in batch]
+        collection.upsert(
+            ids=[d["id"] for d in batch],
+            embeddings=embedding_fn(texts),
+            documents=texts,
+            metadatas=[d["metadata"] for d in batch],
+        )
+    for start in range(0, len(plan.deleted), batch_size):
+        collection.delete(ids=plan.deleted[start:start + batch_size])
+    return plan
@@ -0,0 +1,142 @@
+# src/langie/lexical.py
+import heapq
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, List, Sequence
+
+from .lexicon import normalize_text
+
+# Too common in support questions to say anything about which FAQ matches
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from has have how i if in is it its me my no not of on or our
+so that the their there this to was we what when where which who why will with you your
+""".split())
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens (digits included, so order numbers match), minus stopwords."""
+    return [t for t in _WORD.findall(normalize_text(text or "")) if t not in STOPWORDS]
+
+
+def lexical_path(db_path: str, collection_name: str) -> str:
+    """Documents sidecar the BM25 index is built from."""
+    return os.path.join(db_path, f"{collection_name}.lexical.json")
+
+
+def write_documents(db_path: str, collection_name: str, docs: Sequence[Dict[str, Any]]) -> str:
+    """
+    Persist KB documents (as produced by `ingest.build_documents`) for the
+    lexical index. Written aside and swapped in with `os.replace`.
+    """
+    path = lexical_path(db_path, collection_name)
+    os.makedirs(db_path, exist_ok=True)
+    records = [
+        {"id": d["id"], "question": d["metadata"].get("question"),
+         "answer": d["metadata"].get("answer"), "doc": d["text"]}
+        for d in docs
+    ]
+    with open(path + ".tmp", "w") as f:
+        json.dump(records, f)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+class BM25Index:
+    """
+    In-memory Okapi BM25 over the KB documents.
+
+    Each posting stores its term's full BM25 weight for that document
+    (idf and length normalization folded in at build time), so a query is
+    just a sum over the postings of its terms plus a top-k heap; no model,
+    no embeddings.
+    """
+
+    def __init__(self, records: List[Dict[str, Any]], k1: float = 1.5, b: float = 0.75):
+        self.records = records
+        counts = [Counter(tokenize(r.get("doc") or "")) for r in records]
+        lengths = [sum(c.values()) for c in counts]
+        avgdl = (sum(lengths) / len(lengths)) if lengths else 0.0
+
+        df: Counter = Counter()
+        for c in counts:
+            df.update(c.keys())
+        n = len(records)
+        idf = {term: math.log(1 + (n - f + 0.5) / (f + 0.5)) for term, f in df.items()}
+
+        self.postings: Dict[str, List[tuple]] = {}
+        for i, (c, dl) in enumerate(zip(counts, lengths)):
+            norm = k1 * (1 - b + b * dl / avgdl) if avgdl else k1
+            for term, tf in c.items():
+                weight = idf[term] * tf * (k1 + 1) / (tf + norm)
+                self.postings.setdefault(term, []).append((i, weight))
+
+    @classmethod
+    def load(cls, db_path: str, collection_name: str) -> "BM25Index":
+        path = lexical_path(db_path, collection_name)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No lexical index at {path}; run scripts/kb_ingest.py to build it.")
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def from_collection(cls, collection, page_size: int = 5000) -> "BM25Index":
+        """Build from the documents stored in a Chroma collection (no embedding model needed)."""
+        records = []
+        offset = 0
+        while True:
+            page = collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+            for doc_id, doc, meta in zip(page["ids"], page["documents"], page["metadatas"]):
+                meta = meta or {}
+                records.append({"id": doc_id, "question": meta.get("question"),
+                                "answer": meta.get("answer"), "doc": doc})
+            if len(page["ids"]) < page_size:
+                break
+            offset += page_size
+        return cls(records)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def search(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
+        """
+        Top-k hits in the retriever's hit shape. `bm25` is the raw score;
+        `score` maps it to (0, 1], lower is better, like the dense distances.
+        """
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            for i, weight in self.postings.get(term, ()):
+                scores[i] = scores.get(i, 0.0) + weight
+        top = heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
+        hits = []
+        for i, bm25 in top:
+            rec = self.records[i]
+            hits.append({
+                "question": rec.get("question"),
+                "answer": rec.get("answer"),
+                "doc": rec.get("doc"),
+                "score": round(1.0 / (1.0 + bm25), 6),
+                "bm25": round(bm25, 6),
+            })
+        return hits
+
+
+def reciprocal_rank_fusion(rankings: Sequence[List[Dict[str, Any]]], top_k: int, k: int = 60) -> List[Dict[str, Any]]:
+    """
+    Fuse ranked hit lists: each document scores sum(1 / (k + rank)) over the
+    lists it appears in (rank from 1) and is identified by its text. The
+    first list's copy of a hit is kept, with the fused score added as `rrf`.
+    """
+    fused: Dict[str, float] = {}
+    hits: Dict[str, Dict[str, Any]] = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, start=1):
+            key = hit.get("doc") or hit.get("question") or ""
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+            hits.setdefault(key, hit)
+    order = sorted(fused, key=lambda key: -fused[key])[:top_k]
+    return [{**hits[key], "rrf": round(fused[key], 6)} for key in order]
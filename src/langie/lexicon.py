@@ -0,0 +1,165 @@
+# src/langie/lexicon.py
+import os
+import re
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import yaml
+
+# config/lexicon.yaml next to stages.yaml; LANGIE_LEXICON overrides it
+DEFAULT_LEXICON_PATH = Path(__file__).resolve().parents[2] / "config" / "lexicon.yaml"
+
+# Used when no lexicon file exists: the original extract_entities heuristics
+DEFAULT_LEXICON = {
+    "intent": {"refund_request": ["refund"]},
+    "issue": {"delivery_delay": ["delay", "late", "haven't arrived", "hasn't arrived"]},
+    "product": {"invoice_service": ["invoice"]},
+    "patterns": {"order_id": r"#\d+"},
+}
+
+_APOSTROPHES = str.maketrans({"’": "'", "‘": "'", "`": "'"})
+_END = ""
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and fold typographic apostrophes, as terms are stored."""
+    return text.lower().translate(_APOSTROPHES)
+
+
+@lru_cache(maxsize=None)
+def _fold_char(ch: str) -> str:
+    folded = ch.casefold()
+    return folded if len(folded) == 1 else ch.lower()[:1]
+
+
+def fold_term(text: str) -> str:
+    """
+    Key of a term or regex match: case-folded one character at a time, like
+    re.IGNORECASE compares them, so every match maps back to its term
+    ("İnvoice" -> "invoice", "haſn't" -> "hasn't", not "i̇nvoice").
+    """
+    return "".join(_fold_char(ch) for ch in text.translate(_APOSTROPHES))
+
+
+def _trie_regex(terms: Iterable[str]) -> str:
+    """
+    Alternation regex for `terms` shaped as a prefix trie.
+
+    Shared prefixes are factored out ("lab|late|later|latency" becomes
+    "la(?:te(?:ncy|r)?|b)"), so matching at a position walks one branch of
+    the trie instead of trying every term; cost depends on term length, not
+    on how many terms there are.
+    """
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[_END] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches, singles = [], []
+        for ch in sorted(k for k in node if k != _END):
+            rest = build(node[ch])
+            if rest:
+                branches.append(re.escape(ch) + rest)
+            else:
+                singles.append(re.escape(ch))
+        if singles:
+            branches.append(singles[0] if len(singles) == 1 else "[" + "".join(singles) + "]")
+        if not branches:
+            return ""
+
+        if len(branches) > 1:
+            body, atomic = "(?:" + "|".join(branches) + ")", True
+        else:
+            body, atomic = branches[0], bool(singles)  # one char / one class vs. a sequence
+        if _END not in node:
+            return body
+        # a term ends here too: the rest is optional (greedy, so longer terms win)
+        return f"{body}?" if atomic else f"(?:{body})?"
+
+    return build(trie)
+
+
+class Lexicon:
+    """
+    Entity lexicon compiled into one regex, matched in a single pass.
+
+    `terms` maps an entity kind (intent, issue, product, ...) to
+    {value: [trigger terms]}; a term matches case-insensitively at the start
+    of a word ("delay" matches "delayed"). `patterns` maps an entity kind to
+    a regex (order IDs, tracking numbers, ...), matched case-insensitively
+    with the original text kept in the value. Each kind takes the first
+    match in the text.
+    """
+
+    def __init__(self, terms: Dict[str, Dict[str, List[str]]], patterns: Optional[Dict[str, str]] = None):
+        self.patterns = dict(patterns or {})
+        self._values: Dict[str, Tuple[str, str]] = {}  # folded term -> (kind, value)
+        for kind, values in terms.items():
+            for value, triggers in (values or {}).items():
+                for term in triggers or []:
+                    self._values.setdefault(fold_term(str(term).strip()), (kind, value))
+        self._values.pop("", None)
+        self.kinds = tuple(dict.fromkeys(kind for kind, _ in self._values.values()))
+
+        alternatives = [f"(?P<{name}>{regex})" for name, regex in self.patterns.items()]
+        if self._values:
+            alternatives.append(r"(?<!\w)(?P<_term>" + _trie_regex(self._values) + ")")
+        self.regex = re.compile("|".join(alternatives) or r"(?!)", re.IGNORECASE)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Lexicon":
+        data = dict(data or {})
+        patterns = data.pop("patterns", None) or {}
+        return cls(data, patterns)
+
+    @classmethod
+    def from_file(cls, path) -> "Lexicon":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(yaml.safe_load(f))
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def extract(self, text: str) -> Dict[str, str]:
+        """{kind: value} for every entity kind found in `text`, in one scan."""
+        found: Dict[str, str] = {}
+        if not text:
+            return found
+        for match in self.regex.finditer(text.translate(_APOSTROPHES)):
+            kind = match.lastgroup
+            if kind == "_term":
+                entity = self._values.get(fold_term(match.group()))
+                if entity is None:  # defensive: a case equivalence fold_term doesn't mirror
+                    continue
+                kind, value = entity
+            else:
+                value = match.group()
+            found.setdefault(kind, value)
+        return found
+
+
+_lock = threading.Lock()
+_lexicon: Optional[Lexicon] = None
+
+
+def get_lexicon() -> Lexicon:
+    """Process-wide lexicon, compiled from LANGIE_LEXICON / config/lexicon.yaml on first use."""
+    global _lexicon
+    if _lexicon is None:
+        with _lock:
+            if _lexicon is None:
+                path = os.getenv("LANGIE_LEXICON") or DEFAULT_LEXICON_PATH
+                _lexicon = Lexicon.from_file(path) if os.path.exists(path) else Lexicon.from_dict(DEFAULT_LEXICON)
+    return _lexicon
+
+
+def set_lexicon(lexicon: Optional[Lexicon]) -> None:
+    """Replace the process-wide lexicon (None = reload from disk on next use)."""
+    global _lexicon
+    with _lock:
+        _lexicon = lexicon
@@ -1,5 +1,9 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import threading
 
 # Ensure logs/ directory exists
 LOG_DIR = "logs"
@@ -7,28 +11,84 @@ os.makedirs(LOG_DIR, exist_ok=True)
 
 LOG_FILE = os.path.join(LOG_DIR, "pipeline.log")
 
+# Level for every logger handed out by get_logger (DEBUG adds per-event pipeline logs)
+LOG_LEVEL = os.getenv("LANGIE_LOG_LEVEL", "INFO").upper()
+
+_lock = threading.Lock()
+_queue_handler = None
+_listener = None
+_loggers = set()
+
+
+def _start_listener() -> logging.Handler:
+    """
+    Create the process-wide QueueHandler and start the listener thread that
+    owns the real (console + file) handlers. Callers only enqueue records, so
+    disk writes never block a pipeline thread.
+    """
+    global _queue_handler, _listener
+
+    # Console handler (INFO and above)
+    ch = logging.StreamHandler()
+    ch.setLevel(logging.INFO)
+    ch.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+
+    # File handler (DEBUG and above)
+    fh = logging.FileHandler(LOG_FILE, mode="a", encoding="utf-8")
+    fh.setLevel(logging.DEBUG)
+    fh.setFormatter(logging.Formatter(
+        "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+    ))
+
+    _queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, ch, fh, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _queue_handler
+
+
+def _restart_in_child():
+    """Forked workers (e.g. `langie batch`) inherit the queue but not the listener thread."""
+    global _lock, _listener
+    _lock = threading.Lock()
+    if _listener is not None:
+        _listener = logging.handlers.QueueListener(
+            _listener.queue, *_listener.handlers, respect_handler_level=True
+        )
+        _listener.start()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_in_child)
+
+
 def get_logger(name="pipeline"):
     """
     Returns a configured logger instance.
     Each module can call get_logger(__name__) for scoped logging.
     """
     logger = logging.getLogger(name)
-    if not logger.handlers:  # Avoid duplicate handlers
-        logger.setLevel(logging.DEBUG)
+    with _lock:
+        handler = _queue_handler or _start_listener()
+        if handler not in logger.handlers:  # Avoid duplicate handlers
+            logger.setLevel(LOG_LEVEL)
+            logger.addHandler(handler)
+            _loggers.add(name)
+
+    return logger
 
-        # Console handler (INFO and above)
-        ch = logging.StreamHandler()
-        ch.setLevel(logging.INFO)
-        ch.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
 
-        # File handler (DEBUG and above)
-        fh = logging.FileHandler(LOG_FILE, mode="a", encoding="utf-8")
-        fh.setLevel(logging.DEBUG)
-        fh.setFormatter(logging.Formatter(
-            "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
-        ))
+def set_log_level(level) -> None:
+    """Change the level of every logger created through get_logger."""
+    with _lock:
+        for name in _loggers:
+            logging.getLogger(name).setLevel(level)
 
-        logger.addHandler(ch)
-        logger.addHandler(fh)
 
-    return logger
+def stop_logging() -> None:
+    """Flush queued records to the handlers and stop the listener thread."""
+    global _listener
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
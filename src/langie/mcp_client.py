@@ -1,15 +1,13 @@
 # src/langie/mcp_client.py
 import logging
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional
 
-from .retriever import Retriever
+from .mcp_transport import MCPClient, MCPClientError, MCPTransportError
+from .retriever import get_retriever
+from .shards import get_shard_router
 from . import abilities  # <— use the local ability implementations
 
 logger = logging.getLogger(__name__)
-kb_retriever = Retriever()
-
-class MCPClientError(RuntimeError):
-    pass
 
 # -------- COMMON SERVER ABILITIES --------
 COMMON_ABILITY_MAP = {
@@ -31,6 +29,7 @@ ATLAS_ABILITY_MAP = {
     "extract_answer": abilities.extract_answer,
     "store_answer": abilities.store_answer,
     "store_data": abilities.store_data,
+    "escalation_decision": abilities.escalation_decision,
     "update_ticket": abilities.update_ticket,
     "close_ticket": abilities.close_ticket,
     "execute_api_calls": abilities.execute_api_calls,
@@ -38,35 +37,87 @@ ATLAS_ABILITY_MAP = {
     # NOTE: knowledge_base_search handled via retriever fallback
 }
 
+SERVER_MAPS = {"COMMON": COMMON_ABILITY_MAP, "ATLAS": ATLAS_ABILITY_MAP}
+KB_ABILITIES = ("faq_query", "knowledge_base_search")
+
 # ----------------- HELPERS -----------------
-def _kb_search(user_query: str, channel: str) -> Dict[str, Any]:
-    """Shared knowledge base search logic."""
+def _kb_search(user_query: str, channel: str, entities: Optional[Dict[str, Any]] = None,
+               confidence: Optional[float] = None) -> Dict[str, Any]:
+    """Shared knowledge base search logic (routed to category shards when the KB is sharded)."""
     if not user_query:
         logger.warning("%s: KB called with empty query", channel)
         return {"kb_results": []}
     logger.info("%s: KB search for %s", channel, user_query)
-    results = kb_retriever.search(user_query)
+    router = get_shard_router()
+    if router.manifest:
+        routed = router.search(user_query, entities, confidence)
+        results, shards = routed["hits"], routed["shards"]
+    else:
+        results, shards = get_retriever().search(user_query), []
     return {
         "kb_results": results,
+        "kb_shards": shards,
         "kb_match_confidence": 0.85 if results else 0.0,  # fake confidence
         "kb_answer": results[0]["answer"] if results else "No match found.",
     }
 
-# ----------------- COMMON -----------------
-def call_common(ability_name: str, state: Dict[str, Any]) -> Dict[str, Any]:
-    try:
-        if ability_name in ("faq_query", "knowledge_base_search"):
-            return _kb_search(state.get("user_query") or state.get("query") or "", "COMMON")
 
-        fn = COMMON_ABILITY_MAP.get(ability_name)
-        if not fn:
-            raise MCPClientError(f"COMMON ability '{ability_name}' is not implemented.")
+def resolve_ability(ability_name: str, server: str = "COMMON", client: Optional[MCPClient] = None,
+                    retry: bool = False) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Resolve an ability to a callable once, so per-call dispatch is a plain
+    function call. Unknown abilities resolve to a callable that raises
+    MCPClientError when invoked, matching call_common/call_atlas.
 
+    When `client` is configured for `server`, the callable invokes the
+    ability on that remote MCP server instead, retrying transport failures
+    only with `retry` (idempotent abilities); otherwise the in-process
+    ability maps are used directly. KB abilities always use the local retriever.
+    """
+    server = server.upper()
+    if ability_name in KB_ABILITIES:
+        def kb_ability(state: Dict[str, Any]) -> Dict[str, Any]:
+            return _kb_search(state.get("user_query") or state.get("query") or "", server,
+                              state.get("entities"), state.get("confidence"))
+        return kb_ability
+
+    fn = SERVER_MAPS.get(server, COMMON_ABILITY_MAP).get(ability_name)
+    if client is not None and client.handles(server):
+        return _remote_ability(ability_name, server, client, fn, retry)
+    if not fn:
+        def missing(state: Dict[str, Any]) -> Dict[str, Any]:
+            raise MCPClientError(f"{server} ability '{ability_name}' is not implemented.")
+        return missing
+
+    def ability(state: Dict[str, Any]) -> Dict[str, Any]:
         output = fn(state)
         if not isinstance(output, dict):
-            logger.warning("COMMON ability '%s' returned non-dict, wrapping", ability_name)
+            logger.warning("%s ability '%s' returned non-dict, wrapping", server, ability_name)
             return {"result": output}
         return output
+    ability.__name__ = ability_name
+    return ability
+
+
+def _remote_ability(ability_name: str, server: str, client: MCPClient, local_fn=None, retry: bool = False):
+    fallback = local_fn if client.servers[server].fallback_local else None
+
+    def remote(state: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            return client.call_sync(server, ability_name, state, retry=retry)
+        except MCPTransportError as e:
+            if fallback is None:
+                raise
+            logger.warning("%s unreachable for '%s' (%s); running in-process", server, ability_name, e)
+            output = fallback(state)
+            return output if isinstance(output, dict) else {"result": output}
+    remote.__name__ = ability_name
+    return remote
+
+# ----------------- COMMON -----------------
+def call_common(ability_name: str, state: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        return resolve_ability(ability_name, "COMMON")(state)
     except Exception as e:
         logger.exception("Error in call_common(%s): %s", ability_name, e)
         raise
@@ -74,18 +125,7 @@ def call_common(ability_name: str, state: Dict[str, Any]) -> Dict[str, Any]:
 # ----------------- ATLAS -----------------
 def call_atlas(ability_name: str, state: Dict[str, Any]) -> Dict[str, Any]:
     try:
-        if ability_name in ("faq_query", "knowledge_base_search"):
-            return _kb_search(state.get("user_query") or state.get("query") or "", "ATLAS")
-
-        fn = ATLAS_ABILITY_MAP.get(ability_name)
-        if not fn:
-            raise MCPClientError(f"ATLAS ability '{ability_name}' is not implemented.")
-
-        output = fn(state)
-        if not isinstance(output, dict):
-            logger.warning("ATLAS ability '%s' returned non-dict, wrapping", ability_name)
-            return {"result": output}
-        return output
+        return resolve_ability(ability_name, "ATLAS")(state)
     except Exception as e:
         logger.exception("Error in call_atlas(%s): %s", ability_name, e)
         raise
@@ -0,0 +1,142 @@
+# src/langie/mcp_server.py
+"""
+Local stand-in MCP server exposing the COMMON or ATLAS abilities as tools.
+
+    python -m src.langie.mcp_server --server COMMON --port 9001   # HTTP at /mcp
+    python -m src.langie.mcp_server --server ATLAS --stdio        # stdio
+
+Each ability takes the run state as its `state` argument and returns the
+keys it added or changed, which the client merges into the run state.
+"""
+import argparse
+import copy
+import json
+import sys
+import uuid
+from typing import Any, Dict, Optional
+
+from .mcp_client import SERVER_MAPS
+from .mcp_transport import PROTOCOL_VERSION
+
+SERVER_VERSION = "0.1.0"
+
+# JSON-RPC error codes
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+
+
+def _changes(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in after.items() if k not in before or before[k] != v}
+
+
+def call_tool(server: str, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one ability; the MCP tools/call result."""
+    fn = SERVER_MAPS[server].get(name)
+    if fn is None:
+        raise KeyError(name)
+    state = dict((arguments or {}).get("state") or {})
+    before = copy.deepcopy(state)
+    try:
+        output = fn(state)
+    except Exception as e:
+        return {"content": [{"type": "text", "text": f"{type(e).__name__}: {e}"}], "isError": True}
+    if output is state:
+        output = _changes(before, state)  # send back only what the ability touched
+    elif not isinstance(output, dict):
+        output = {"result": output}
+    return {
+        "content": [{"type": "text", "text": json.dumps(output, default=str)}],
+        "structuredContent": json.loads(json.dumps(output, default=str)),
+        "isError": False,
+    }
+
+
+def handle_message(server: str, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Answer one JSON-RPC message (None for notifications)."""
+    method = message.get("method")
+    if "id" not in message:
+        return None
+    params = message.get("params") or {}
+    reply: Dict[str, Any] = {"jsonrpc": "2.0", "id": message["id"]}
+
+    if method == "initialize":
+        reply["result"] = {
+            "protocolVersion": PROTOCOL_VERSION,
+            "capabilities": {"tools": {}},
+            "serverInfo": {"name": f"langie-{server.lower()}", "version": SERVER_VERSION},
+        }
+    elif method == "ping":
+        reply["result"] = {}
+    elif method == "tools/list":
+        reply["result"] = {"tools": [
+            {"name": name, "description": (fn.__doc__ or "").strip().split("\n")[0],
+             "inputSchema": {"type": "object", "properties": {"state": {"type": "object"}}, "required": ["state"]}}
+            for name, fn in SERVER_MAPS[server].items()
+        ]}
+    elif method == "tools/call":
+        try:
+            reply["result"] = call_tool(server, params.get("name"), params.get("arguments"))
+        except KeyError:
+            reply["error"] = {"code": INVALID_PARAMS, "message": f"Unknown tool: {params.get('name')}"}
+    else:
+        reply["error"] = {"code": METHOD_NOT_FOUND, "message": f"Method not found: {method}"}
+    return reply
+
+
+def create_app(server: str = "COMMON"):
+    """FastAPI app serving `server`'s abilities over MCP's HTTP transport at POST /mcp."""
+    from fastapi import FastAPI, Request, Response
+    from fastapi.concurrency import run_in_threadpool
+    from fastapi.responses import JSONResponse
+
+    server = server.upper()
+    app = FastAPI(title=f"Langie {server} MCP server")
+
+    @app.post("/mcp")
+    async def mcp(request: Request):
+        message = await request.json()
+        reply = await run_in_threadpool(handle_message, server, message)
+        headers = {}
+        if message.get("method") == "initialize":
+            headers["Mcp-Session-Id"] = uuid.uuid4().hex
+        if reply is None:
+            return Response(status_code=202, headers=headers)
+        return JSONResponse(reply, headers=headers)
+
+    return app
+
+
+def serve_stdio(server: str, stdin=None, stdout=None):
+    """Serve newline-delimited JSON-RPC on stdin/stdout until stdin closes."""
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    for line in stdin:
+        if not line.strip():
+            continue
+        try:
+            message = json.loads(line)
+        except ValueError:
+            continue
+        reply = handle_message(server.upper(), message)
+        if reply is not None:
+            stdout.write(json.dumps(reply, default=str) + "\n")
+            stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local MCP server for the COMMON/ATLAS abilities")
+    parser.add_argument("--server", default="COMMON", choices=sorted(SERVER_MAPS), type=str.upper)
+    parser.add_argument("--stdio", action="store_true", help="Serve over stdin/stdout instead of HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9001)
+    args = parser.parse_args()
+
+    if args.stdio:
+        serve_stdio(args.server)
+        return
+    import uvicorn
+    uvicorn.run(create_app(args.server), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
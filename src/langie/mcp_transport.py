@@ -0,0 +1,392 @@
+# src/langie/mcp_transport.py
+import asyncio
+import dataclasses
+import itertools
+import json
+import logging
+import os
+import random
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = "2025-03-26"
+TRANSPORTS = ("http", "stdio")
+CLIENT_INFO = {"name": "langie", "version": "0.1.0"}
+
+
+class MCPClientError(RuntimeError):
+    """An ability call failed: unknown ability, tool error, or retries exhausted."""
+
+
+class MCPTransportError(MCPClientError):
+    """Connection-level failure (refused, timeout, 429/5xx, server exited); retried."""
+
+
+@dataclass(frozen=True)
+class ServerConfig:
+    """
+    How to reach one MCP server (COMMON or ATLAS).
+
+    `http` posts JSON-RPC to `url` over a keep-alive pool of up to
+    `max_connections`; `stdio` spawns `command` once and speaks
+    newline-delimited JSON-RPC over its stdin/stdout. At most
+    `max_concurrency` calls are in flight per server; each attempt times out
+    after `timeout` seconds and connection-level failures of retryable
+    (idempotent) calls are retried `retries` times with jittered exponential
+    backoff. With `fallback_local`,
+    an ability whose retries are exhausted runs in-process instead.
+    """
+    name: str
+    transport: str = "http"
+    url: Optional[str] = None
+    command: Optional[Tuple[str, ...]] = None
+    timeout: float = 10.0
+    max_concurrency: int = 16
+    max_connections: int = 32
+    retries: int = 2
+    backoff: float = 0.1
+    backoff_max: float = 2.0
+    fallback_local: bool = False
+
+    def __post_init__(self):
+        if self.transport not in TRANSPORTS:
+            raise ValueError(f"Unknown MCP transport '{self.transport}' for {self.name}, expected one of {TRANSPORTS}")
+        if self.transport == "http" and not self.url:
+            raise ValueError(f"MCP server {self.name}: http transport needs a url")
+        if self.transport == "stdio" and not self.command:
+            raise ValueError(f"MCP server {self.name}: stdio transport needs a command")
+
+    @classmethod
+    def from_dict(cls, name: str, data: Mapping[str, Any]) -> "ServerConfig":
+        known = {f.name for f in dataclasses.fields(cls)} - {"name"}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"MCP server {name}: unknown settings {sorted(unknown)}")
+        options = dict(data)
+        if options.get("command") is not None:
+            command = options["command"]
+            options["command"] = tuple(command.split() if isinstance(command, str) else command)
+        return cls(name=name, **options)
+
+
+def load_server_configs(config: Optional[Mapping[str, Any]] = None,
+                        env: Optional[Mapping[str, str]] = None) -> Dict[str, ServerConfig]:
+    """
+    Remote servers from the `mcp:` section of stages.yaml, keyed by server
+    name. `LANGIE_MCP_<SERVER>_URL` (e.g. LANGIE_MCP_ATLAS_URL) points a
+    server at an HTTP endpoint, overriding its transport and URL.
+    """
+    env = os.environ if env is None else env
+    servers = {name.upper(): ServerConfig.from_dict(name.upper(), data or {}) for name, data in (config or {}).items()}
+    for name in set(servers) | {"COMMON", "ATLAS"}:
+        url = env.get(f"LANGIE_MCP_{name}_URL")
+        if url:
+            base = servers.get(name)
+            servers[name] = (dataclasses.replace(base, transport="http", url=url) if base
+                             else ServerConfig(name=name, url=url))
+    return servers
+
+
+def _unwrap(message: Mapping[str, Any]) -> Any:
+    """Result of a JSON-RPC response, or MCPClientError for an error response."""
+    if "error" in message:
+        error = message["error"] or {}
+        raise MCPClientError(f"{error.get('message', 'MCP error')} (code {error.get('code')})")
+    return message.get("result")
+
+
+def _parse_sse(text: str) -> Dict[str, Any]:
+    """The JSON-RPC response carried by a text/event-stream body."""
+    for event in text.split("\n\n"):
+        data = "\n".join(line[5:].lstrip() for line in event.splitlines() if line.startswith("data:"))
+        if data:
+            message = json.loads(data)
+            if "result" in message or "error" in message:
+                return message
+    raise MCPTransportError("No JSON-RPC response in event stream")
+
+
+class HTTPTransport:
+    """MCP over HTTP (JSON or SSE responses) on a keep-alive httpx connection pool."""
+
+    def __init__(self, config: ServerConfig, transport=None):
+        import httpx  # only needed when an http server is configured
+
+        self._httpx = httpx
+        self.url = config.url
+        self._client = httpx.AsyncClient(
+            timeout=config.timeout,
+            limits=httpx.Limits(max_connections=config.max_connections,
+                                max_keepalive_connections=config.max_connections),
+            headers={"Accept": "application/json, text/event-stream", "Content-Type": "application/json"},
+            transport=transport,  # e.g. httpx.ASGITransport in tests
+        )
+        self._ids = itertools.count(1)
+        self._session_id: Optional[str] = None
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
+
+    async def request(self, method: str, params: Dict[str, Any]) -> Any:
+        if not self._initialized:
+            await self._initialize()
+        return _unwrap(await self._post(method, params))
+
+    async def _initialize(self):
+        async with self._init_lock:
+            if self._initialized:
+                return
+            self._session_id = None
+            _unwrap(await self._post("initialize", {
+                "protocolVersion": PROTOCOL_VERSION, "capabilities": {}, "clientInfo": CLIENT_INFO,
+            }))
+            await self._post("notifications/initialized", {}, notify=True)
+            self._initialized = True
+
+    async def _post(self, method: str, params: Dict[str, Any], notify: bool = False) -> Optional[Dict[str, Any]]:
+        message: Dict[str, Any] = {"jsonrpc": "2.0", "method": method, "params": params}
+        if not notify:
+            message["id"] = next(self._ids)
+        headers = {"Mcp-Session-Id": self._session_id} if self._session_id else None
+        try:
+            response = await self._client.post(self.url, content=json.dumps(message, default=str), headers=headers)
+        except self._httpx.HTTPError as e:
+            raise MCPTransportError(f"{type(e).__name__}: {e}") from e
+
+        if response.status_code == 429 or response.status_code >= 500:
+            raise MCPTransportError(f"HTTP {response.status_code} from {self.url}")
+        if response.status_code == 404 and self._session_id:
+            self._initialized = False  # session expired: re-initialize on the retry
+            raise MCPTransportError(f"MCP session expired at {self.url}")
+        if response.status_code >= 400:
+            raise MCPClientError(f"HTTP {response.status_code} from {self.url}: {response.text[:200]}")
+        if "mcp-session-id" in response.headers:
+            self._session_id = response.headers["mcp-session-id"]
+        if notify:
+            return None
+        if response.headers.get("content-type", "").startswith("text/event-stream"):
+            return _parse_sse(response.text)
+        return response.json()
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+class StdioTransport:
+    """MCP over a child process's stdin/stdout (newline-delimited JSON-RPC)."""
+
+    def __init__(self, config: ServerConfig):
+        self.command = list(config.command)
+        self._ids = itertools.count(1)
+        self._proc = None
+        self._reader = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._start_lock = asyncio.Lock()
+
+    async def request(self, method: str, params: Dict[str, Any]) -> Any:
+        if self._proc is None:
+            await self._start()
+        return _unwrap(await self._send(method, params))
+
+    async def _start(self):
+        async with self._start_lock:
+            if self._proc is not None:
+                return
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *self.command, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, limit=2 ** 24,
+                )
+            except OSError as e:
+                raise MCPTransportError(f"Cannot start MCP server {self.command}: {e}") from e
+            self._proc = proc
+            self._reader = asyncio.ensure_future(self._read_loop(proc))
+            _unwrap(await self._send("initialize", {
+                "protocolVersion": PROTOCOL_VERSION, "capabilities": {}, "clientInfo": CLIENT_INFO,
+            }))
+            await self._send("notifications/initialized", {}, notify=True)
+
+    async def _send(self, method: str, params: Dict[str, Any], notify: bool = False):
+        proc = self._proc
+        if proc is None:
+            raise MCPTransportError(f"MCP server {self.command} is not running")
+        message: Dict[str, Any] = {"jsonrpc": "2.0", "method": method, "params": params}
+        future = None
+        if not notify:
+            message["id"] = request_id = next(self._ids)
+            future = self._pending[request_id] = asyncio.get_running_loop().create_future()
+        try:
+            proc.stdin.write(json.dumps(message, default=str).encode() + b"\n")
+            await proc.stdin.drain()
+            return await future if future is not None else None
+        except (BrokenPipeError, ConnectionResetError) as e:
+            raise MCPTransportError(f"MCP server {self.command} closed its stdin: {e}") from e
+        finally:
+            if future is not None:
+                self._pending.pop(message["id"], None)
+
+    async def _read_loop(self, proc):
+        try:
+            while True:
+                line = await proc.stdout.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    logger.warning("Ignoring non-JSON line from MCP server: %r", line[:200])
+                    continue
+                future = self._pending.get(message.get("id"))
+                if future is not None and not future.done():
+                    future.set_result(message)
+        finally:
+            # server exited: fail in-flight calls; the next call restarts it
+            if self._proc is proc:
+                self._proc = None
+            for future in list(self._pending.values()):
+                if not future.done():
+                    future.set_exception(MCPTransportError(f"MCP server {self.command} exited"))
+
+    async def aclose(self):
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        proc.stdin.close()
+        try:
+            await asyncio.wait_for(proc.wait(), 2)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+        if self._reader is not None:
+            await self._reader
+
+
+def _tool_output(ability: str, result: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+    """Ability output from a tools/call result (structuredContent, else JSON text content)."""
+    result = result or {}
+    content = result.get("content") or []
+    text = next((c.get("text") for c in content if c.get("type") == "text"), None)
+    if result.get("isError"):
+        raise MCPClientError(f"Ability '{ability}' failed remotely: {text}")
+    output = result.get("structuredContent")
+    if output is None and text is not None:
+        try:
+            output = json.loads(text)
+        except ValueError:
+            output = text
+    return output if isinstance(output, dict) else {"result": output}
+
+
+def wire_state(state: Mapping[str, Any]) -> Dict[str, Any]:
+    """The part of the run state sent to a remote ability (no run log or private keys)."""
+    return {k: v for k, v in state.items() if k != "logs" and not k.startswith("_")}
+
+
+class MCPClient:
+    """
+    Async client for remote COMMON/ATLAS MCP servers.
+
+    Abilities are invoked with the MCP `tools/call` method, passing the run
+    state as the `state` argument; the tool's result is merged into the state
+    like a local ability's return value. Transports are created on first
+    use. `call()` runs on the client's own event loop; synchronous callers
+    (pipeline threads) use `call_sync()`, which hands the call to that loop
+    on a background thread so connection pools and limits are shared by
+    every thread.
+    """
+
+    def __init__(self, servers: Mapping[str, ServerConfig], http_transports: Optional[Mapping[str, Any]] = None):
+        self.servers = dict(servers)
+        self._http_transports = dict(http_transports or {})
+        self._transports: Dict[str, Any] = {}
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Optional[Mapping[str, Any]] = None,
+                    env: Optional[Mapping[str, str]] = None) -> Optional["MCPClient"]:
+        """Client for the configured servers, or None when everything runs in-process."""
+        servers = load_server_configs(config, env)
+        return cls(servers) if servers else None
+
+    def handles(self, server: str) -> bool:
+        return server.upper() in self.servers
+
+    async def call(self, server: str, ability: str, state: Mapping[str, Any], retry: bool = True) -> Dict[str, Any]:
+        """
+        Invoke `ability` on `server`. Transport failures are retried only when
+        `retry` is set: a timeout can come after the server already acted, so
+        side-effecting abilities get exactly one attempt.
+        """
+        server = server.upper()
+        config = self.servers[server]
+        transport = self._transport(server)
+        limit = self._limits.get(server)
+        if limit is None:
+            limit = self._limits[server] = asyncio.Semaphore(config.max_concurrency)
+
+        params = {"name": ability, "arguments": {"state": wire_state(state)}}
+        retries = config.retries if retry else 0
+        attempt = 0
+        while True:
+            try:
+                async with limit:
+                    result = await asyncio.wait_for(transport.request("tools/call", params), config.timeout)
+                return _tool_output(ability, result)
+            except (MCPTransportError, asyncio.TimeoutError) as e:
+                reason = str(e) or type(e).__name__
+                if attempt >= retries:
+                    raise MCPTransportError(
+                        f"{server} ability '{ability}' failed after {attempt + 1} attempt(s): {reason}"
+                    ) from e
+                delay = min(config.backoff_max, config.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+                attempt += 1
+                logger.warning("%s ability '%s' attempt %d failed (%s); retrying in %.2fs",
+                               server, ability, attempt, reason, delay)
+                await asyncio.sleep(delay)
+
+    def call_sync(self, server: str, ability: str, state: Mapping[str, Any], retry: bool = True) -> Dict[str, Any]:
+        """Blocking `call()` for threads; runs on the client's background event loop."""
+        return asyncio.run_coroutine_threadsafe(
+            self.call(server, ability, state, retry=retry), self._ensure_loop()
+        ).result()
+
+    def _transport(self, server: str):
+        transport = self._transports.get(server)
+        if transport is None:
+            config = self.servers[server]
+            if config.transport == "stdio":
+                transport = StdioTransport(config)
+            else:
+                transport = HTTPTransport(config, self._http_transports.get(server))
+            self._transports[server] = transport
+        return transport
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._loop_lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    self._thread = threading.Thread(target=loop.run_forever, name="langie-mcp", daemon=True)
+                    self._thread.start()
+                    self._loop = loop
+        return self._loop
+
+    async def aclose(self):
+        transports, self._transports = list(self._transports.values()), {}
+        for transport in transports:
+            await transport.aclose()
+
+    def close(self):
+        """Close connections/child processes and stop the background loop."""
+        with self._loop_lock:
+            loop, thread, self._loop, self._thread = self._loop, self._thread, None, None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
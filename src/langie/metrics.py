@@ -0,0 +1,110 @@
+# src/langie/metrics.py
+import threading
+from collections import deque
+from typing import Dict, Iterable, Optional, Tuple
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+
+def _format_labels(key: LabelKey, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """
+    Latency summary: exact count/sum plus p50/p95/p99 over a sliding window
+    of the most recent `window` observations.
+    """
+
+    def __init__(self, window: int = 2048):
+        self.count = 0
+        self.sum = 0.0
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            self._samples.append(value)
+
+    def quantiles(self) -> Dict[float, float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {q: 0.0 for q in QUANTILES}
+        last = len(samples) - 1
+        return {q: samples[min(last, int(round(q * last)))] for q in QUANTILES}
+
+
+class MetricsRegistry:
+    """Process-wide counters and latency summaries, rendered as Prometheus text."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._metrics: Dict[str, Dict[LabelKey, object]] = {}
+
+    def counter(self, name: str, help: str = "", labels: Optional[Dict[str, str]] = None) -> Counter:
+        return self._get(name, "counter", help, labels, Counter)
+
+    def histogram(self, name: str, help: str = "", labels: Optional[Dict[str, str]] = None) -> Histogram:
+        return self._get(name, "summary", help, labels, Histogram)
+
+    def _get(self, name, kind, help, labels, factory):
+        key = _label_key(labels)
+        series = self._metrics.get(name)
+        metric = series.get(key) if series is not None else None
+        if metric is not None:
+            return metric
+        with self._lock:
+            self._help.setdefault(name, (kind, help))
+            series = self._metrics.setdefault(name, {})
+            return series.setdefault(key, factory())
+
+    def reset(self):
+        with self._lock:
+            self._help.clear()
+            self._metrics.clear()
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            items = [(name, self._help[name], dict(series)) for name, series in sorted(self._metrics.items())]
+        for name, (kind, help), series in items:
+            if help:
+                lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, metric in sorted(series.items()):
+                if isinstance(metric, Counter):
+                    lines.append(f"{name}{_format_labels(key)} {metric.value:g}")
+                    continue
+                for q, value in metric.quantiles().items():
+                    lines.append(f"{name}{_format_labels(key, [('quantile', str(q))])} {value:.6f}")
+                lines.append(f"{name}_sum{_format_labels(key)} {metric.sum:.6f}")
+                lines.append(f"{name}_count{_format_labels(key)} {metric.count}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
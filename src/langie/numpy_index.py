@@ -0,0 +1,155 @@
+# src/langie/numpy_index.py
+import json
+import os
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+def index_paths(db_path: str, collection_name: str) -> Tuple[str, str]:
+    """(embedding matrix, metadata sidecar) paths for a collection."""
+    base = os.path.join(db_path, collection_name)
+    return f"{base}.npy", f"{base}.meta.json"
+
+
+SPACES = ("cosine", "l2", "ip")
+
+
+def collection_space(collection) -> str:
+    """Distance function a Chroma collection scores with ("l2" unless created otherwise)."""
+    space = (collection.metadata or {}).get("hnsw:space")
+    if not space:
+        hnsw = (getattr(collection, "configuration", None) or {}).get("hnsw") or {}
+        space = hnsw.get("space")
+    return space or "l2"
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class NumpyIndex:
+    """
+    Exact in-process vector search over a memory-mapped embedding matrix.
+
+    Top-k is one matrix product plus `argpartition`. Scores use the same
+    distance function as the Chroma collection the index was exported from
+    (`space`), so switching backends doesn't move any score threshold:
+    "cosine" is 1 - cos (rows are L2-normalized at write time), "l2" squared
+    Euclidean distance, "ip" 1 - dot product. The matrix is opened with
+    `mmap_mode="r"`, so every worker process on the host shares the same
+    page-cached copy.
+    """
+
+    def __init__(self, matrix: np.ndarray, records: List[Dict[str, Any]], space: str = "cosine"):
+        if space not in SPACES:
+            raise ValueError(f"Unknown distance space {space!r}; expected one of {SPACES}")
+        self.matrix = matrix
+        self.records = records
+        self.space = space
+        self._sq_norms = None  # row squared norms, computed on the first l2 search
+
+    @classmethod
+    def load(cls, db_path: str, collection_name: str) -> "NumpyIndex":
+        npy_path, meta_path = index_paths(db_path, collection_name)
+        if not os.path.exists(npy_path):
+            raise FileNotFoundError(
+                f"No NumPy index at {npy_path}; run scripts/kb_ingest.py --numpy to build it."
+            )
+        matrix = np.load(npy_path, mmap_mode="r")
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        if isinstance(meta, list):  # written before the space was recorded: normalized rows
+            return cls(matrix, meta)
+        return cls(matrix, meta["records"], meta["space"])
+
+    @staticmethod
+    def write(db_path: str, collection_name: str, ids: Sequence[str], embeddings,
+              documents: Sequence[str], metadatas: Sequence[Dict[str, Any]], space: str = "cosine") -> str:
+        """
+        Persist an index scored in `space`. Files are written aside and
+        swapped in with `os.replace`, so processes holding the old mmap keep a
+        valid view.
+        """
+        if space not in SPACES:
+            raise ValueError(f"Unknown distance space {space!r}; expected one of {SPACES}")
+        npy_path, meta_path = index_paths(db_path, collection_name)
+        os.makedirs(db_path, exist_ok=True)
+
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.size == 0:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        if space == "cosine":
+            matrix = _normalize(matrix)
+        records = [
+            {"id": doc_id, "question": (meta or {}).get("question"),
+             "answer": (meta or {}).get("answer"), "doc": doc}
+            for doc_id, doc, meta in zip(ids, documents, metadatas)
+        ]
+
+        with open(npy_path + ".tmp", "wb") as f:
+            np.save(f, matrix)
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump({"space": space, "records": records}, f)
+        os.replace(meta_path + ".tmp", meta_path)
+        os.replace(npy_path + ".tmp", npy_path)
+        return npy_path
+
+    def search(self, embeddings, top_k: int = 3) -> List[List[Dict[str, Any]]]:
+        """Top-k hits per query embedding; `score` is the index's distance (lower is closer)."""
+        n = self.matrix.shape[0]
+        if n == 0:
+            return [[] for _ in embeddings]
+
+        dists = self._distances(np.asarray(embeddings, dtype=np.float32))  # (queries, rows)
+        k = min(top_k, n)
+        if k < n:
+            top = np.argpartition(dists, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(n), (len(dists), n))
+
+        results = []
+        for row, candidates in enumerate(top):
+            ranked = candidates[np.argsort(dists[row, candidates], kind="stable")]
+            hits = []
+            for i in ranked:
+                rec = self.records[i]
+                hits.append({
+                    "question": rec["question"],
+                    "answer": rec["answer"],
+                    "doc": rec["doc"],
+                    "score": float(dists[row, i]),
+                })
+            results.append(hits)
+        return results
+
+    def _distances(self, queries: np.ndarray) -> np.ndarray:
+        if self.space == "cosine":
+            return 1.0 - _normalize(queries) @ self.matrix.T
+        dots = queries @ self.matrix.T
+        if self.space == "ip":
+            return 1.0 - dots
+        if self._sq_norms is None:
+            self._sq_norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+        # |q - x|^2 = |q|^2 + |x|^2 - 2 q.x, clipped at 0 against rounding
+        return np.maximum(np.einsum("ij,ij->i", queries, queries)[:, None] + self._sq_norms - 2.0 * dots, 0.0)
+
+
+def export_collection(collection, db_path: str, collection_name: str, page_size: int = 5000) -> int:
+    """Dump a Chroma collection's stored embeddings into a NumPy index scored like the collection."""
+    ids, embeddings, documents, metadatas = [], [], [], []
+    offset = 0
+    while True:
+        page = collection.get(include=["embeddings", "documents", "metadatas"], limit=page_size, offset=offset)
+        ids.extend(page["ids"])
+        embeddings.extend(page["embeddings"])
+        documents.extend(page["documents"])
+        metadatas.extend(page["metadatas"])
+        if len(page["ids"]) < page_size:
+            break
+        offset += page_size
+    NumpyIndex.write(db_path, collection_name, ids, embeddings, documents, metadatas,
+                     space=collection_space(collection))
+    return len(ids)
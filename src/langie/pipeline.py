@@ -1,34 +1,118 @@
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
 import yaml
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, Optional, Tuple
+from .cache import LRUCache
+from .checkpoints import CheckpointStore
+from .graph import build_graph
 from .logger import get_logger
-from .mcp_client import call_common, call_atlas
+from .mcp_client import KB_ABILITIES
+from .mcp_transport import MCPClient
+from .metrics import REGISTRY
 from .models import InputPayload
-from .retriever import Retriever
+from .plan import StagePlan, Step, compile_plan
+from .retriever import get_retriever, warmup_in_background
 
 logger = get_logger(__name__)
 
-# Global KB retriever instance
-kb_retriever = Retriever()
+# Most recent events kept in a run's state["logs"]
+DEFAULT_LOG_LIMIT = 256
+
+# Outputs of pure abilities kept per agent, keyed on their inputs
+DEFAULT_MEMO_SIZE = 1024
+
+# Stage whose end streams the drafted customer reply (see LangGraphAgent.stream)
+DRAFT_STAGE = "CREATE"
 
 class LangGraphAgent:
     """
     Orchestrates customer-support pipeline execution based on stages.yaml.
     Each stage defines abilities executed either deterministically,
     conditionally, or non-deterministically (decision-making).
+
+    The YAML is compiled once into an immutable plan and a LangGraph
+    `StateGraph` (see graph.py); every `run()` works on its own state dict,
+    so one agent can serve many tickets concurrently. Abilities of servers
+    listed under `mcp:` run on those MCP servers, the rest in-process.
     """
 
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str, checkpointer=None, max_workers: int = 8,
+                 log_limit: Optional[int] = DEFAULT_LOG_LIMIT, mcp_client: Optional[MCPClient] = None,
+                 memo_size: int = DEFAULT_MEMO_SIZE, checkpoints: Optional[CheckpointStore] = None):
         self.config_path = config_path
         self.config = yaml.safe_load(Path(config_path).read_text())
-        self.state: Dict[str, Any] = {"logs": []}
+        self.mcp = mcp_client or MCPClient.from_config(self.config.get("mcp"))
+        self.plan = compile_plan(self.config, client=self.mcp)
+        self.checkpointer = checkpointer
+        self.checkpoints = checkpoints
+        self.max_workers = max_workers
+        self.log_limit = log_limit
+        self.memo = LRUCache(maxsize=memo_size)
+        self._memo_lock = threading.Lock()
+        self._memoized = memo_size > 0 and any(step.pure for step in self.steps())
+        self._pool = None
+        self.graph = build_graph(
+            self.plan,
+            SimpleNamespace(
+                run_waves=self._run_waves,
+                begin_stage=self._begin_stage,
+                end_stage=self._end_stage,
+                should_suspend=self._should_suspend,
+                suspend=self._mark_suspended,
+            ),
+            checkpointer=checkpointer,
+        )
         logger.info("⚙️ Loaded pipeline config from %s", config_path)
 
+    def steps(self):
+        """Every compiled step of the plan, in declaration order."""
+        for stage in self.plan:
+            for wave in stage.steps:
+                yield from wave
+
+    def warmup(self, background: bool = True):
+        """
+        Load the embedding model and open the KB index if the plan searches
+        the KB, so the first run doesn't pay for it. Returns the warm-up
+        thread when `background`, else warms synchronously.
+        """
+        if not any(step.name in KB_ABILITIES for step in self.steps()):
+            return None
+        if background:
+            return warmup_in_background(get_retriever())
+        get_retriever().warmup()
+        return None
+
+    def close(self):
+        """Release the ability thread pool and any MCP connections/child processes."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        if self.mcp is not None:
+            self.mcp.close()
+
     def validate_input(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Validate input payload against schema."""
         validated = InputPayload.model_validate(payload)
         return validated.model_dump()
 
+    def new_state(self, validated: Dict[str, Any]) -> Dict[str, Any]:
+        """Fresh per-run state seeded with the validated payload."""
+        state: Dict[str, Any] = {"logs": self._new_log(), "entities": {}, "meta": {}, "flags": {}}
+        if self._memoized:
+            state["_memo"] = {"hits": 0, "misses": 0}
+        state.update(validated)
+        return state
+
     def run(self, input_payload: Dict[str, Any]) -> Dict[str, Any]:
         """Run the end-to-end pipeline for a given payload."""
         try:
@@ -36,111 +120,291 @@ class LangGraphAgent:
         except Exception as e:
             logger.error("❌ Input validation failed: %s", e)
             raise
-        self.state.update(validated)
-        self._log("run_started", {
-            "input_summary": {k: self.state.get(k) for k in ['ticket_id', 'customer_name']}
+        started = time.perf_counter()
+        state = self.new_state(validated)
+        self._log(state, "run_started", lambda: {
+            "input_summary": {k: state.get(k) for k in ['ticket_id', 'customer_name']}
         })
 
-        for stage in self.config.get("stages", []):
-            name = stage["name"]
-            mode = stage.get("mode", "deterministic")
-            self._log("stage_start", {"stage": name, "mode": mode})
+        return self._finish(self._invoke(state), started)
 
-            if mode == "deterministic":
-                for ability in stage.get("abilities", []):
-                    self._execute_ability(name, ability)
+    def stream(self, input_payload: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Run the pipeline for a payload, yielding events as stages finish:
 
-            elif mode == "conditional":
-                cond = stage.get("condition", "")
-                if self._eval_condition(cond):
-                    for ability in stage.get("abilities", []):
-                        self._execute_ability(name, ability)
-                else:
-                    logger.info("⏩ Skipping conditional stage %s (cond=%s)", name, cond)
-
-            elif mode == "non-deterministic":
-                # Run evaluation first
-                for ability in stage.get("abilities", []):
-                    if ability["name"] == "solution_evaluation":
-                        self._execute_ability(name, ability)
-                        break
-                score = self.state.get("solution_score", 0)
-
-                # Escalation if score < threshold
-                if score < 90:
-                    for ability in stage.get("abilities", []):
-                        if ability["name"] == "escalation_decision":
-                            self._execute_ability(name, ability)
-
-                # Always update payload if configured
-                for ability in stage.get("abilities", []):
-                    if ability["name"] == "update_payload":
-                        self._execute_ability(name, ability)
+            {"event": "stage_end", "stage": ..., "duration_ms": ...}
+            {"event": "draft", "stage": "CREATE", "response": ...}
+            {"event": "done", "state": ...}   # what run() would return
 
+        The events come from the graph's custom stream channel, so they are
+        yielded while later stages are still running.
+        """
+        validated = self.validate_input(input_payload)
+        started = time.perf_counter()
+        state = self.new_state(validated)
+        self._log(state, "run_started", lambda: {
+            "input_summary": {k: state.get(k) for k in ['ticket_id', 'customer_name']}
+        })
+
+        final = state
+        for mode, chunk in self.graph.stream({"ticket": state}, self._graph_config(state),
+                                             stream_mode=["custom", "values"]):
+            if mode == "custom":
+                yield chunk
             else:
-                logger.warning("⚠️ Unknown stage mode %s for stage %s", mode, name)
+                final = chunk["ticket"]
+        yield {"event": "done", "state": self._finish(final, started)}
 
-            self._log("stage_end", {"stage": name})
+    def resume(self, ticket_id: str, answer: Optional[str] = None) -> Dict[str, Any]:
+        """
+        With a `checkpoints` store, a run reaching a stage whose
+        `suspend_when` holds is saved and returns early (see `_suspend`).
+        Continue such a run from the stage it stopped before, with the
+        customer's `answer` as `clarification_answer`. Raises KeyError when
+        `ticket_id` has no checkpoint; the checkpoint is kept if the run fails.
+        """
+        if self.checkpoints is None:
+            raise RuntimeError("resume() needs an agent created with a checkpoint store")
+        checkpoint = self.checkpoints.take(ticket_id)
+        if checkpoint is None:
+            raise KeyError(ticket_id)
+        stage, saved = checkpoint
 
-        self._log("run_completed", {"final_keys": list(self.state.keys())})
-        return self.state
+        started = time.perf_counter()
+        state = copy.deepcopy(saved)
+        state["logs"] = self._new_log(state.get("logs") or [])
+        state.pop("suspended_at", None)
+        if state.get("ticket_status") == "awaiting_customer":
+            state.pop("ticket_status")
+        if answer is not None:
+            state["clarification_answer"] = answer
+        state["_resume_at"] = stage
+        self._log(state, "run_resumed", {"stage": stage})
+        REGISTRY.counter("langie_runs_resumed_total", "Suspended runs resumed").inc()
+        try:
+            state = self._invoke(state)
+        except Exception:
+            self.checkpoints.save(ticket_id, stage, saved)
+            raise
+        return self._finish(state, started)
 
-    def _execute_ability(self, stage_name: str, ability: Dict[str, Any]) -> Any:
-        """Execute an ability via MCP client (COMMON or ATLAS)."""
-        name = ability["name"]
-        server = ability.get("server", "COMMON")
-        self._log("ability_start", {"stage": stage_name, "ability": name, "server": server})
+    def _finish(self, state: Dict[str, Any], started: float) -> Dict[str, Any]:
+        """Post-process a graph run: suspend it, or log and record its completion."""
+        state.pop("_stage_started", None)
+        state.pop("_resume_at", None)
+        stage = state.pop("_suspended_at", None)
+        if stage is not None:
+            return self._suspend(state, stage)
 
-        try:
-            if name == "knowledge_base_search":
-                query = self.state.get("query", "")
-                kb_results = kb_retriever.search(query)
-                self.state["kb_results"] = kb_results
-                result = kb_results
+        memo = state.pop("_memo", None)
+        if memo is not None:
+            self._log(state, "memo_stats", lambda: {**memo, "cache": self.memo.stats()})
+
+        self._log(state, "run_completed", lambda: {"final_keys": list(state.keys())})
+        state["logs"] = list(state.get("logs") or [])
+        self._record_run(state, time.perf_counter() - started)
+        return state
+
+    def _should_suspend(self, state: Dict[str, Any], stage: StagePlan) -> bool:
+        return self.checkpoints is not None and stage.suspend_when(state)
+
+    def _mark_suspended(self, state: Dict[str, Any], stage: StagePlan):
+        state["_suspended_at"] = stage.name
+
+    def _suspend(self, state: Dict[str, Any], stage: str) -> Dict[str, Any]:
+        """
+        Persist the run to the checkpoint store and return it with
+        `suspended_at` set; `resume()` continues it at `stage`. Without a
+        store `suspend_when` is ignored. Raises CheckpointExists when another
+        run is already waiting on the same ticket_id, rather than replacing it.
+        """
+        if not state.get("ticket_id"):
+            state["ticket_id"] = f"TKT-{uuid.uuid4().hex[:12].upper()}"
+        state["ticket_status"] = "awaiting_customer"
+        state["suspended_at"] = stage
+        self._log(state, "run_suspended", {"stage": stage, "ticket_id": state["ticket_id"]})
+        state["logs"] = list(state.get("logs") or [])
+        self.checkpoints.save(state["ticket_id"], stage, state, replace=False)
+        REGISTRY.counter("langie_runs_suspended_total", "Runs suspended waiting on a customer").inc()
+        return {k: v for k, v in state.items() if not k.startswith("_")}
+
+    def _record_run(self, state: Dict[str, Any], elapsed: float):
+        REGISTRY.histogram("langie_run_duration_seconds", "End-to-end pipeline run latency").observe(elapsed)
+        REGISTRY.counter("langie_runs_total", "Pipeline runs").inc()
+        if state.get("escalate_to") or state.get("ticket_status") == "needs_escalation":
+            REGISTRY.counter("langie_escalations_total", "Runs escalated to a human").inc()
+        kb_hits = len(state.get("kb_results") or [])
+        if kb_hits:
+            REGISTRY.counter("langie_kb_hits_total", "KB results returned", {"source": "pipeline"}).inc(kb_hits)
+
+    def _invoke(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the compiled graph over `state` and return the final state."""
+        return self.graph.invoke({"ticket": state}, self._graph_config(state))["ticket"]
+
+    def _graph_config(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Graph run config; a LangGraph `checkpointer` keys graph state by ticket (thread_id = ticket_id)."""
+        config: Dict[str, Any] = {"recursion_limit": 3 * len(self.plan) + 10}
+        if self.checkpointer is not None:
+            config["configurable"] = {"thread_id": state.get("ticket_id") or uuid.uuid4().hex}
+        return config
+
+    def _begin_stage(self, state: Dict[str, Any], stage: StagePlan):
+        state.setdefault("_stage_started", {})[stage.name] = time.perf_counter()
+        self._log(state, "stage_start", lambda: {"stage": stage.name, "mode": stage.mode})
+
+    def _end_stage(self, state: Dict[str, Any], stage: StagePlan):
+        started = state.get("_stage_started", {}).pop(stage.name, None)
+        payload = {"stage": stage.name}
+        if started is not None:
+            elapsed = time.perf_counter() - started
+            payload["duration_ms"] = round(elapsed * 1000, 3)
+            REGISTRY.histogram(
+                "langie_stage_duration_seconds", "Stage latency", {"stage": stage.name}
+            ).observe(elapsed)
+        self._log(state, "stage_end", payload)
+
+        # no-op unless the graph is being stream()ed
+        from langgraph.config import get_stream_writer
+        write = get_stream_writer()
+        write({"event": "stage_end", **payload})
+        if stage.name == DRAFT_STAGE and state.get("response"):
+            write({"event": "draft", "stage": stage.name, "response": state["response"]})
+
+    def _run_waves(self, state: Dict[str, Any], waves):
+        for wave in waves:
+            if len(wave) == 1 or self.max_workers <= 1:
+                for step in wave:
+                    self._execute_ability(state, step)
             else:
-                if server.upper() == "ATLAS":
-                    result = call_atlas(name, self.state)
-                else:
-                    result = call_common(name, self.state)
-        except Exception as e:
-            logger.exception("❌ Ability %s failed in stage %s", name, stage_name)
-            result = {"error": str(e)}
+                self._run_parallel(state, wave)
+
+    def _run_parallel(self, state: Dict[str, Any], wave):
+        """
+        Run non-conflicting abilities (declared `reads`/`writes`) concurrently
+        on the agent's pool of `max_workers` threads.
+
+        Each ability works on a shallow view of the state with its declared
+        write keys copied, so in-place mutation stays private; afterwards the
+        declared writes (and any error) are merged back in declaration order.
+        """
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="langie-ability")
+
+        views = []
+        for step in wave:
+            view = dict(state)
+            for key in step.writes:
+                if key in view:
+                    view[key] = copy.deepcopy(view[key])
+            views.append(view)
+
+        futures = [self._pool.submit(self._execute_ability, view, step) for view, step in zip(views, wave)]
+        for future in futures:
+            future.result()
+
+        for view, step in zip(views, wave):
+            for key in step.writes | {"error"}:
+                if key in view and (key not in state or view[key] is not state[key]):
+                    state[key] = view[key]
+
+    def _execute_ability(self, state: Dict[str, Any], step: Step) -> Any:
+        """
+        Execute a pre-resolved ability (COMMON or ATLAS).
+
+        `pure` steps are memoized in `self.memo` (an LRU of `memo_size`
+        entries shared by every run) on a hash of their read keys; a hit
+        restores the cached writes instead of calling the ability. Clear the
+        memo after changing anything else a pure ability depends on (e.g. the
+        lexicon).
+        """
+        self._log(state, "ability_start", lambda: {
+            "stage": step.stage, "ability": step.name, "server": step.server
+        })
+        labels = {"stage": step.stage, "ability": step.name}
+        key = self._memo_key(step, state) if step.pure and self._memoized else None
+        cached = self.memo.get(key) if key is not None else None
+        failed = False
+
+        started = time.perf_counter()
+        if cached is not None:
+            result = copy.deepcopy(cached)
+        else:
+            try:
+                result = step.fn(state)
+            except Exception as e:
+                logger.exception("❌ Ability %s failed in stage %s", step.name, step.stage)
+                REGISTRY.counter("langie_ability_errors_total", "Ability failures", labels).inc()
+                result = {"error": str(e)}
+                failed = True
+        elapsed = time.perf_counter() - started
+        REGISTRY.histogram("langie_ability_duration_seconds", "Ability latency", labels).observe(elapsed)
 
         # merge results into state
         if isinstance(result, dict):
             for k, v in result.items():
-                if k in self.state and isinstance(self.state[k], dict) and isinstance(v, dict):
-                    self.state[k].update(v)  # deep merge
+                if k in state and isinstance(state[k], dict) and isinstance(v, dict):
+                    if state[k] is not v:
+                        state[k].update(v)  # deep merge
                 else:
-                    self.state[k] = v
+                    state[k] = v
         else:
-            self.state[f"{stage_name}_{name}"] = result or "done"
+            state[f"{step.stage}_{step.name}"] = result or "done"
 
-        self._log("ability_end", {
-            "stage": stage_name,
-            "ability": name,
-            "result_summary": self._summarize(result)
+        memo = None
+        if key is not None:
+            memo = "hit" if cached is not None else "miss"
+            if memo == "miss" and not failed:
+                self.memo.put(key, {k: copy.deepcopy(state[k]) for k in step.writes if k in state})
+            self._count_memo(state, step, memo)
+
+        self._log(state, "ability_end", lambda: {
+            "stage": step.stage,
+            "ability": step.name,
+            "duration_ms": round(elapsed * 1000, 3),
+            "result_summary": self._summarize(result),
+            **({"memo": memo} if memo else {}),
         })
         return result
 
-    def _eval_condition(self, cond: str) -> bool:
-        """Evaluate conditional stage execution rules."""
-        if not cond:
-            return True
-        cond = cond.lower()
-        try:
-            if cond == "missing_entities":
-                return not self.state.get("entities")
-            if cond == "low_confidence":
-                return self.state.get("solution_score", 100) < 80
-        except Exception:
-            return False
-        return False
+    @staticmethod
+    def _memo_key(step: Step, state: Dict[str, Any]) -> Tuple[str, str, str]:
+        """(server, ability, digest of the step's read keys present in `state`)."""
+        inputs = {k: state[k] for k in sorted(step.reads) if k in state}
+        blob = json.dumps(inputs, sort_keys=True, default=str, separators=(",", ":"))
+        return step.server, step.name, hashlib.blake2b(blob.encode(), digest_size=16).hexdigest()
+
+    def _count_memo(self, state: Dict[str, Any], step: Step, result: str):
+        REGISTRY.counter(
+            "langie_memo_lookups_total", "Pure ability memo lookups", {"ability": step.name, "result": result}
+        ).inc()
+        counts = state.get("_memo")
+        if counts is not None:
+            with self._memo_lock:  # parallel waves share the run's counters
+                counts["hits" if result == "hit" else "misses"] += 1
+
+    def _new_log(self, events=()):
+        return deque(events, maxlen=self.log_limit) if self.log_limit != 0 else []
 
-    def _log(self, event: str, payload: Dict[str, Any]):
-        """Log structured event to both state and logger."""
-        logger.info("%s %s", event, payload)
-        self.state.setdefault("logs", []).append({"event": event, "payload": payload})
+    def _log(self, state: Dict[str, Any], event: str, payload):
+        """
+        Record a structured event in the run's log buffer (`state["logs"]`,
+        the last `log_limit` events; None = unbounded, 0 = off) and, at
+        DEBUG, the logger. `payload` may be a zero-argument callable; it is only built
+        when the event is actually recorded somewhere.
+        """
+        record = self.log_limit != 0
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if not (record or debug):
+            return
+        if callable(payload):
+            payload = payload()
+        if debug:
+            logger.debug("%s %s", event, payload)
+        if record:
+            log = state.get("logs")
+            if log is None:
+                log = state["logs"] = self._new_log()
+            log.append({"event": event, "payload": payload})
 
     def _summarize(self, result: Any):
         """Summarize results to avoid bloating logs."""
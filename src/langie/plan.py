@@ -0,0 +1,154 @@
+# src/langie/plan.py
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple
+
+from .conditions import Condition, compile_condition
+from .mcp_client import resolve_ability
+
+# Abilities the non-deterministic (DECIDE) stage treats specially
+EVALUATE_ABILITIES = ("solution_evaluation",)
+ESCALATE_ABILITIES = ("escalation_decision",)
+FINALIZE_ABILITIES = ("update_payload",)
+
+# Non-deterministic stages without `escalate_when` escalate on this
+DEFAULT_ESCALATE_WHEN = "missing solution_score or solution_score < 90"
+
+
+@dataclass(frozen=True)
+class Step:
+    """
+    One ability bound to its resolved callable.
+
+    `reads`/`writes` are the top-level state keys the ability declared in
+    stages.yaml; None means undeclared (the step never runs concurrently).
+    A `pure` step's writes depend only on its reads, so its output can be
+    memoized on them. Remote calls of `idempotent` steps (pure ones by
+    default) are retried on transport failures; others get one attempt.
+    """
+    stage: str
+    name: str
+    server: str
+    fn: Callable[[Dict[str, Any]], Dict[str, Any]]
+    reads: Optional[FrozenSet[str]] = None
+    writes: Optional[FrozenSet[str]] = None
+    pure: bool = False
+    idempotent: bool = False
+
+    @property
+    def declared(self) -> bool:
+        return self.reads is not None and self.writes is not None
+
+    def conflicts_with(self, other: "Step") -> bool:
+        return bool(
+            self.writes & other.writes
+            or self.writes & other.reads
+            or self.reads & other.writes
+        )
+
+
+# Steps in one wave touch disjoint state and may run concurrently
+Wave = Tuple[Step, ...]
+
+
+@dataclass(frozen=True)
+class StagePlan:
+    """
+    A compiled stage. `steps` runs for deterministic/conditional stages;
+    non-deterministic stages run `evaluate`, then `escalate` (when
+    `escalate_when` holds), then `finalize`. Each is a sequence of waves,
+    executed in order. Conditional stages run only when `condition` holds.
+    With a checkpoint store configured, a run suspends before a stage whose
+    `suspend_when` holds and can later be resumed at it.
+    """
+    name: str
+    mode: str
+    steps: Tuple[Wave, ...] = ()
+    condition: Condition = compile_condition("")
+    escalate_when: Condition = compile_condition(DEFAULT_ESCALATE_WHEN)
+    suspend_when: Optional[Condition] = None
+    evaluate: Tuple[Wave, ...] = ()
+    escalate: Tuple[Wave, ...] = ()
+    finalize: Tuple[Wave, ...] = ()
+
+
+def compile_step(stage_name: str, ability: Dict[str, Any], client=None) -> Step:
+    name = ability["name"]
+    server = ability.get("server", "COMMON").upper()
+    reads, writes = ability.get("reads"), ability.get("writes")
+    pure = bool(ability.get("pure", False))
+    if pure and (reads is None or not writes):
+        raise ValueError(f"Ability {name!r} in stage {stage_name!r} is pure but does not declare reads and writes")
+    idempotent = bool(ability.get("idempotent", pure))
+    return Step(
+        stage=stage_name,
+        name=name,
+        server=server,
+        fn=resolve_ability(name, server, client, retry=idempotent),
+        reads=frozenset(reads) if reads is not None else None,
+        writes=frozenset(writes) if writes is not None else None,
+        pure=pure,
+        idempotent=idempotent,
+    )
+
+
+def schedule(steps: Tuple[Step, ...]) -> Tuple[Wave, ...]:
+    """
+    Group consecutive steps into waves of non-conflicting abilities.
+
+    Declaration order is preserved: a step only joins the current wave when
+    it and every step already in it have declared reads/writes and none of
+    them conflict; otherwise it starts a new wave.
+    """
+    waves = []
+    current: list = []
+    for step in steps:
+        if current and step.declared and all(s.declared and not s.conflicts_with(step) for s in current):
+            current.append(step)
+            continue
+        if current:
+            waves.append(tuple(current))
+        current = [step]
+    if current:
+        waves.append(tuple(current))
+    return tuple(waves)
+
+
+def compile_stage(stage: Dict[str, Any], client=None) -> StagePlan:
+    name = stage["name"]
+    mode = stage.get("mode", "deterministic")
+    steps = tuple(compile_step(name, a, client) for a in stage.get("abilities", []) or [])
+    suspend_when = compile_condition(stage["suspend_when"]) if stage.get("suspend_when") else None
+
+    if mode == "non-deterministic":
+        def pick(names, first_only=False):
+            picked = tuple(s for s in steps if s.name in names)
+            return schedule(picked[:1] if first_only else picked)
+
+        return StagePlan(
+            name=name,
+            mode=mode,
+            steps=schedule(steps),
+            evaluate=pick(EVALUATE_ABILITIES, first_only=True),
+            escalate=pick(ESCALATE_ABILITIES),
+            finalize=pick(FINALIZE_ABILITIES),
+            escalate_when=compile_condition(stage.get("escalate_when") or DEFAULT_ESCALATE_WHEN),
+            suspend_when=suspend_when,
+        )
+    return StagePlan(
+        name=name,
+        mode=mode,
+        steps=schedule(steps),
+        condition=compile_condition(stage.get("condition")),
+        suspend_when=suspend_when,
+    )
+
+
+def compile_plan(config: Dict[str, Any], client=None) -> Tuple[StagePlan, ...]:
+    """
+    Compile the stages.yaml structure into an immutable execution plan.
+    Condition expressions are parsed here; a malformed one raises
+    ConditionError.
+    Abilities on servers `client` (an MCPClient) is configured for are bound
+    to remote calls; all others to the in-process implementations.
+    """
+    return tuple(compile_stage(stage, client) for stage in config.get("stages", []) or [])
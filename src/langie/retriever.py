@@ -1,50 +1,402 @@
 # src/langie/retriever.py
-import chromadb
-from chromadb.api.types import EmbeddingFunction
-from sentence_transformers import SentenceTransformer
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List
 
+from .cache import LRUCache
+from .lexical import BM25Index, reciprocal_rank_fusion
+from .metrics import REGISTRY
 
-class SentenceTransformerEmbeddingFunction(EmbeddingFunction):
-    def __init__(self, model_name="all-MiniLM-L6-v2"):
-        self.model = SentenceTransformer(model_name)
+logger = logging.getLogger(__name__)
 
-    def __call__(self, input):
-        # input is a list[str]
-        return self.model.encode(input).tolist()
+DEFAULT_DB_PATH = "data/chroma"
+DEFAULT_COLLECTION = "faq"
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+DEFAULT_CACHE_SIZE = 4096
+DEFAULT_CACHE_TTL = 3600.0
+BACKENDS = ("chroma", "numpy")
+MODES = ("dense", "lexical", "hybrid")
+DEFAULT_MODE = os.getenv("LANGIE_RETRIEVAL_MODE", "dense")
+RRF_K = 60             # reciprocal-rank fusion constant
+HYBRID_DEPTH = 10      # hits taken from each ranking before fusing
+DENSE_RETRY_SECONDS = 300.0
+
+
+def kb_version_path(db_path: str, collection_name: str) -> str:
+    """Stamp file that ingestion touches whenever a collection changes."""
+    return os.path.join(db_path, f"{collection_name}.version")
+
+
+def bump_kb_version(db_path: str, collection_name: str) -> None:
+    """Mark a collection as re-ingested so retrievers drop their caches."""
+    os.makedirs(db_path, exist_ok=True)
+    with open(kb_version_path(db_path, collection_name), "w") as f:
+        f.write(str(time.time_ns()))
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query: the model is uncased and ignores extra whitespace."""
+    return " ".join(query.lower().split())
+
+
+def _as_tuple(vector) -> tuple:
+    """Hashable plain-float copy of an embedding (list or numpy array)."""
+    return tuple(vector.tolist() if hasattr(vector, "tolist") else vector)
+
+
+_embedding_class = None
+
+
+def _sentence_transformer_class():
+    """
+    The SentenceTransformerEmbeddingFunction class. It derives from Chroma's
+    EmbeddingFunction, so it is only defined (and chromadb imported) once an
+    embedding function is actually needed, not when this module is imported.
+    """
+    global _embedding_class
+    if _embedding_class is None:
+        from chromadb.api.types import EmbeddingFunction
+
+        class SentenceTransformerEmbeddingFunction(EmbeddingFunction):
+            def __init__(self, model_name=DEFAULT_MODEL):
+                self.model_name = model_name
+                self._model = None
+                self._lock = threading.Lock()
+
+            @property
+            def model(self):
+                """SentenceTransformer instance, loaded on first use."""
+                if self._model is None:
+                    with self._lock:
+                        if self._model is None:
+                            from sentence_transformers import SentenceTransformer
+                            self._model = SentenceTransformer(self.model_name)
+                return self._model
+
+            def __call__(self, input):
+                # input is a list[str]
+                return self.model.encode(input).tolist()
+
+        _embedding_class = SentenceTransformerEmbeddingFunction
+    return _embedding_class
+
+
+def __getattr__(name):
+    if name == "SentenceTransformerEmbeddingFunction":
+        return _sentence_transformer_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class Retriever:
-    def __init__(self, db_path: str = "data/chroma", collection_name: str = "faq"):
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        collection_name: str = DEFAULT_COLLECTION,
+        model_name: str = DEFAULT_MODEL,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        cache_ttl: float = DEFAULT_CACHE_TTL,
+        embedding_fn=None,
+        backend: str = "chroma",
+        mode: str = None,
+    ):
         """
         Retriever for ChromaDB-based FAQ Knowledge Base.
-        
+
+        Nothing heavy happens here: chromadb, the Chroma client (or NumPy
+        index), the collection and the embedding model are all loaded on the
+        first search, or ahead of it by `warmup()`. Prefer
+        `get_retriever(...)` over constructing this directly so the process
+        shares one instance per KB.
+
         Args:
             db_path (str): Path where ChromaDB is persisted.
             collection_name (str): Name of the collection to use.
+            model_name (str): SentenceTransformer model used for embeddings.
+            cache_size (int): Max entries in each of the embedding/result caches (0 disables).
+            cache_ttl (float): Seconds a cached entry stays valid (None = no expiry).
+            embedding_fn: Optional embedding function overriding `model_name`
+                (e.g. a deterministic stand-in for tests and benchmarks).
+            backend (str): "chroma" (query the Chroma collection) or "numpy"
+                (exact search over the memory-mapped export written by
+                `scripts/kb_ingest.py --numpy`).
+            mode (str): "dense" (embeddings, via `backend`), "lexical" (BM25
+                over the same documents; no model, no embeddings) or "hybrid"
+                (both, fused by reciprocal rank). Defaults to
+                $LANGIE_RETRIEVAL_MODE, else "dense". When the embedding model
+                can't be loaded, dense and hybrid searches fall back to the
+                lexical index for DENSE_RETRY_SECONDS before retrying it.
         """
+        mode = mode or DEFAULT_MODE
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown retriever backend '{backend}', expected one of {BACKENDS}")
+        if mode not in MODES:
+            raise ValueError(f"Unknown retrieval mode '{mode}', expected one of {MODES}")
         self.db_path = db_path
         self.collection_name = collection_name
+        self.model_name = model_name
+        self._embedding_fn = embedding_fn
+        self.warm = False
 
-        # Load persisted Chroma
-        self.client = chromadb.PersistentClient(path=self.db_path)
+        self.backend = backend
+        self.mode = mode
+
+        self._client = None
+        self._collection = None
+        self._index = None
+        self._lexical = None
+        self._dense_retry_at = None  # set while the model is unavailable
+        self._lock = threading.Lock()
+
+        # normalized query -> embedding, (embedding | ("lexical", query), top_k) -> hits
+        self.embedding_cache = LRUCache(cache_size, cache_ttl)
+        self.result_cache = LRUCache(cache_size, cache_ttl)
+        self._version_path = kb_version_path(db_path, collection_name)
+        self._kb_version = self._read_kb_version()
+
+    @property
+    def embedding_fn(self):
+        """Embedding function (the shared one for `model_name` unless one was passed in)."""
+        if self._embedding_fn is None:
+            self._embedding_fn = get_embedding_function(self.model_name)
+        return self._embedding_fn
+
+    @property
+    def collection(self):
+        """Chroma collection, opened on first access."""
+        if self._collection is None:
+            with self._lock:
+                if self._collection is None:
+                    import chromadb
+
+                    # Load persisted Chroma
+                    self._client = chromadb.PersistentClient(path=self.db_path)
+                    # Pass in wrapper embedding function
+                    self._collection = self._client.get_or_create_collection(
+                        name=self.collection_name,
+                        embedding_function=self.embedding_fn,
+                    )
+        return self._collection
+
+    @property
+    def index(self):
+        """Memory-mapped NumPy index, opened on first access."""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    from .numpy_index import NumpyIndex
+                    self._index = NumpyIndex.load(self.db_path, self.collection_name)
+        return self._index
+
+    @property
+    def lexical(self) -> BM25Index:
+        """
+        BM25 index, built on first access from the documents sidecar written
+        by `scripts/kb_ingest.py` (or, failing that, from the documents stored
+        in the Chroma collection).
+        """
+        if self._lexical is None:
+            try:
+                index = BM25Index.load(self.db_path, self.collection_name)
+            except FileNotFoundError:
+                index = BM25Index.from_collection(self.collection)
+            with self._lock:
+                if self._lexical is None:
+                    self._lexical = index
+        return self._lexical
+
+    @property
+    def dense_available(self) -> bool:
+        """Whether searches currently use embeddings (not lexical mode, not degraded)."""
+        return self.mode != "lexical" and not self._dense_paused()
+
+    @property
+    def degraded(self) -> bool:
+        """True while dense/hybrid searches are served lexically because the model failed to load."""
+        return self.mode != "lexical" and self._dense_retry_at is not None
+
+    def warmup(self) -> None:
+        """
+        Load what this retriever's mode searches with (the embedding model
+        and index, the BM25 index, or both) now, so the first search doesn't
+        pay for it.
+        """
+        started = time.perf_counter()
+        if self.mode != "dense":
+            self.lexical
+        if self.mode != "lexical":
+            self.embedding_fn(["warmup"])
+            if self.backend == "numpy":
+                self.index
+            else:
+                self.collection.count()
+        self.warm = True
+        logger.info("🔥 Retriever %s/%s warm in %.2fs", self.db_path, self.collection_name,
+                    time.perf_counter() - started)
 
-        # Pass in wrapper embedding function
-        self.collection = self.client.get_or_create_collection(
-            name=self.collection_name,
-            embedding_function=SentenceTransformerEmbeddingFunction()
-        )
     def search(self, query: str, top_k: int = 3):
         """Search FAQ KB using local embeddings + ChromaDB."""
-        results = self.collection.query(
-            query_texts=[query],
+        return self.search_many([query], top_k=top_k)[0]
+
+    def search_many(self, queries: List[str], top_k: int = 3) -> List[List[Dict[str, Any]]]:
+        """
+        Search several queries at once.
+
+        Uncached queries are encoded in a single embedding call and sent to
+        the backend in a single query; the result has one hit list per query, in
+        the same shape `search` returns. Hybrid hits also carry their fused
+        `rrf` score, lexical ones their raw `bm25` score.
+        """
+        self._check_kb_version()
+        if self.mode == "lexical" or self._dense_paused():
+            return self._lexical_many(queries, top_k)
+
+        try:
+            embeddings = self._embed_many(queries)
+        except Exception as e:
+            if not self._degrade(e):
+                raise
+            return self._lexical_many(queries, top_k)
+        self._dense_retry_at = None
+
+        if self.mode == "dense":
+            return self._dense_many(embeddings, top_k)
+        depth = max(top_k, HYBRID_DEPTH)
+        return [
+            reciprocal_rank_fusion([dense, lexical], top_k, k=RRF_K)
+            for dense, lexical in zip(self._dense_many(embeddings, depth), self._lexical_many(queries, depth))
+        ]
+
+    def embed(self, queries: List[str]) -> List[tuple]:
+        """
+        Query embeddings through the embedding cache, for components built on
+        this retriever's model (e.g. the semantic response cache); a later
+        search for the same query doesn't encode it again.
+        """
+        self._check_kb_version()
+        return self._embed_many(queries)
+
+    def _dense_many(self, embeddings: List[tuple], top_k: int) -> List[List[Dict[str, Any]]]:
+        """Dense hits per embedding, querying the backend once for the uncached ones."""
+        results: Dict[tuple, list] = {}
+        pending = []
+        for embedding in embeddings:
+            key = (embedding, top_k)
+            if key in results:
+                continue
+            hits = self.result_cache.get(key)
+            if hits is None:
+                pending.append(embedding)
+                results[key] = None
+            else:
+                results[key] = hits
+
+        if pending:
+            for embedding, hits in zip(pending, self._query(pending, top_k)):
+                results[(embedding, top_k)] = hits
+                self.result_cache.put((embedding, top_k), hits)
+            self.warm = True
+
+        # hand out copies so callers can't mutate cached entries
+        return [[dict(h) for h in results[(e, top_k)]] for e in embeddings]
+
+    def _lexical_many(self, queries: List[str], top_k: int) -> List[List[Dict[str, Any]]]:
+        """BM25 hits per query, through the same result cache as dense hits."""
+        out = []
+        for query in queries:
+            key = (("lexical", normalize_query(query)), top_k)
+            hits = self.result_cache.get(key)
+            if hits is None:
+                hits = self.lexical.search(query, top_k)
+                self.result_cache.put(key, hits)
+                self.warm = True
+            out.append([dict(h) for h in hits])
+        return out
+
+    def _dense_paused(self) -> bool:
+        return self._dense_retry_at is not None and time.monotonic() < self._dense_retry_at
+
+    def _degrade(self, error: Exception) -> bool:
+        """
+        After the embedding model failed: switch to lexical search for a
+        while if a non-empty lexical index is available; False if not.
+        """
+        try:
+            available = len(self.lexical) > 0
+        except Exception:
+            available = False
+        if not available:
+            return False
+        self._dense_retry_at = time.monotonic() + DENSE_RETRY_SECONDS
+        REGISTRY.counter("langie_retrieval_degraded_total",
+                         "Dense/hybrid searches that fell back to the lexical index").inc()
+        logger.warning("⚠️ Embedding model unavailable for %s/%s (%s); serving lexical results for %.0fs",
+                       self.db_path, self.collection_name, error, DENSE_RETRY_SECONDS)
+        return True
+
+    def _query(self, embeddings: List[tuple], top_k: int) -> List[List[Dict[str, Any]]]:
+        """One backend round trip for a batch of query embeddings."""
+        if self.backend == "numpy":
+            return self.index.search(embeddings, top_k)
+        raw = self.collection.query(
+            query_embeddings=[list(e) for e in embeddings],
             n_results=top_k
         )
+        return [self._to_hits(raw, i) for i in range(len(embeddings))]
+
+    def cache_stats(self):
+        """Hit/miss counters for the embedding and result caches."""
+        return {
+            "embeddings": self.embedding_cache.stats(),
+            "results": self.result_cache.stats(),
+        }
 
+    def clear_cache(self):
+        self.embedding_cache.clear()
+        self.result_cache.clear()
+
+    def _embed_many(self, queries: List[str]) -> List[tuple]:
+        """Embeddings for `queries`, encoding all cache misses in one batch."""
+        normalized = [normalize_query(q) for q in queries]
+        found = {}
+        missing = []
+        for norm in normalized:
+            if norm in found:
+                continue
+            embedding = self.embedding_cache.get(norm)
+            found[norm] = embedding
+            if embedding is None:
+                missing.append(norm)
+
+        if missing:
+            for norm, vector in zip(missing, self.embedding_fn(missing)):
+                embedding = found[norm] = _as_tuple(vector)
+                self.embedding_cache.put(norm, embedding)
+        return [found[norm] for norm in normalized]
+
+    def _read_kb_version(self):
+        try:
+            return os.stat(self._version_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _check_kb_version(self):
+        """Drop cached hits (and embeddings) once the collection has been re-ingested."""
+        version = self._read_kb_version()
+        if version != self._kb_version:
+            self._kb_version = version
+            self.clear_cache()
+            self._index = None  # re-open the (replaced) NumPy index
+            self._lexical = None
+
+    @staticmethod
+    def _to_hits(results, i: int):
         hits = []
         for doc, meta, distance in zip(
-                results["documents"][0], 
-                results["metadatas"][0], 
-                results["distances"][0]
+                results["documents"][i],
+                results["metadatas"][i],
+                results["distances"][i]
             ):
             hits.append({
                 "question": meta.get("question"),
@@ -55,3 +407,76 @@ class Retriever:
             })
         return hits
 
+
+# ----------------- SHARED INSTANCES -----------------
+_registry_lock = threading.RLock()
+_embedding_fns = {}
+_retrievers = {}
+
+
+def get_embedding_function(model_name: str = DEFAULT_MODEL):
+    """Return the process-wide embedding function for `model_name`."""
+    with _registry_lock:
+        fn = _embedding_fns.get(model_name)
+        if fn is None:
+            fn = _embedding_fns[model_name] = _sentence_transformer_class()(model_name)
+        return fn
+
+
+def register_embedding_function(fn, model_name: str = DEFAULT_MODEL) -> None:
+    """
+    Install `fn` as the process-wide embedding function for `model_name`.
+
+    Retrievers that haven't embedded anything yet (including the shared ones
+    handed out by `get_retriever`) embed with `fn`; used to run the app and pipeline on an
+    offline stand-in model, e.g. in benchmarks.
+    """
+    with _registry_lock:
+        _embedding_fns[model_name] = fn
+
+
+def get_retriever(
+    db_path: str = DEFAULT_DB_PATH,
+    collection_name: str = DEFAULT_COLLECTION,
+    model_name: str = DEFAULT_MODEL,
+    backend: str = "chroma",
+    mode: str = None,
+    **options,
+) -> Retriever:
+    """
+    Return the shared Retriever for (db_path, collection, model, backend, mode).
+
+    Every caller asking for the same KB gets the same lazily-loaded instance,
+    so the model and the Chroma client are loaded at most once per process.
+    Extra `options` (cache_size, cache_ttl) only apply when the instance is
+    first created.
+    """
+    mode = mode or DEFAULT_MODE
+    key = (os.path.abspath(db_path), collection_name, model_name, backend, mode)
+    with _registry_lock:
+        retriever = _retrievers.get(key)
+        if retriever is None:
+            retriever = _retrievers[key] = Retriever(
+                db_path, collection_name, model_name, backend=backend, mode=mode, **options
+            )
+        return retriever
+
+
+def warmup_in_background(*retrievers: Retriever) -> threading.Thread:
+    """
+    Warm `retrievers` (default: the shared default KB) on a daemon thread.
+    Failures (e.g. the model can't be downloaded) are logged, not raised; the
+    first search then retries the load.
+    """
+    targets = retrievers or (get_retriever(),)
+
+    def run():
+        for retriever in targets:
+            try:
+                retriever.warmup()
+            except Exception as e:
+                logger.warning("⚠️ Retriever warm-up failed for %s: %s", retriever.db_path, e)
+
+    thread = threading.Thread(target=run, name="langie-warmup", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,211 @@
+# src/langie/semantic_cache.py
+import copy
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from .metrics import REGISTRY
+from .retriever import kb_version_path, normalize_query
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_DISTANCE = 0.1   # cosine distance; paraphrases of one FAQ question sit well inside it
+DEFAULT_SIZE = 512
+DEFAULT_TTL = 3600.0
+
+
+class SemanticCache:
+    """
+    Bounded LRU of resolved responses, looked up by query meaning rather
+    than exact text.
+
+    A query hits when its normalized text was stored before, or when its
+    embedding (from the retriever's embedding function, so the retriever's
+    embedding cache is shared) is within `max_distance` cosine distance of a
+    stored one. Stored embeddings live as unit rows of one preallocated
+    matrix, so a lookup is a single matrix-vector product however full the
+    cache is (NumPy is only imported once something has been embedded).
+    Entries expire after `ttl` seconds and the whole cache is dropped when
+    the KB is re-ingested.
+
+    When the retriever has no usable embedding model (lexical mode, or the
+    model failed to load) only exact matches are served.
+    """
+
+    def __init__(self, retriever, max_distance: float = DEFAULT_MAX_DISTANCE,
+                 maxsize: int = DEFAULT_SIZE, ttl: Optional[float] = DEFAULT_TTL):
+        self.retriever = retriever
+        self.max_distance = max_distance
+        self.maxsize = max(0, maxsize)
+        self.ttl = ttl
+
+        # normalized query -> (matrix row or None, value, expires)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # (maxsize, dim) float32 rows and their in-use mask, allocated on the first embedded entry
+        self._matrix = None
+        self._live = None
+        self._row_keys: List[Optional[str]] = [None] * self.maxsize
+        self._free = list(range(self.maxsize - 1, -1, -1))
+        self._lock = threading.Lock()
+
+        self._version_path = kb_version_path(retriever.db_path, retriever.collection_name)
+        self._kb_version = self._read_kb_version()
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        """Cached value for `query` (or a close paraphrase of it), else None."""
+        return self.get_many([query])[0]
+
+    def get_many(self, queries: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        One cached value (or None) per query. Queries without an exact match
+        are embedded in a single call.
+        """
+        self._check_kb_version()
+        normalized = [normalize_query(q or "") for q in queries]
+        results: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+        if self.maxsize == 0:
+            return results
+        kinds = ["miss"] * len(queries)
+
+        with self._lock:
+            for i, norm in enumerate(normalized):
+                if norm and norm in self._entries:
+                    results[i] = self._take(norm)
+                    if results[i] is not None:
+                        kinds[i] = "exact"
+
+        todo = [i for i, value in enumerate(results) if value is None and normalized[i]]
+        vectors = self._embed([queries[i] for i in todo]) if todo and self._matrix is not None else None
+        # A model of another dimension (swapped since the entries were stored) can't match them: misses
+        if vectors is not None and vectors.shape[1] == self._matrix.shape[1]:
+            with self._lock:
+                sims = vectors @ self._matrix.T
+                sims[:, ~self._live] = -2.0  # below any cosine similarity
+                for i, row in zip(todo, sims):
+                    best = int(row.argmax())
+                    if self._live[best] and 1.0 - row[best] <= self.max_distance:
+                        results[i] = self._take(self._row_keys[best])
+                        if results[i] is not None:
+                            kinds[i] = "semantic"
+
+        with self._lock:
+            self.exact_hits += kinds.count("exact")
+            self.semantic_hits += kinds.count("semantic")
+            self.misses += kinds.count("miss")
+        for kind in kinds:
+            REGISTRY.counter("langie_semantic_cache_lookups_total", "Semantic response cache lookups",
+                             {"result": kind}).inc()
+        return [copy.deepcopy(value) if value is not None else None for value in results]
+
+    def put(self, query: str, value: Dict[str, Any]) -> None:
+        """Store `value` as the resolved response to `query`."""
+        norm = normalize_query(query or "")
+        if not norm or self.maxsize == 0:
+            return
+        self._check_kb_version()
+        vectors = self._embed([query])
+        expires = time.monotonic() + self.ttl if self.ttl else None
+
+        with self._lock:
+            if norm in self._entries:
+                self._drop(norm)
+            while len(self._entries) >= self.maxsize:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+            row = None
+            if vectors is not None:
+                if self._matrix is None:
+                    import numpy as np
+                    self._matrix = np.zeros((self.maxsize, vectors.shape[1]), dtype=np.float32)
+                    self._live = np.zeros(self.maxsize, dtype=bool)
+                if vectors.shape[1] == self._matrix.shape[1]:
+                    row = self._free.pop()
+                    self._matrix[row] = vectors[0]
+                    self._live[row] = True
+                    self._row_keys[row] = norm
+            self._entries[norm] = (row, copy.deepcopy(value), expires)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._live is not None:
+                self._live[:] = False
+            self._row_keys = [None] * self.maxsize
+            self._free = list(range(self.maxsize - 1, -1, -1))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            lookups = hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "max_distance": self.max_distance,
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _embed(self, queries: List[str]):
+        """Unit-length query embeddings (a NumPy matrix), or None when the model isn't usable."""
+        if not self.retriever.dense_available:
+            return None
+        import numpy as np
+        try:
+            vectors = np.asarray(self.retriever.embed(queries), dtype=np.float32)
+        except Exception as e:
+            logger.debug("Semantic cache falling back to exact matches: %s", e)
+            return None
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def _take(self, key: str) -> Optional[Dict[str, Any]]:
+        """Value of a live entry (marked most recently used); drops it if expired. Lock held."""
+        row, value, expires = self._entries[key]
+        if expires is not None and expires < time.monotonic():
+            self._drop(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _drop(self, key: str) -> None:
+        row, _, _ = self._entries.pop(key)
+        if row is not None:
+            self._live[row] = False
+            self._row_keys[row] = None
+            self._free.append(row)
+
+    def _read_kb_version(self):
+        try:
+            return os.stat(self._version_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _check_kb_version(self):
+        """Drop every cached response once the KB has been re-ingested."""
+        version = self._read_kb_version()
+        if version != self._kb_version:
+            self._kb_version = version
+            self.clear()
+            with self._lock:
+                self.invalidations += 1
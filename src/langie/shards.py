@@ -0,0 +1,197 @@
+# src/langie/shards.py
+"""
+Per-category KB shards.
+
+`scripts/kb_ingest.py --shard-by intent,issue,product` keeps the global
+collection and additionally writes one collection per entity value found in
+the FAQs (e.g. `faq-intent-refund_request`), plus a manifest
+(`<collection>.shards.json`) listing them. A FAQ's category comes from its own
+field of that name when present, else from the entity lexicon matched against
+its question, i.e. the same extraction UNDERSTAND runs on the customer's
+query. A FAQ matching several kinds lands in each of those shards.
+
+At query time `ShardRouter` picks the shards matching the run's extracted
+entities and searches only those, falling back to the global collection when
+the extraction isn't confident, nothing matches a shard, or the shards can't
+fill `top_k` on their own.
+"""
+import json
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+from .lexicon import Lexicon, get_lexicon
+from .metrics import REGISTRY
+from .retriever import DEFAULT_COLLECTION, DEFAULT_DB_PATH, DEFAULT_MODEL, get_retriever, kb_version_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARD_BY = ("intent", "issue", "product")
+DEFAULT_MIN_CONFIDENCE = float(os.getenv("LANGIE_SHARD_MIN_CONFIDENCE", "0.7"))
+
+
+def manifest_path(db_path: str, collection_name: str) -> str:
+    return os.path.join(db_path, f"{collection_name}.shards.json")
+
+
+def shard_collection_name(collection_name: str, kind: str, value: str) -> str:
+    """Chroma-safe collection name for the `kind`=`value` shard of `collection_name`."""
+    name = re.sub(r"[^A-Za-z0-9_-]+", "_", f"{collection_name}-{kind}-{value}").strip("_-")
+    return name[:63]
+
+
+def categorize(faq: Dict[str, Any], shard_by: Sequence[str], lexicon: Optional[Lexicon] = None) -> Dict[str, str]:
+    """{kind: value} of a FAQ for each kind in `shard_by` it belongs to."""
+    found = (lexicon or get_lexicon()).extract(faq.get("question", ""))
+    categories = {}
+    for kind in shard_by:
+        value = faq.get(kind) or found.get(kind)
+        if value:
+            categories[kind] = str(value)
+    return categories
+
+
+def partition(faqs: List[Dict[str, Any]], docs: List[Dict[str, Any]], shard_by: Sequence[str],
+              lexicon: Optional[Lexicon] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Group KB documents (`ingest.build_documents(faqs)`, in the same order)
+    into shards: {"kind:value": {"kind", "value", "docs"}}.
+    """
+    shards: Dict[str, Dict[str, Any]] = {}
+    for faq, doc in zip(faqs, docs):
+        for kind, value in categorize(faq, shard_by, lexicon).items():
+            shard = shards.setdefault(f"{kind}:{value}", {"kind": kind, "value": value, "docs": []})
+            shard["docs"].append(doc)
+    return shards
+
+
+def write_manifest(db_path: str, collection_name: str, shard_by: Sequence[str],
+                   shards: Dict[str, Dict[str, Any]]) -> str:
+    """Record which shard collections exist (written aside and swapped in)."""
+    path = manifest_path(db_path, collection_name)
+    os.makedirs(db_path, exist_ok=True)
+    manifest = {
+        "collection": collection_name,
+        "shard_by": list(shard_by),
+        "shards": {
+            key: {"collection": shard_collection_name(collection_name, s["kind"], s["value"]),
+                  "count": len(s["docs"])}
+            for key, s in sorted(shards.items())
+        },
+    }
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def load_manifest(db_path: str, collection_name: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(manifest_path(db_path, collection_name), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class ShardRouter:
+    """
+    Routes KB searches to the shards matching a run's entities.
+
+    Shard (and global) searches go through the shared `get_retriever`
+    instances, so each shard keeps its own caches and lazily loaded index.
+    The manifest is re-read when the global collection is re-ingested.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, collection_name: str = DEFAULT_COLLECTION,
+                 model_name: str = DEFAULT_MODEL, backend: str = "chroma", mode: Optional[str] = None,
+                 min_confidence: float = DEFAULT_MIN_CONFIDENCE):
+        self.db_path = db_path
+        self.collection_name = collection_name
+        self.model_name = model_name
+        self.backend = backend
+        self.mode = mode
+        self.min_confidence = min_confidence
+        self._version_path = kb_version_path(db_path, collection_name)
+        self._kb_version = None
+        self._manifest = None
+        self._lock = threading.Lock()
+
+    @property
+    def manifest(self) -> Optional[Dict[str, Any]]:
+        version = self._read_kb_version()
+        if self._manifest is None or version != self._kb_version:
+            with self._lock:
+                self._kb_version = version
+                self._manifest = load_manifest(self.db_path, self.collection_name) or {}
+        return self._manifest or None
+
+    def route(self, entities: Dict[str, Any], confidence: Optional[float] = None) -> List[str]:
+        """Shard collections to search for these entities; [] means the global collection."""
+        manifest = self.manifest
+        if not manifest or (confidence is not None and confidence < self.min_confidence):
+            return []
+        shards = manifest["shards"]
+        routed = []
+        for kind in manifest["shard_by"]:
+            shard = shards.get(f"{kind}:{entities.get(kind)}")
+            if shard and shard["collection"] not in routed:
+                routed.append(shard["collection"])
+        return routed
+
+    def search(self, query: str, entities: Optional[Dict[str, Any]] = None, confidence: Optional[float] = None,
+               top_k: int = 3) -> Dict[str, Any]:
+        """{"hits", "shards"}: hits from the routed shards (topped up from global), or global ones."""
+        shards = self.route(entities or {}, confidence)
+        hits: List[Dict[str, Any]] = []
+        for collection in shards:
+            hits += self._retriever(collection).search(query, top_k=top_k)
+        hits.sort(key=_rank_key)
+        hits = _dedupe(hits)[:top_k]
+
+        if len(hits) < top_k:
+            hits = _dedupe(hits + self._retriever(self.collection_name).search(query, top_k=top_k))[:top_k]
+        REGISTRY.counter("langie_kb_shard_routes_total", "KB searches by route",
+                         {"route": "shard" if shards else "global"}).inc()
+        return {"hits": hits, "shards": shards}
+
+    def _retriever(self, collection: str):
+        return get_retriever(self.db_path, collection, self.model_name, backend=self.backend, mode=self.mode)
+
+    def _read_kb_version(self):
+        try:
+            return os.stat(self._version_path).st_mtime_ns
+        except OSError:
+            return None
+
+
+def _rank_key(hit: Dict[str, Any]) -> float:
+    """Best first: fused RRF score (hybrid, higher is better), else distance/BM25 score (lower is better)."""
+    return -hit["rrf"] if "rrf" in hit else hit.get("score", 0)
+
+
+def _dedupe(hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop repeats of a document (a FAQ can sit in several shards and in global)."""
+    seen = set()
+    unique = []
+    for hit in hits:
+        key = hit.get("doc") or hit.get("question")
+        if key not in seen:
+            seen.add(key)
+            unique.append(hit)
+    return unique
+
+
+_router_lock = threading.Lock()
+_router: Optional[ShardRouter] = None
+
+
+def get_shard_router() -> ShardRouter:
+    """Process-wide router over the default KB (data/chroma, faq)."""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = ShardRouter()
+    return _router
@@ -0,0 +1,269 @@
+# src/langie/tickets.py
+import base64
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = "data/tickets.db"
+LEGACY_JSON_PATH = "data/tickets.json"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    seq           INTEGER PRIMARY KEY,
+    ticket_id     TEXT NOT NULL UNIQUE,
+    customer_name TEXT,
+    email         TEXT,
+    status        TEXT,
+    timestamp     TEXT,
+    data          TEXT NOT NULL
+)
+"""
+
+# Secondary indexes for `TicketStore.list`/`count`; SQLite keeps them up to
+# date on every INSERT. Each ends in (timestamp, seq), the listing order, so
+# a filtered page (and a time range within it) is read straight off the index.
+_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS tickets_email_ts ON tickets (email COLLATE NOCASE, timestamp, seq)",
+    "CREATE INDEX IF NOT EXISTS tickets_status_ts ON tickets (status, timestamp, seq)",
+    "CREATE INDEX IF NOT EXISTS tickets_ts ON tickets (timestamp, seq)",
+)
+
+# Tickets per status, bumped in each insert's transaction, so the unfiltered
+# and per-status counts don't walk millions of index entries
+_COUNTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ticket_counts (
+    status TEXT PRIMARY KEY,
+    n      INTEGER NOT NULL
+)
+"""
+
+
+def format_ticket_id(seq: int) -> str:
+    return f"TKT-{seq:03d}"
+
+
+def parse_ticket_id(ticket_id: str) -> Optional[int]:
+    try:
+        return int(str(ticket_id).split("-")[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def encode_cursor(timestamp: str, seq: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([timestamp, seq]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """(timestamp, seq) of the last ticket of the previous page; ValueError if malformed."""
+    try:
+        timestamp, seq = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(timestamp, str) or not isinstance(seq, int):
+            raise TypeError
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor!r}") from None
+    return timestamp, seq
+
+
+class TicketStore:
+    """
+    SQLite-backed ticket storage (WAL mode).
+
+    Appending a ticket is a single indexed INSERT; ticket IDs (TKT-XXX) are
+    allocated inside the same write transaction, so concurrent writers -
+    threads or processes - never hand out the same ID.
+
+    `list` and `count` filter by email, status and timestamp range through
+    secondary indexes, and `list` pages newest-first (by timestamp, then
+    seq) with a keyset cursor, so a page never reads more index entries than
+    it returns however many tickets exist.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, legacy_json: Optional[str] = LEGACY_JSON_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._migrate_schema()
+
+        if legacy_json and os.path.exists(legacy_json):
+            self.migrate_json(legacy_json)
+
+    def create(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Allocate the next ticket ID, persist the ticket and return it."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                (seq,) = self._conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM tickets").fetchone()
+                ticket = {"ticket_id": format_ticket_id(seq), **fields}
+                self._insert(seq, ticket)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return ticket
+
+    def get(self, ticket_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM tickets WHERE ticket_id = ?", (ticket_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list(self, email: Optional[str] = None, status: Optional[str] = None, since: Optional[str] = None,
+             until: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+             cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        One page of tickets, newest first, matching every filter given.
+
+        `email` matches case-insensitively; `since` (inclusive) and `until`
+        (exclusive) compare against the ISO timestamps tickets are stored
+        with. Pass the returned `next_cursor` back as `cursor` for the next
+        page; it is None on the last one. Raises ValueError for a malformed
+        cursor.
+        """
+        where, params = self._where(email, status, since, until)
+        if cursor is not None:
+            where.append("(timestamp, seq) < (?, ?)")
+            params.extend(decode_cursor(cursor))
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        sql = "SELECT timestamp, seq, data FROM tickets"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY timestamp DESC, seq DESC LIMIT ?"
+
+        with self._lock:
+            rows = self._conn.execute(sql, (*params, limit + 1)).fetchall()
+        more = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            "tickets": [json.loads(data) for _, _, data in rows],
+            "next_cursor": encode_cursor(rows[-1][0], rows[-1][1]) if more else None,
+        }
+
+    def count(self, email: Optional[str] = None, status: Optional[str] = None,
+              since: Optional[str] = None, until: Optional[str] = None) -> int:
+        """Number of tickets matching the filters (all tickets without any)."""
+        if email is None and since is None and until is None:
+            # kept up to date by every insert
+            sql, params = "SELECT COALESCE(SUM(n), 0) FROM ticket_counts", []
+            if status is not None:
+                sql += " WHERE status = ?"
+                params.append(status)
+        else:
+            where, params = self._where(email, status, since, until)
+            sql = "SELECT COUNT(*) FROM tickets WHERE " + " AND ".join(where)
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    def migrate_json(self, json_path: str) -> int:
+        """
+        One-shot import of the legacy tickets.json list.
+
+        Only runs against an empty store, so it is safe to call on every start.
+        """
+        if self.count():
+            return 0
+        try:
+            with open(json_path, "r") as f:
+                tickets = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            logger.warning("Could not read legacy tickets from %s, skipping migration", json_path)
+            return 0
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Checked under the write lock so concurrent starters migrate once
+                if self._conn.execute("SELECT 1 FROM tickets LIMIT 1").fetchone():
+                    self._conn.execute("ROLLBACK")
+                    return 0
+                seq = 0
+                for ticket in tickets:
+                    seq = max(seq + 1, parse_ticket_id(ticket.get("ticket_id")) or 0)
+                    ticket.setdefault("ticket_id", format_ticket_id(seq))
+                    self._insert(seq, ticket)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        logger.info("Migrated %d tickets from %s into %s", len(tickets), json_path, self.path)
+        return len(tickets)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _migrate_schema(self):
+        """Add the query indexes and per-status counts to a store created before them."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                has_counts = self._conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ticket_counts'"
+                ).fetchone()
+                if not has_counts:
+                    self._conn.execute(_COUNTS_SCHEMA)
+                    self._conn.execute(
+                        "INSERT INTO ticket_counts (status, n) "
+                        "SELECT COALESCE(status, ''), COUNT(*) FROM tickets GROUP BY 1"
+                    )
+                # Tickets without a timestamp sort oldest, as '' (NULL would break cursor comparisons)
+                self._conn.execute("UPDATE tickets SET timestamp = '' WHERE timestamp IS NULL")
+                for index in _INDEXES:
+                    self._conn.execute(index)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _where(email, status, since, until) -> Tuple[List[str], List[Any]]:
+        where: List[str] = []
+        params: List[Any] = []
+        if email is not None:
+            where.append("email = ? COLLATE NOCASE")
+            params.append(email)
+        if status is not None:
+            # With an email too, the unary + keeps the planner on the (far
+            # more selective) email index instead of the status one
+            where.append("+status = ?" if email is not None else "status = ?")
+            params.append(status)
+        if since is not None:
+            where.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("timestamp < ?")
+            params.append(until)
+        return where, params
+
+    def _insert(self, seq: int, ticket: Dict[str, Any]):
+        self._conn.execute(
+            "INSERT INTO tickets (seq, ticket_id, customer_name, email, status, timestamp, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                seq,
+                ticket["ticket_id"],
+                ticket.get("customer_name"),
+                ticket.get("email"),
+                ticket.get("status"),
+                ticket.get("timestamp") or "",
+                json.dumps(ticket),
+            ),
+        )
+        self._conn.execute(
+            "INSERT INTO ticket_counts (status, n) VALUES (?, 1) ON CONFLICT (status) DO UPDATE SET n = n + 1",
+            (ticket.get("status") or "",),
+        )
+
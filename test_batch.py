@@ -0,0 +1,44 @@
+import json
+from argparse import Namespace
+
+from src.langie.cli import batch
+
+CONFIG = """
+stages:
+  - name: UNDERSTAND
+    mode: deterministic
+    abilities:
+      - { name: parse_request_text, server: COMMON }
+      - { name: extract_entities,   server: ATLAS }
+"""
+
+
+def _run_batch(tmp_path, **kwargs):
+    config = tmp_path / "stages.yaml"
+    config.write_text(CONFIG)
+    src = tmp_path / "in.jsonl"
+    lines = [json.dumps({"customer_name": "C", "email": "c@x.com", "query": f"order #{i}"}) for i in range(30)]
+    lines.insert(5, "not json")
+    lines.insert(10, "")
+    src.write_text("\n".join(lines) + "\n")
+    dst = tmp_path / "out.jsonl"
+
+    args = Namespace(config=str(config), input=str(src), output=str(dst), prefetch=2, unordered=False)
+    vars(args).update(kwargs)
+    done = batch(args)
+    return done, [json.loads(line) for line in dst.read_text().splitlines()]
+
+
+def test_batch_preserves_order_with_workers(tmp_path):
+    done, rows = _run_batch(tmp_path, workers=3)
+    assert done == 31
+    assert [r["line"] for r in rows] == sorted(r["line"] for r in rows)
+    assert "error" in rows[5]
+    ok = [r for r in rows if "result" in r]
+    assert [r["result"]["entities"]["order_id"] for r in ok] == [f"#{i}" for i in range(30)]
+
+
+def test_batch_unordered_and_inline(tmp_path):
+    _, unordered = _run_batch(tmp_path, workers=2, unordered=True)
+    _, inline = _run_batch(tmp_path, workers=1)
+    assert sorted(r["line"] for r in unordered) == [r["line"] for r in inline]
@@ -0,0 +1,36 @@
+import asyncio
+import threading
+
+from src.langie.batching import MicroBatcher
+
+
+def test_concurrent_submits_are_coalesced():
+    calls = []
+
+    def double_all(items):
+        calls.append((list(items), threading.current_thread().name))
+        return [i * 2 for i in items]
+
+    batcher = MicroBatcher(double_all, max_batch_size=4, max_wait=0.01)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+
+    results = asyncio.run(main())
+    assert results == [i * 2 for i in range(10)]
+    assert [len(items) for items, _ in calls] == [4, 4, 2]
+    assert all(name != threading.main_thread().name for _, name in calls), "fn must run off the loop"
+    assert batcher.stats()["batches"] == 3
+
+
+def test_batch_errors_reach_every_caller():
+    def boom(items):
+        raise ValueError("kb down")
+
+    batcher = MicroBatcher(boom, max_batch_size=8, max_wait=0.001)
+
+    async def main():
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, ValueError) for r in results)
@@ -0,0 +1,59 @@
+import json
+
+from benchmarks.fixtures import HashingEmbeddingFunction, sample_queries, synthetic_faqs
+from benchmarks.run import compare, main
+from src.langie.retriever import get_embedding_function
+
+
+def test_hashing_embedding_is_deterministic_and_lexical():
+    fn = HashingEmbeddingFunction()
+    vectors = fn(["How do I track my order?", "how do i TRACK my order", "Reset my password"])
+    a, b, c = (list(map(float, v)) for v in vectors)
+    assert a == b
+    assert len(a) == 384
+    similarity = lambda x, y: sum(i * j for i, j in zip(x, y))  # noqa: E731
+    assert similarity(a, b) > similarity(a, c)
+
+
+def test_synthetic_kb_is_reproducible():
+    assert synthetic_faqs(50, seed=3) == synthetic_faqs(50, seed=3)
+    faqs = synthetic_faqs(50)
+    queries = sample_queries(faqs, 20)
+    assert len(set(queries)) == 20
+
+
+def test_suite_runs_offline_and_writes_json(tmp_path):
+    previous_fn = get_embedding_function()
+    output = tmp_path / "bench.json"
+    code = main([
+        "--sizes", "120", "--queries", "10", "--runs", "3", "--requests", "8", "--workers", "2",
+        "--concurrency", "4", "--workdir", str(tmp_path / "work"), "--output", str(output),
+    ])
+    assert code == 0
+    report = json.loads(output.read_text())
+
+    entry = report["sizes"]["120"]
+    assert entry["build"]["added"] == 120
+    assert set(entry["retriever"]) == {"chroma", "numpy", "lexical", "hybrid"}
+    assert entry["retriever"]["numpy"]["search"]["n"] == 10
+    assert entry["pipeline"]["sequential"]["latency"]["n"] == 3
+    assert entry["chat"]["concurrent"]["requests_per_sec"] > 0
+    assert report["meta"]["embedding"] == "hashing-384"
+    # the stand-in model is only installed for the duration of the run
+    assert get_embedding_function() is previous_fn
+
+    # comparing a run against itself flags nothing
+    assert not any(row["regression"] for row in compare(report, report))
+
+
+def test_compare_flags_slower_latency_and_lower_throughput():
+    baseline = {"sizes": {"1000": {"retriever": {"numpy": {
+        "search": {"p50_ms": 1.0, "p95_ms": 2.0, "p99_ms": 9.0}, "search_many_queries_per_sec": 100.0}}}}}
+    current = {"sizes": {"1000": {"retriever": {"numpy": {
+        "search": {"p50_ms": 1.5, "p95_ms": 2.1, "p99_ms": 90.0}, "search_many_queries_per_sec": 60.0}}}}}
+
+    rows = {r["metric"]: r for r in compare(current, baseline, tolerance=0.25)}
+    assert rows["1000.retriever.numpy.search.p50_ms"]["regression"]
+    assert not rows["1000.retriever.numpy.search.p95_ms"]["regression"]
+    assert rows["1000.retriever.numpy.search_many_queries_per_sec"]["regression"]
+    assert "1000.retriever.numpy.search.p99_ms" not in rows
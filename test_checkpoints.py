@@ -0,0 +1,120 @@
+import pytest
+
+from src.langie.checkpoints import CheckpointExists, CheckpointStore
+from src.langie.pipeline import LangGraphAgent
+
+CONFIG = """
+stages:
+  - name: UNDERSTAND
+    mode: deterministic
+    abilities:
+      - { name: parse_request_text, server: COMMON }
+      - { name: extract_entities,   server: ATLAS }
+  - name: ASK
+    mode: deterministic
+    abilities:
+      - { name: clarify_question, server: ATLAS }
+  - name: WAIT
+    mode: deterministic
+    suspend_when: "exists clarifying_question and missing clarification_answer"
+    abilities:
+      - { name: extract_answer, server: ATLAS }
+      - { name: store_answer,   server: ATLAS }
+  - name: PREPARE
+    mode: deterministic
+    abilities:
+      - { name: normalize_fields, server: COMMON }
+"""
+
+VAGUE = {"customer_name": "A", "email": "A@X.COM", "query": "I want a refund, it is late", "ticket_id": "TKT-1"}
+
+
+def _agent(tmp_path, store=None, **kwargs):
+    config = tmp_path / "stages.yaml"
+    config.write_text(CONFIG)
+    return LangGraphAgent(config_path=str(config), checkpoints=store, **kwargs)
+
+
+def test_store_round_trip(tmp_path):
+    store = CheckpointStore(str(tmp_path / "c.db"))
+    store.save("TKT-1", "WAIT", {"entities": {"intent": "refund_request"}, "logs": [{"event": "x"}]})
+    store.save("TKT-2", "WAIT", {"n": 2})
+    assert store.count() == 2
+    assert store.get("TKT-1") == ("WAIT", {"entities": {"intent": "refund_request"}, "logs": [{"event": "x"}]})
+    assert [w["ticket_id"] for w in store.waiting()] == ["TKT-1", "TKT-2"]
+
+    assert store.take("TKT-2") == ("WAIT", {"n": 2})
+    assert store.take("TKT-2") is None
+    assert store.delete("TKT-1") and store.count() == 0
+
+
+def test_suspend_at_wait_and_resume(tmp_path):
+    store = CheckpointStore(str(tmp_path / "c.db"))
+    agent = _agent(tmp_path, store, log_limit=6)
+
+    waiting = agent.run(VAGUE)
+    assert waiting["suspended_at"] == "WAIT"
+    assert waiting["ticket_status"] == "awaiting_customer"
+    assert waiting["clarifying_question"] == "Please share missing details: order_id."
+    assert "clarification_answer" not in waiting and "email" in waiting and waiting["email"] == "A@X.COM"
+    assert store.count() == 1
+
+    done = agent.resume("TKT-1", "Sure, it's #314")
+    assert store.count() == 0
+    assert done["entities"] == {"intent": "refund_request", "issue": "delivery_delay", "order_id": "314"}
+    assert done["email"] == "a@x.com"  # stages after WAIT ran
+    assert "suspended_at" not in done and "ticket_status" not in done
+    # the restored log is still a ring buffer of log_limit events
+    assert len(done["logs"]) == 6 and done["logs"][-1]["event"] == "run_completed"
+
+    with pytest.raises(KeyError):
+        agent.resume("TKT-1", "again")
+
+    # nothing to ask: no suspension
+    clear = agent.run(dict(VAGUE, query="Refund order #9", ticket_id="TKT-2"))
+    assert "suspended_at" not in clear and clear["entities"]["order_id"] == "9"
+
+
+def test_without_store_the_stub_answer_is_used(tmp_path):
+    out = _agent(tmp_path).run(VAGUE)
+    assert "suspended_at" not in out
+    assert out["entities"]["order_id"] == "12345"
+
+
+def test_failed_resume_keeps_the_checkpoint(tmp_path, monkeypatch):
+    store = CheckpointStore(str(tmp_path / "c.db"))
+    agent = _agent(tmp_path, store)
+    ticket_id = agent.run(dict(VAGUE, ticket_id=None))["ticket_id"]
+    assert ticket_id.startswith("TKT-")
+
+    def boom(state):
+        raise RuntimeError("graph unavailable")
+    monkeypatch.setattr(agent, "_invoke", boom)
+    with pytest.raises(RuntimeError):
+        agent.resume(ticket_id, "#1")
+    assert store.get(ticket_id)[0] == "WAIT"
+
+
+def test_suspend_never_replaces_a_waiting_run(tmp_path):
+    store = CheckpointStore(str(tmp_path / "c.db"))
+    agent = _agent(tmp_path, store)
+    agent.run(VAGUE)
+
+    with pytest.raises(CheckpointExists):
+        agent.run({**VAGUE, "customer_name": "B", "email": "b@x.com"})
+    assert store.get("TKT-1")[1]["email"] == "A@X.COM" and store.count() == 1
+
+
+def test_http_run_and_answer(tmp_path, monkeypatch, app_module, app_client):
+    monkeypatch.setattr(app_module, "_agent", _agent(tmp_path, CheckpointStore(str(tmp_path / "c.db"))))
+
+    waiting = app_client.post("/run", json=VAGUE).json()
+    assert waiting["suspended_at"] == "WAIT"
+    done = app_client.post("/tickets/TKT-1/answer", json={"answer": "#5"})
+    assert done.status_code == 200 and done.json()["entities"]["order_id"] == "5"
+    assert app_client.post("/tickets/TKT-1/answer", json={"answer": "#5"}).status_code == 404
+
+    app_client.post("/run", json=VAGUE)
+    clash = app_client.post("/run", json={**VAGUE, "customer_name": "B"})
+    assert clash.status_code == 409 and "TKT-1" in clash.json()["detail"]
+    assert app_client.post("/tickets/TKT-1/answer", json={"answer": "#5"}).json()["customer_name"] == "A"
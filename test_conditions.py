@@ -0,0 +1,94 @@
+import pytest
+
+from src.langie.conditions import ConditionError, compile_condition
+from src.langie.pipeline import LangGraphAgent
+
+STATE = {
+    "solution_score": 70,
+    "priority": "High",
+    "confidence": 0.5,
+    "entities": {"order_id": "42", "intent": ""},
+    "flags": {"sla_risk": True},
+    "answers": ["first"],
+}
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("solution_score < 80", True),
+    ("solution_score >= 70 and priority == 'High'", True),
+    ("priority in ['High', 'Urgent'] and not flags.sla_risk", False),
+    ("priority not in [\"Low\", 'Normal']", True),
+    ("exists entities.order_id", True),
+    ("missing entities.product", True),
+    ("entities.intent", False),            # bare operand: truthiness
+    ("answers.0 == 'first'", True),
+    ("not (confidence > 0.8 or flags.sla_risk)", False),
+    ("unknown.key == null", True),
+    ("unknown < 3", False),                 # null vs number: false, not an error
+    ("low_confidence", True),               # legacy aliases
+    ("missing_entities", False),
+    ("", True),
+])
+def test_expressions(expression, expected):
+    assert compile_condition(expression)(STATE) is expected
+
+
+@pytest.mark.parametrize("expression", ["score <", "a == == b", "(a or b", "and", "a $ b", "exists 3", "x in [y]"])
+def test_malformed_expressions_fail_at_compile_time(expression):
+    with pytest.raises(ConditionError, match="position"):
+        compile_condition(expression)
+
+
+ROUTING = """
+stages:
+  - name: UNDERSTAND
+    mode: deterministic
+    abilities:
+      - { name: parse_request_text, server: COMMON }
+      - { name: extract_entities,   server: ATLAS }
+  - name: ASK
+    mode: conditional
+    condition: "missing entities.order_id and confidence < 0.8"
+    abilities:
+      - { name: clarify_question, server: ATLAS }
+  - name: DECIDE
+    mode: non-deterministic
+    escalate_when: "{escalate_when}"
+    abilities:
+      - { name: solution_evaluation, server: COMMON }
+      - { name: escalation_decision, server: ATLAS }
+      - { name: update_payload,      server: COMMON }
+"""
+
+
+def _stages(output):
+    return [e["payload"]["stage"] for e in output["logs"] if e["event"] == "stage_start"]
+
+
+def test_conditions_route_the_pipeline(tmp_path):
+    config = tmp_path / "stages.yaml"
+    config.write_text(ROUTING.replace("{escalate_when}", "solution_score < 50"))
+    agent = LangGraphAgent(config_path=str(config))
+
+    vague = agent.run({"customer_name": "A", "email": "a@x.com", "query": "Something is wrong"})
+    assert _stages(vague) == ["UNDERSTAND", "ASK", "DECIDE"]
+    assert "clarifying_question" in vague
+
+    clear = agent.run({"customer_name": "A", "email": "a@x.com", "query": "Refund order #9"})
+    assert _stages(clear) == ["UNDERSTAND", "DECIDE"]
+
+    # the DECIDE threshold comes from config: no KB hits scores 60
+    assert clear["solution_score"] == 60
+    assert "escalate_to" not in clear
+    assert clear["decision"] == "resolve"  # follows escalate_when, not a hardcoded score
+    config.write_text(ROUTING.replace("{escalate_when}", "solution_score < 70 and priority != 'Low'"))
+    strict = LangGraphAgent(config_path=str(config))
+    escalated = strict.run({"customer_name": "A", "email": "a@x.com", "query": "Refund order #9"})
+    assert escalated["escalate_to"] == "human_agent" and escalated["decision"] == "consider_escalation"
+    assert "escalate_to" not in strict.run(
+        {"customer_name": "A", "email": "a@x.com", "query": "Refund order #9", "priority": "Low"}
+    )
+
+    config.write_text(ROUTING.replace("{escalate_when}", "solution_score < (50"))
+    with pytest.raises(ConditionError):
+        LangGraphAgent(config_path=str(config))
@@ -0,0 +1,105 @@
+from langgraph.checkpoint.memory import MemorySaver
+
+from src.langie.pipeline import LangGraphAgent
+from src.langie.plan import Step, schedule
+
+CONFIG = """
+stages:
+  - name: UNDERSTAND
+    mode: deterministic
+    abilities:
+      - { name: parse_request_text, server: COMMON }
+  - name: RECHECK
+    mode: conditional
+    condition: missing_entities
+    abilities:
+      - { name: extract_entities, server: ATLAS }
+  - name: DECIDE
+    mode: non-deterministic
+    abilities:
+      - { name: solution_evaluation, server: COMMON }
+      - { name: escalation_decision, server: ATLAS }
+      - { name: update_payload,      server: COMMON }
+"""
+
+PAYLOAD = {"customer_name": "Bob", "email": "bob@example.com", "query": "Refund order #77", "ticket_id": "TKT-9"}
+
+
+def _events(state, event):
+    return [e["payload"]["stage"] for e in state["logs"] if e["event"] == event]
+
+
+def _agent(tmp_path, **kwargs):
+    config = tmp_path / "stages.yaml"
+    config.write_text(CONFIG)
+    return LangGraphAgent(config_path=str(config), **kwargs)
+
+
+def test_graph_nodes_and_branches(tmp_path):
+    agent = _agent(tmp_path)
+    nodes = set(agent.graph.get_graph().nodes)
+    assert {"UNDERSTAND", "RECHECK", "DECIDE", "DECIDE_escalate", "DECIDE_finalize"} <= nodes
+
+    out = agent.run(PAYLOAD)
+    # entities were found, so the conditional stage is skipped
+    assert _events(out, "stage_start") == ["UNDERSTAND", "DECIDE"]
+    # no KB hits -> low score -> escalation branch runs before finalize
+    abilities = [e["payload"]["ability"] for e in out["logs"] if e["event"] == "ability_start"]
+    assert abilities[-2:] == ["escalation_decision", "update_payload"]
+    assert out["solution_score"] < 90
+
+
+def test_checkpointer_keys_runs_by_ticket(tmp_path):
+    saver = MemorySaver()
+    agent = _agent(tmp_path, checkpointer=saver)
+    agent.run(PAYLOAD)
+    snapshot = agent.graph.get_state({"configurable": {"thread_id": "TKT-9"}})
+    assert snapshot.values["ticket"]["entities"]["order_id"] == "#77"
+
+
+PARALLEL_CONFIG = """
+stages:
+  - name: PREPARE
+    mode: deterministic
+    abilities:
+      - { name: normalize_fields,       server: COMMON, reads: [email, priority, entities], writes: [email, priority, entities] }
+      - { name: enrich_records,         server: ATLAS,  reads: [meta], writes: [meta] }
+      - { name: add_flags_calculations, server: COMMON, reads: [priority, entities, flags], writes: [flags] }
+  - name: DO
+    mode: deterministic
+    abilities:
+      - { name: execute_api_calls,     server: ATLAS, reads: [actions], writes: [actions] }
+      - { name: trigger_notifications, server: ATLAS, reads: [ticket_id, ticket_status, email], writes: [notified] }
+"""
+
+
+def test_schedule_groups_non_conflicting_steps():
+    def step(name, reads=None, writes=None):
+        return Step("S", name, "COMMON", fn=None,
+                    reads=None if reads is None else frozenset(reads),
+                    writes=None if writes is None else frozenset(writes))
+
+    waves = schedule((
+        step("a", ["x"], ["x"]),
+        step("b", ["y"], ["y"]),
+        step("c", ["x"], ["z"]),   # reads what a wrote -> new wave
+        step("d"),                 # undeclared -> always alone
+        step("e", [], ["w"]),
+    ))
+    assert [[s.name for s in w] for w in waves] == [["a", "b"], ["c"], ["d"], ["e"]]
+
+
+def test_parallel_waves_match_sequential(tmp_path):
+    config = tmp_path / "stages.yaml"
+    config.write_text(PARALLEL_CONFIG)
+    payload = {"customer_name": "Ann", "email": " ANN@X.COM ", "query": "late", "priority": "urgent",
+               "ticket_id": "TKT-1"}
+
+    parallel = LangGraphAgent(str(config), max_workers=4).run(payload)
+    sequential = LangGraphAgent(str(config), max_workers=1).run(payload)
+
+    for key in ("email", "priority", "flags", "notified"):
+        assert parallel[key] == sequential[key]
+    assert parallel["meta"]["sla_policy"] == "Standard-48h"
+    assert parallel["flags"]["is_high_priority"] is True
+    assert len(parallel["actions"]) == 1
@@ -0,0 +1,49 @@
+import chromadb
+from chromadb.api.types import EmbeddingFunction
+
+from src.langie.ingest import build_documents, plan_sync, sync_collection
+
+
+class CountingEmbeddingFunction(EmbeddingFunction):
+    def __init__(self):
+        self.texts = 0
+
+    def __call__(self, input):
+        self.texts += len(input)
+        return [[float(len(t)), 1.0] for t in input]
+
+
+FAQS = [
+    {"id": "faq_001", "question": "How do I track my order?", "answer": "Orders page."},
+    {"id": "faq_002", "question": "What is your refund policy?", "answer": "5-7 business days."},
+]
+
+
+def test_plan_sync_detects_changes():
+    docs = build_documents(FAQS)
+    existing = {"faq_001": docs[0]["metadata"]["content_hash"], "faq_002": "stale", "faq_009": "gone"}
+    plan = plan_sync(docs, existing)
+    assert plan.summary() == {"added": 0, "changed": 1, "deleted": 1, "unchanged": 1}
+
+
+def test_sync_only_embeds_new_entries(tmp_path):
+    fn = CountingEmbeddingFunction()
+    collection = chromadb.PersistentClient(path=str(tmp_path)).get_or_create_collection(
+        "faq", embedding_function=fn
+    )
+
+    sync_collection(collection, build_documents(FAQS), fn, batch_size=1)
+    assert fn.texts == 2
+    assert collection.count() == 2
+
+    faqs = FAQS + [{"id": "faq_003", "question": "Do you ship abroad?", "answer": "Yes."}]
+    dry = sync_collection(collection, build_documents(faqs), fn, dry_run=True)
+    assert dry.summary()["added"] == 1 and fn.texts == 2
+
+    plan = sync_collection(collection, build_documents(faqs), fn)
+    assert plan.summary() == {"added": 1, "changed": 0, "deleted": 0, "unchanged": 2}
+    assert fn.texts == 3, "Adding one FAQ should cost one embedding"
+
+    plan = sync_collection(collection, build_documents(faqs[1:]), fn)
+    assert plan.deleted == ["faq_001"]
+    assert collection.count() == 2
@@ -1,6 +1,6 @@
 import json
 from pathlib import Path
-import subprocess
+from scripts.kb_ingest import ingest
 
 KB_JSON = Path("data/kb_faq.json")
 
@@ -17,10 +17,10 @@ def add_faq_to_json(question: str, answer: str):
     KB_JSON.write_text(json.dumps(kb, indent=2))
     print(f"✅ Added new FAQ to JSON: Q='{question}' | A='{answer}'")
 
-def rebuild_chroma_db():
-    """Call kb_ingest.py to rebuild ChromaDB."""
-    subprocess.run(["python", "scripts/kb_ingest.py"], check=True)
-    print("✅ ChromaDB rebuilt with updated FAQs.")
+def sync_chroma_db():
+    """Incrementally sync ChromaDB: only the new FAQ gets embedded."""
+    ingest()
+    print("✅ ChromaDB synced with updated FAQs.")
 
 if __name__ == "__main__":
     # Example FAQ to add
@@ -28,4 +28,4 @@ if __name__ == "__main__":
         "Do you provide 24/7 customer support?",
         "Yes, our customer support is available 24/7 via chat and email."
     )
-    rebuild_chroma_db()
+    sync_chroma_db()
@@ -0,0 +1,128 @@
+import chromadb
+from chromadb.api.types import EmbeddingFunction
+
+from src.langie.ingest import build_documents
+from src.langie.lexical import BM25Index, reciprocal_rank_fusion, tokenize, write_documents
+from src.langie.retriever import Retriever, bump_kb_version
+
+FAQS = [
+    {"question": "How do I track my order?", "answer": "Use the Orders page."},
+    {"question": "How long does a refund take?", "answer": "Refunds take 5-7 business days."},
+    {"question": "Can I cancel my subscription?", "answer": "Cancel any time under Settings."},
+    {"question": "Where is order 12345?", "answer": "Order 12345 shipped yesterday."},
+]
+
+
+class AxisEmbeddingFunction(EmbeddingFunction):
+    """Puts 'track' queries and the tracking FAQ on one axis, everything else on another."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, input):
+        self.calls += 1
+        return [[1.0, 0.0] if "track" in t.lower() else [0.0, 1.0] for t in input]
+
+
+class BrokenEmbeddingFunction:
+    def __call__(self, input):
+        raise OSError("model not in the local cache")
+
+
+def _write_kb(path, faqs=FAQS):
+    docs = build_documents(faqs)
+    write_documents(str(path), "faq", docs)
+    return docs
+
+
+def test_tokenize_drops_stopwords_keeps_numbers():
+    assert tokenize("Where is my Order #12345?") == ["order", "12345"]
+
+
+def test_bm25_ranks_exact_keywords(tmp_path):
+    _write_kb(tmp_path)
+    index = BM25Index.load(str(tmp_path), "faq")
+
+    hits = index.search("refund please", top_k=2)
+    assert len(hits) == 1 and hits[0]["question"] == "How long does a refund take?"
+    assert hits[0]["bm25"] > 0 and 0 < hits[0]["score"] < 1
+
+    top = index.search("order 12345", top_k=2)
+    assert [h["question"] for h in top] == ["Where is order 12345?", "How do I track my order?"]
+    assert index.search("the and of", top_k=3) == []
+
+
+def test_rrf_rewards_agreement():
+    a, b, c = ({"doc": d} for d in "abc")
+    fused = reciprocal_rank_fusion([[a, b], [c, b]], top_k=3, k=60)
+    assert fused[0]["doc"] == "b"
+    assert {h["doc"] for h in fused} == {"a", "b", "c"}
+
+
+def test_lexical_mode_never_loads_the_model(tmp_path):
+    _write_kb(tmp_path)
+    retriever = Retriever(db_path=str(tmp_path), embedding_fn=BrokenEmbeddingFunction(), mode="lexical")
+
+    hits = retriever.search("cancel subscription", top_k=1)
+    assert hits[0]["answer"] == "Cancel any time under Settings."
+    assert retriever._collection is None and not retriever.degraded
+
+    hits[0]["answer"] = "mutated"
+    assert retriever.search("Cancel  subscription", top_k=1)[0]["answer"] == "Cancel any time under Settings."
+    assert retriever.cache_stats()["results"]["hits"] == 1
+
+
+def test_hybrid_fuses_dense_and_lexical(tmp_path):
+    docs = _write_kb(tmp_path)
+    fn = AxisEmbeddingFunction()
+    collection = chromadb.PersistentClient(path=str(tmp_path)).get_or_create_collection(
+        "faq", embedding_function=fn
+    )
+    collection.add(
+        ids=[d["id"] for d in docs],
+        embeddings=[[1.0, 0.0] if "track" in d["text"].lower() else [0.0, 1.0] for d in docs],
+        documents=[d["text"] for d in docs],
+        metadatas=[d["metadata"] for d in docs],
+    )
+    retriever = Retriever(db_path=str(tmp_path), embedding_fn=fn, mode="hybrid")
+
+    hits = retriever.search("track my order", top_k=2)
+    assert hits[0]["question"] == "How do I track my order?"  # first in both rankings
+    assert all("rrf" in h for h in hits) and fn.calls == 1
+
+
+def test_dense_degrades_to_lexical_when_model_is_unavailable(tmp_path):
+    _write_kb(tmp_path)
+    retriever = Retriever(db_path=str(tmp_path), embedding_fn=BrokenEmbeddingFunction())
+
+    hits = retriever.search("refund", top_k=1)
+    assert hits[0]["question"] == "How long does a refund take?"
+    assert retriever.degraded
+
+
+def test_lexical_index_follows_kb_version(tmp_path):
+    _write_kb(tmp_path, FAQS[:1])
+    retriever = Retriever(db_path=str(tmp_path), embedding_fn=BrokenEmbeddingFunction(), mode="lexical")
+    assert retriever.search("refund", top_k=1) == []
+
+    _write_kb(tmp_path)
+    bump_kb_version(str(tmp_path), "faq")
+    assert retriever.search("refund", top_k=1)[0]["answer"] == "Refunds take 5-7 business days."
+
+
+def test_chat_judges_lexical_hits_on_their_own_scale(tmp_path, monkeypatch, app_module, app_client):
+    from pipeline.abilities.knowledge_base_search import KnowledgeBaseSearch
+    from src.langie.semantic_cache import SemanticCache
+
+    _write_kb(tmp_path / "kb")
+    kb = KnowledgeBaseSearch(config={"db_path": str(tmp_path / "kb"), "mode": "lexical"})
+    monkeypatch.setattr(app_module, "kb_search", kb)
+    monkeypatch.setattr(app_module, "semantic_cache", SemanticCache(kb.retriever, maxsize=0))
+    monkeypatch.setattr(app_module, "SCORE_THRESHOLD", 0.25)
+    monkeypatch.setattr(app_module, "LEXICAL_SCORE_THRESHOLD", 0.2)
+
+    # The exact FAQ question scores 1 / (1 + bm25) ~= 0.21: resolved on the lexical scale, not the dense one
+    body = {"customer_name": "A", "email": "a@x.com", "query": "How long does a refund take?"}
+    reply = app_client.post("/chat", json=body).json()
+    assert reply["response"] == "Refunds take 5-7 business days."
+    assert reply["status"] == "resolved"
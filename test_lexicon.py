@@ -0,0 +1,74 @@
+import random
+import re
+
+from benchmarks.lexicon import naive_extract, run, synthetic_lexicon
+from src.langie import abilities
+from src.langie.lexicon import DEFAULT_LEXICON, DEFAULT_LEXICON_PATH, Lexicon, _trie_regex, get_lexicon, set_lexicon
+
+
+def test_trie_regex_matches_exactly_the_terms():
+    rng = random.Random(0)
+    terms = {"".join(rng.choice("ab -") for _ in range(rng.randint(1, 6))).strip() for _ in range(400)} - {""}
+    regex = re.compile(f"(?:{_trie_regex(terms)})\\Z")
+    assert all(regex.match(t) for t in terms)
+    for _ in range(3000):
+        probe = "".join(rng.choice("ab -") for _ in range(rng.randint(1, 6)))
+        assert bool(regex.match(probe)) == (probe in terms)
+
+
+def test_extract_entities_in_one_pass():
+    lexicon = Lexicon.from_dict(DEFAULT_LEXICON)
+    assert lexicon.extract("My phone order #123 hasn’t arrived, it is LATE") == {
+        "order_id": "#123", "issue": "delivery_delay",
+    }
+    assert lexicon.extract("Refund the INVOICE, it was delayed") == {
+        "intent": "refund_request", "product": "invoice_service", "issue": "delivery_delay",
+    }
+    # terms match at word starts only
+    assert lexicon.extract("please translate this") == {}
+    assert lexicon.extract("") == {}
+
+
+def test_unicode_case_equivalents_map_back_to_their_term():
+    lexicon = Lexicon.from_dict(DEFAULT_LEXICON)
+    # re.IGNORECASE matches these, though their .lower() isn't the stored term
+    assert lexicon.extract("İnvoice missing") == {"product": "invoice_service"}
+    assert lexicon.extract("my parcel haſn't arrived") == {"issue": "delivery_delay"}
+    assert Lexicon({"product": {"sku": ["ſtraße"]}}).extract("STRAẞE order") == {"product": "sku"}
+
+
+def test_longest_term_and_first_value_win():
+    lexicon = Lexicon({"intent": {"cancel": ["cancel"], "cancel_order": ["cancel order"],
+                                  "track": ["track"]}},
+                      {"ticket": r"TKT-\d+"})
+    assert lexicon.extract("please cancel order 5, then track it") == {"intent": "cancel_order"}
+    # patterns keep the original casing
+    assert lexicon.extract("see tkt-42 and TKT-43") == {"ticket": "tkt-42"}
+
+
+def test_shipped_lexicon_matches_the_default():
+    shipped = Lexicon.from_file(DEFAULT_LEXICON_PATH)
+    default = Lexicon.from_dict(DEFAULT_LEXICON)
+    for text in ["Refund for order #77 please", "It hasn't arrived", "Invoice copy", "hello"]:
+        assert shipped.extract(text) == default.extract(text)
+
+
+def test_abilities_use_the_configured_lexicon():
+    set_lexicon(Lexicon({"intent": {"track_order": ["where is"]}}, {"order_id": r"#\d+", "sku": r"sku-\w+"}))
+    try:
+        state = {"query": "Where is SKU-AB12, order #9?", "entities": {}}
+        abilities.extract_entities(abilities.parse_request_text(state))
+        assert state["entities"] == {"order_id": "#9", "sku": "SKU-AB12", "intent": "track_order"}
+        assert state["confidence"] == 0.9
+    finally:
+        set_lexicon(None)
+    assert len(get_lexicon()) == len(Lexicon.from_file(DEFAULT_LEXICON_PATH))
+
+
+def test_benchmark_agrees_with_naive_scan():
+    data = synthetic_lexicon(300)
+    lexicon = Lexicon.from_dict(data)
+    for text in ["refund please", "it is late", "nothing here"]:
+        assert set(lexicon.extract(text)) - {"order_id"} == set(naive_extract(data, text))
+    report = run([10, 50], texts=5, repeat=1)
+    assert set(report["terms"]) == {"10", "50"}
@@ -0,0 +1,211 @@
+import asyncio
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from src.langie.mcp_server import create_app
+from src.langie.mcp_transport import MCPClient, MCPClientError, MCPTransportError, ServerConfig, load_server_configs
+from src.langie.pipeline import LangGraphAgent
+
+STATE = {"email": "  Bob@Example.COM ", "priority": "high", "entities": {"order_id": "#42"}, "logs": ["local only"]}
+
+
+def http_client(app, **options):
+    config = ServerConfig("COMMON", url="http://common/mcp", backoff=0.01, **options)
+    return MCPClient({"COMMON": config}, http_transports={"COMMON": httpx.ASGITransport(app=app)})
+
+
+class Flaky:
+    """ASGI wrapper answering 503 to the first `failures` tool calls, optionally slowly."""
+
+    def __init__(self, app, failures=0, delay=0.0):
+        self.app, self.failures, self.delay = app, failures, delay
+        self.calls = self.in_flight = self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get(b"body", message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        if b"tools/call" not in body:
+            return await self.app(scope, _replay(body), send)
+
+        with self.lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            fail = self.calls <= self.failures
+        try:
+            await asyncio.sleep(self.delay)
+            if fail:
+                await send({"type": "http.response.start", "status": 503, "headers": []})
+                return await send({"type": "http.response.body", "body": b"busy"})
+            return await self.app(scope, _replay(body), send)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def _replay(body):
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+    return receive
+
+
+def test_http_tool_call_returns_changed_keys():
+    client = http_client(create_app("COMMON"))
+    try:
+        out = client.call_sync("COMMON", "normalize_fields", STATE)
+    finally:
+        client.close()
+    assert out == {"email": "bob@example.com", "priority": "High", "entities": {"order_id": "42"}}
+
+
+def test_retries_with_backoff_then_gives_up():
+    flaky = Flaky(create_app("COMMON"), failures=2)
+    client = http_client(flaky, retries=2)
+    try:
+        assert client.call_sync("COMMON", "normalize_fields", STATE)["priority"] == "High"
+        assert flaky.calls == 3
+    finally:
+        client.close()
+
+    flaky = Flaky(create_app("COMMON"), failures=5)
+    client = http_client(flaky, retries=1)
+    try:
+        with pytest.raises(MCPTransportError, match="after 2 attempt"):
+            client.call_sync("COMMON", "normalize_fields", STATE)
+    finally:
+        client.close()
+
+
+def test_only_idempotent_abilities_are_retried():
+    from src.langie.plan import compile_step
+
+    flaky = Flaky(create_app("COMMON"), failures=1)
+    client = http_client(flaky, retries=2)
+    try:
+        write = compile_step("PREPARE", {"name": "add_flags_calculations", "server": "COMMON"}, client)
+        with pytest.raises(MCPTransportError, match="after 1 attempt"):
+            write.fn(STATE)
+        assert flaky.calls == 1
+
+        pure = compile_step("PREPARE", {"name": "normalize_fields", "server": "COMMON", "pure": True,
+                                        "reads": ["email"], "writes": ["email"]}, client)
+        flaky.failures = 2
+        assert pure.fn(STATE)["email"] == "bob@example.com"
+        assert flaky.calls == 3
+
+        flaky.failures = 4
+        marked = compile_step("PREPARE", {"name": "add_flags_calculations", "server": "COMMON",
+                                          "idempotent": True}, client)
+        assert "flags" in marked.fn(STATE) and flaky.calls == 5
+    finally:
+        client.close()
+
+
+def test_timeout_is_a_transport_error():
+    client = http_client(Flaky(create_app("COMMON"), delay=1.0), timeout=0.05, retries=0)
+    try:
+        with pytest.raises(MCPTransportError):
+            client.call_sync("COMMON", "normalize_fields", STATE)
+    finally:
+        client.close()
+
+
+def test_per_server_concurrency_limit():
+    flaky = Flaky(create_app("COMMON"), delay=0.05)
+    client = http_client(flaky, max_concurrency=2)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda _: client.call_sync("COMMON", "normalize_fields", STATE), range(8)))
+    finally:
+        client.close()
+    assert flaky.calls == 8
+    assert flaky.max_in_flight == 2
+
+
+def test_tool_errors_are_not_retried():
+    flaky = Flaky(create_app("COMMON"))
+    client = http_client(flaky, retries=3)
+    try:
+        with pytest.raises(MCPClientError, match="Unknown tool"):
+            client.call_sync("COMMON", "no_such_ability", STATE)
+    finally:
+        client.close()
+    assert flaky.calls == 1
+
+
+def test_stdio_server():
+    command = (sys.executable, "-m", "src.langie.mcp_server", "--server", "ATLAS", "--stdio")
+    client = MCPClient({"ATLAS": ServerConfig("ATLAS", transport="stdio", command=command, timeout=60)})
+    try:
+        out = client.call_sync("ATLAS", "extract_entities", {"query": "Refund please, it's late", "entities": {}})
+        again = client.call_sync("ATLAS", "store_answer", {"clarification_answer": "It is #77"})
+    finally:
+        client.close()
+    assert out["entities"] == {"intent": "refund_request", "issue": "delivery_delay"}
+    assert out["confidence"] == 0.9
+    assert again["entities"] == {"order_id": "77"}
+
+
+def test_config_and_env():
+    servers = load_server_configs({"atlas": {"transport": "stdio", "command": "python -m x"}},
+                                  env={"LANGIE_MCP_COMMON_URL": "http://c/mcp"})
+    assert servers["ATLAS"].command == ("python", "-m", "x")
+    assert servers["COMMON"].url == "http://c/mcp"
+    assert MCPClient.from_config(None, env={}) is None
+    with pytest.raises(ValueError):
+        ServerConfig("COMMON", transport="http")
+
+
+PIPELINE = """
+mcp:
+  COMMON: { url: "http://common/mcp", fallback_local: true, retries: 0 }
+stages:
+  - name: UNDERSTAND
+    mode: deterministic
+    abilities:
+      - { name: parse_request_text, server: COMMON }
+      - { name: extract_entities,   server: ATLAS }
+  - name: PREPARE
+    mode: deterministic
+    abilities:
+      - { name: normalize_fields, server: COMMON, reads: [email, priority, entities], writes: [email, priority, entities] }
+      - { name: enrich_records,   server: ATLAS,  reads: [meta], writes: [meta] }
+      - { name: add_flags_calculations, server: COMMON }
+"""
+
+
+def test_pipeline_over_mcp_matches_in_process(tmp_path):
+    config = tmp_path / "stages.yaml"
+    config.write_text(PIPELINE)
+    local = tmp_path / "local.yaml"
+    local.write_text(PIPELINE.split("stages:", 1)[1].join(["stages:", ""]))
+    payload = {"customer_name": "A", "email": "A@X.COM", "query": "Refund order #5, it is late", "priority": "high"}
+
+    remote_client = MCPClient(
+        {"COMMON": ServerConfig("COMMON", url="http://common/mcp")},
+        http_transports={"COMMON": httpx.ASGITransport(app=create_app("COMMON"))},
+    )
+    remote = LangGraphAgent(str(config), mcp_client=remote_client)
+    try:
+        out = remote.run(payload)
+    finally:
+        remote.close()
+    expected = LangGraphAgent(str(local)).run(payload)
+    for key in ("email", "priority", "entities", "flags", "confidence"):
+        assert out[key] == expected[key]
+
+    # unreachable server + fallback_local: abilities run in-process
+    offline = LangGraphAgent(str(config))
+    try:
+        assert offline.run(payload)["entities"] == expected["entities"]
+    finally:
+        offline.close()
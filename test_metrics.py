@@ -0,0 +1,41 @@
+from src.langie.metrics import MetricsRegistry, REGISTRY
+from src.langie.pipeline import LangGraphAgent
+
+CONFIG = """
+stages:
+  - name: UNDERSTAND
+    mode: deterministic
+    abilities:
+      - { name: parse_request_text, server: COMMON }
+      - { name: does_not_exist,     server: ATLAS }
+"""
+
+
+def test_render_prometheus_text():
+    registry = MetricsRegistry()
+    hist = registry.histogram("latency_seconds", "Latency", {"stage": "DECIDE"})
+    for v in range(101):
+        hist.observe(v / 100)
+    registry.counter("errors_total", "Errors", {"ability": 'say "hi"'}).inc(2)
+
+    text = registry.render()
+    assert '# TYPE latency_seconds summary' in text
+    assert 'latency_seconds{stage="DECIDE",quantile="0.5"} 0.500000' in text
+    assert 'latency_seconds{stage="DECIDE",quantile="0.99"} 0.990000' in text
+    assert 'latency_seconds_count{stage="DECIDE"} 101' in text
+    assert 'errors_total{ability="say \\"hi\\""} 2' in text
+
+
+def test_pipeline_records_stage_and_ability_timings(tmp_path):
+    config = tmp_path / "stages.yaml"
+    config.write_text(CONFIG)
+    out = LangGraphAgent(str(config)).run({"customer_name": "A", "email": "a@x.com", "query": "hi"})
+
+    stage_end = [e for e in out["logs"] if e["event"] == "stage_end"][0]
+    assert stage_end["payload"]["duration_ms"] >= 0
+    assert "_stage_started" not in out
+
+    text = REGISTRY.render()
+    assert 'langie_stage_duration_seconds_count{stage="UNDERSTAND"}' in text
+    assert 'langie_ability_duration_seconds_count{ability="parse_request_text",stage="UNDERSTAND"}' in text
+    assert 'langie_ability_errors_total{ability="does_not_exist",stage="UNDERSTAND"}' in text
@@ -0,0 +1,72 @@
+import chromadb
+import numpy as np
+import pytest
+
+from src.langie.numpy_index import NumpyIndex, export_collection
+from src.langie.retriever import Retriever, bump_kb_version
+
+
+class FixedEmbeddingFunction:
+    """Maps a few known queries onto axis-aligned vectors."""
+
+    VECTORS = {"track": [1.0, 0.0, 0.0], "refund": [0.0, 1.0, 0.0], "ship": [0.0, 0.0, 1.0]}
+
+    def __call__(self, input):
+        return [self.VECTORS.get(t.split()[0], [1.0, 1.0, 1.0]) for t in input]
+
+
+def _write_index(path, n=3):
+    ids = ["faq_001", "faq_002", "faq_003"][:n]
+    NumpyIndex.write(
+        str(path), "faq", ids,
+        embeddings=np.eye(3)[:n] * 5.0,  # un-normalized on purpose
+        documents=[f"Q: {i}" for i in ids],
+        metadatas=[{"question": f"q{i}", "answer": f"a{i}"} for i in range(n)],
+    )
+
+
+def test_exact_top_k(tmp_path):
+    _write_index(tmp_path)
+    index = NumpyIndex.load(str(tmp_path), "faq")
+    assert isinstance(index.matrix, np.memmap)
+
+    hits = index.search([[0.0, 2.0, 0.1], [1.0, 0.0, 0.0]], top_k=2)
+    assert [h["answer"] for h in hits[0]] == ["a1", "a2"]
+    assert hits[1][0]["answer"] == "a0"
+    assert abs(hits[1][0]["score"]) < 1e-6
+
+
+def test_retriever_numpy_backend_reloads_on_reingest(tmp_path):
+    _write_index(tmp_path, n=1)
+    retriever = Retriever(db_path=str(tmp_path), backend="numpy", embedding_fn=FixedEmbeddingFunction())
+    assert retriever.search("refund please", top_k=3)[0]["answer"] == "a0"
+
+    _write_index(tmp_path, n=3)
+    bump_kb_version(str(tmp_path), "faq")
+    assert retriever.search("refund please", top_k=3)[0]["answer"] == "a1"
+    assert retriever._collection is None, "NumPy backend must not open Chroma"
+
+
+@pytest.mark.parametrize("space", ["l2", "cosine", "ip"])
+def test_scores_match_the_chroma_collection(tmp_path, space):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(20, 8)).astype(np.float32)
+    if space == "ip":
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = rng.normal(size=(4, 8)).astype(np.float32)
+
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    metadata = None if space == "l2" else {"hnsw:space": space}  # l2 is Chroma's default
+    collection = client.get_or_create_collection("faq", metadata=metadata, embedding_function=None)
+    ids = [f"faq_{i:03d}" for i in range(len(vectors))]
+    collection.add(ids=ids, embeddings=vectors.tolist(), documents=ids,
+                   metadatas=[{"question": i, "answer": i} for i in ids])
+
+    export_collection(collection, str(tmp_path), "faq")
+    index = NumpyIndex.load(str(tmp_path), "faq")
+    assert index.space == space
+
+    expected = collection.query(query_embeddings=queries.tolist(), n_results=3)
+    for hits, want_ids, want_scores in zip(index.search(queries, top_k=3), expected["ids"], expected["distances"]):
+        assert [h["doc"] for h in hits] == want_ids
+        assert np.allclose([h["score"] for h in hits], want_scores, atol=1e-4)
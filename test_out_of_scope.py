@@ -10,7 +10,7 @@ def test_out_of_scope():
 
     for query in queries:
         print(f"\n❓ Query: {query}")
-        results = retriever.retrieve(query, top_k=1)
+        results = retriever.search(query, top_k=1)
         if results:
             print(f"   ➡️ Closest match: {results[0]['answer']} (Q: {results[0]['question']})")
         else:
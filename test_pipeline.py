@@ -53,11 +53,6 @@ def test_pipeline_smoke(sample_path="sample.json", config_path="config/stages.ya
     # Initialize pipeline agent
     agent = LangGraphAgent(config_path=config_path)
 
-    # Ensure state defaults to prevent KeyErrors
-    agent.state.setdefault("entities", {})
-    agent.state.setdefault("meta", {})
-    agent.state.setdefault("flags", {})
-
     # Run pipeline
     logger.info("Starting pipeline run for ticket_id=%s", sample.get("ticket_id"))
     output = agent.run(sample)
@@ -77,6 +72,131 @@ def test_pipeline_smoke(sample_path="sample.json", config_path="config/stages.ya
     logger.info("✅ Pipeline smoke test passed for ticket_id=%s", sample.get("ticket_id"))
     return output
 
+# -------------------------------
+# Per-run state isolation
+# -------------------------------
+NO_KB_CONFIG = """
+stages:
+  - name: UNDERSTAND
+    mode: deterministic
+    abilities:
+      - { name: parse_request_text, server: COMMON }
+      - { name: extract_entities,   server: ATLAS }
+  - name: PREPARE
+    mode: deterministic
+    abilities:
+      - { name: normalize_fields, server: COMMON }
+"""
+
+
+def test_runs_do_not_share_state(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    config = tmp_path / "stages.yaml"
+    config.write_text(NO_KB_CONFIG)
+    agent = LangGraphAgent(config_path=str(config))
+
+    payloads = [
+        {"customer_name": f"C{i}", "email": f"C{i}@X.COM", "query": f"Refund for order #{i}"}
+        for i in range(20)
+    ]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        outputs = list(pool.map(agent.run, payloads))
+
+    for i, out in enumerate(outputs):
+        assert out["email"] == f"c{i}@x.com"
+        assert out["entities"]["order_id"] == str(i)
+    # each run logs only its own events
+    assert len(outputs[0]["logs"]) == len(outputs[-1]["logs"])
+    assert outputs[0]["logs"] is not outputs[1]["logs"]
+
+
+def test_run_log_is_a_bounded_ring_buffer(tmp_path):
+    config = tmp_path / "stages.yaml"
+    config.write_text(NO_KB_CONFIG)
+    payload = {"customer_name": "A", "email": "a@x.com", "query": "Refund for order #7"}
+
+    full = LangGraphAgent(config_path=str(config), log_limit=None).run(payload)["logs"]
+    bounded = LangGraphAgent(config_path=str(config), log_limit=5).run(payload)["logs"]
+    assert isinstance(bounded, list)
+    assert len(full) > 5
+    # keeps the most recent events
+    assert [e["event"] for e in bounded] == [e["event"] for e in full[-5:]]
+    assert bounded[-1]["event"] == "run_completed"
+
+    assert LangGraphAgent(config_path=str(config), log_limit=0).run(payload)["logs"] == []
+
+
+def test_log_payload_is_built_lazily(tmp_path):
+    from src.langie.logger import get_logger
+    from logging.handlers import QueueHandler
+
+    config = tmp_path / "stages.yaml"
+    config.write_text(NO_KB_CONFIG)
+    agent = LangGraphAgent(config_path=str(config), log_limit=0)
+
+    def expensive():
+        raise AssertionError("payload built although nothing records it")
+
+    state = agent.new_state({})
+    agent._log(state, "noise", expensive)  # INFO level, no run log: never called
+    assert state["logs"] == []
+
+    # disk writes happen on the listener thread, not the caller's
+    assert any(isinstance(h, QueueHandler) for h in get_logger("src.langie.pipeline").handlers)
+    assert len(get_logger("src.langie.pipeline").handlers) == 1
+
+
+# -------------------------------
+# Memoized pure abilities
+# -------------------------------
+PURE_CONFIG = """
+stages:
+  - name: UNDERSTAND
+    mode: deterministic
+    abilities:
+      - { name: parse_request_text, server: COMMON, pure: true, reads: [query, entities], writes: [entities, raw_query, parsed_query_tokens] }
+      - { name: extract_entities,   server: ATLAS,  pure: true, reads: [query, raw_query, entities], writes: [entities, confidence] }
+  - name: PREPARE
+    mode: deterministic
+    abilities:
+      - { name: normalize_fields, server: COMMON, pure: true, reads: [email, priority, entities], writes: [email, priority, entities] }
+"""
+
+
+def _memo_stats(output):
+    return next(e["payload"] for e in output["logs"] if e["event"] == "memo_stats")
+
+
+def test_pure_abilities_are_memoized_on_their_inputs(tmp_path):
+    import pytest
+    from src.langie.plan import compile_step
+
+    config = tmp_path / "stages.yaml"
+    config.write_text(PURE_CONFIG)
+    agent = LangGraphAgent(config_path=str(config))
+    payload = {"customer_name": "A", "email": "A@X.COM", "query": "Refund order #7, it is late", "priority": "high"}
+
+    first, second = agent.run(payload), agent.run(dict(payload, customer_name="B"))
+    assert _memo_stats(first)["hits"] == 0 and _memo_stats(first)["misses"] == 3
+    assert _memo_stats(second)["hits"] == 3 and _memo_stats(second)["misses"] == 0
+    for key in ("entities", "raw_query", "parsed_query_tokens", "confidence", "email", "priority"):
+        assert second[key] == first[key]
+    assert [e["payload"].get("memo") for e in second["logs"] if e["event"] == "ability_end"] == ["hit"] * 3
+
+    # cached outputs are copies: mutating a result doesn't leak into later runs
+    second["entities"]["order_id"] = "999"
+    assert agent.run(payload)["entities"]["order_id"] == "7"
+
+    other = agent.run(dict(payload, query="Where is my invoice?"))
+    assert _memo_stats(other)["misses"] >= 2
+    assert other["entities"] == {"product": "invoice_service"}
+
+    assert "memo_stats" not in [e["event"] for e in LangGraphAgent(str(config), memo_size=0).run(payload)["logs"]]
+    with pytest.raises(ValueError, match="pure"):
+        compile_step("X", {"name": "normalize_fields", "pure": True, "reads": ["email"]})
+
+
 # -------------------------------
 # CLI Execution
 # -------------------------------
@@ -12,7 +12,7 @@ def run_tests():
 
     for query in queries:
         print(f"\n🔍 Query: {query}")
-        results = retriever.retrieve(query, top_k=2)
+        results = retriever.search(query, top_k=2)
         for idx, res in enumerate(results, start=1):
             print(f"   {idx}. {res['answer']} (Q: {res['question']})")
 
@@ -0,0 +1,75 @@
+import chromadb
+from chromadb.api.types import EmbeddingFunction
+
+from src.langie.retriever import Retriever, bump_kb_version
+
+
+class CountingEmbeddingFunction(EmbeddingFunction):
+    """Deterministic stand-in for the sentence-transformer model."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, input):
+        self.calls += 1
+        return [[float(len(t)), float(t.count("o")), 1.0] for t in input]
+
+
+def _make_kb(path):
+    collection = chromadb.PersistentClient(path=str(path)).get_or_create_collection(
+        "faq", embedding_function=CountingEmbeddingFunction()
+    )
+    collection.add(
+        ids=["faq_001", "faq_002"],
+        embeddings=[[24.0, 3.0, 1.0], [40.0, 1.0, 1.0]],
+        documents=["Q: track order", "Q: refund"],
+        metadatas=[{"question": "track order", "answer": "Orders page"},
+                   {"question": "refund", "answer": "5-7 days"}],
+    )
+
+
+def test_search_is_cached_and_invalidated(tmp_path):
+    _make_kb(tmp_path)
+    fn = CountingEmbeddingFunction()
+    retriever = Retriever(db_path=str(tmp_path), embedding_fn=fn)
+
+    first = retriever.search("Where is my order?", top_k=1)
+    again = retriever.search("  where is   MY order? ", top_k=1)
+    assert first == again
+    assert fn.calls == 1, "Normalized repeat query should not be re-encoded"
+
+    stats = retriever.cache_stats()
+    assert stats["embeddings"]["hits"] == 1
+    assert stats["results"]["hits"] == 1
+
+    # Callers get copies, not the cached hit dicts
+    first[0]["answer"] = "mutated"
+    assert retriever.search("where is my order?", top_k=1)[0]["answer"] != "mutated"
+
+    bump_kb_version(str(tmp_path), "faq")
+    retriever.search("where is my order?", top_k=1)
+    assert fn.calls == 2, "Re-ingest should invalidate the caches"
+
+
+def test_cache_can_be_disabled(tmp_path):
+    _make_kb(tmp_path)
+    fn = CountingEmbeddingFunction()
+    retriever = Retriever(db_path=str(tmp_path), embedding_fn=fn, cache_size=0)
+    retriever.search("refund", top_k=1)
+    retriever.search("refund", top_k=1)
+    assert fn.calls == 2
+
+
+def test_search_many_batches_queries(tmp_path):
+    _make_kb(tmp_path)
+    fn = CountingEmbeddingFunction()
+    retriever = Retriever(db_path=str(tmp_path), embedding_fn=fn)
+
+    queries = ["where is my order?", "refund please", "Where is my order?"]
+    batched = retriever.search_many(queries, top_k=2)
+    assert fn.calls == 1, "All uncached queries should be encoded in one call"
+    assert len(batched) == 3
+    assert batched[0] == batched[2]
+
+    single = Retriever(db_path=str(tmp_path), embedding_fn=CountingEmbeddingFunction())
+    assert [single.search(q, top_k=2) for q in queries] == batched
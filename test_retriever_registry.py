@@ -0,0 +1,22 @@
+from src.langie.retriever import get_embedding_function, get_retriever
+
+
+def test_registry_shares_instances():
+    a = get_retriever("data/chroma", "faq")
+    b = get_retriever("./data/chroma", "faq")
+    assert a is b, "Same KB should map to one shared Retriever"
+
+    other = get_retriever("data/chroma", "faq_archive")
+    assert other is not a
+    # Different collections still share one embedding model
+    assert other.embedding_fn is a.embedding_fn is get_embedding_function()
+
+
+def test_registry_is_lazy():
+    # A model name no other test uses, so its retriever and embedding function are fresh
+    retriever = get_retriever("data/chroma", "faq", model_name="registry-laziness-probe")
+    assert retriever is get_retriever("data/chroma", "faq", model_name="registry-laziness-probe")
+    # Nothing is opened or loaded until the first search
+    assert retriever._collection is None
+    assert retriever.embedding_fn is get_embedding_function("registry-laziness-probe")
+    assert retriever.embedding_fn._model is None
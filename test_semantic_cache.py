@@ -0,0 +1,115 @@
+import time
+
+from src.langie.retriever import Retriever, bump_kb_version
+from src.langie.semantic_cache import SemanticCache
+from src.langie.tickets import TicketStore
+
+
+class KeywordEmbeddingFunction:
+    """Bag-of-keywords vectors: paraphrases sharing the keyword land on the same axis."""
+
+    VOCAB = ("refund", "order", "cancel", "password")
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, input):
+        self.calls += 1
+        return [[float(word in t.lower()) for word in self.VOCAB] + [0.01] for t in input]
+
+
+def _cache(tmp_path, **options):
+    fn = KeywordEmbeddingFunction()
+    return SemanticCache(Retriever(db_path=str(tmp_path), embedding_fn=fn), **options), fn
+
+
+def test_paraphrase_hits_and_unrelated_misses(tmp_path):
+    cache, fn = _cache(tmp_path)
+    cache.put("How do I get a refund?", {"response": "5-7 days", "alternatives": []})
+
+    assert cache.get("how do i get a REFUND?")["response"] == "5-7 days"  # exact, no embedding
+    assert cache.get("Can I have my money back, refund please")["response"] == "5-7 days"
+    assert cache.get("Where is my order?") is None
+
+    hit = cache.get("refund status")
+    hit["response"] = "mutated"
+    assert cache.get("refund status")["response"] == "5-7 days"
+
+    stats = cache.stats()
+    assert stats["exact_hits"] == 1 and stats["semantic_hits"] == 3 and stats["misses"] == 1
+    assert stats["hit_rate"] == 0.8
+
+
+def test_bounded_lru_eviction(tmp_path):
+    cache, _ = _cache(tmp_path, maxsize=2)
+    cache.put("refund", {"response": "r"})
+    cache.put("order", {"response": "o"})
+    assert cache.get("my refund") is not None  # refund is now most recently used
+    cache.put("cancel", {"response": "c"})
+
+    assert len(cache) == 2 and cache.stats()["evictions"] == 1
+    assert cache.get("order status") is None
+    assert cache.get("cancel it")["response"] == "c"
+
+
+def test_ttl_and_kb_reingest_invalidate(tmp_path, monkeypatch):
+    cache, _ = _cache(tmp_path, ttl=10)
+    cache.put("refund", {"response": "r"})
+
+    now = time.monotonic()
+    monkeypatch.setattr("src.langie.semantic_cache.time.monotonic", lambda: now + 11)
+    assert cache.get("refund please") is None
+    assert cache.stats()["expirations"] == 1 and len(cache) == 0
+    monkeypatch.undo()
+
+    cache.put("refund", {"response": "r"})
+    bump_kb_version(str(tmp_path), "faq")
+    assert cache.get("refund") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_without_a_model_only_exact_matches_are_served(tmp_path):
+    fn = KeywordEmbeddingFunction()
+    cache = SemanticCache(Retriever(db_path=str(tmp_path), embedding_fn=fn, mode="lexical"))
+    cache.put("How do I get a refund?", {"response": "r"})
+
+    assert cache.get("how do I get a refund?")["response"] == "r"
+    assert cache.get("refund please") is None
+    assert fn.calls == 0
+
+
+def test_embeddings_of_another_dimension_miss(tmp_path, monkeypatch):
+    cache, _ = _cache(tmp_path)
+    cache.put("How do I get a refund?", {"response": "r"})
+    monkeypatch.setattr(cache.retriever, "embed", lambda queries: [[1.0, 0.0, 0.0] for _ in queries])
+
+    assert cache.get("refund please") is None
+    assert cache.get("how do I get a refund?")["response"] == "r"
+    cache.put("Where is my order?", {"response": "o"})
+    assert cache.get("order status") is None and len(cache) == 2
+
+
+def test_chat_reuses_resolved_answer_for_paraphrase(tmp_path, monkeypatch, app_module, app_client):
+    class FakeKB:
+        retriever = Retriever(db_path=str(tmp_path), embedding_fn=KeywordEmbeddingFunction())
+        searched = []
+
+        def run_many(self, states):
+            for state in states:
+                self.searched.append(state["input"]["text"])
+                state["knowledge_base"] = [{"answer": "Refunds take 5-7 days.", "score": 0.4}]
+            return states
+
+    kb = FakeKB()
+    monkeypatch.setattr(app_module, "kb_search", kb)
+    monkeypatch.setattr(app_module, "semantic_cache", SemanticCache(kb.retriever))
+    monkeypatch.setattr(app_module, "tickets", TicketStore(str(tmp_path / "t.db"), legacy_json=None))
+
+    body = {"customer_name": "A", "email": "a@example.com", "query": "How do I get a refund?"}
+    first = app_client.post("/chat", json=body).json()
+    second = app_client.post("/chat", json={**body, "query": "refund for my purchase?"}).json()
+
+    assert kb.searched == ["How do I get a refund?"]
+    assert second["response"] == first["response"] == "Refunds take 5-7 days."
+    assert second["alternatives"] == first["alternatives"] and second["status"] == "resolved"
+    assert second["ticket_id"] != first["ticket_id"]
@@ -0,0 +1,111 @@
+import json
+import os
+
+import chromadb
+from chromadb.api.types import EmbeddingFunction
+
+import scripts.kb_ingest as kb_ingest
+from src.langie import mcp_client
+from src.langie.ingest import build_documents
+from src.langie.lexical import lexical_path
+from src.langie.shards import ShardRouter, load_manifest, partition
+
+FAQS = [
+    {"id": "faq_001", "question": "How do I track my order?", "answer": "Use the Orders page."},
+    {"id": "faq_002", "question": "How long does a refund take?", "answer": "Refunds take 5-7 business days."},
+    {"id": "faq_003", "question": "Can I get a refund on my invoice?", "answer": "Yes, within 30 days."},
+    {"id": "faq_004", "question": "How do I download my invoice?", "answer": "Billing > Invoices."},
+    {"id": "faq_005", "question": "My parcel never came", "answer": "We'll reship it.", "issue": "delivery_delay"},
+]
+
+
+class CountingEmbeddingFunction(EmbeddingFunction):
+    def __init__(self):
+        self.texts = 0
+
+    def __call__(self, input):
+        self.texts += len(input)
+        return [[float("refund" in t.lower()), float("invoice" in t.lower()), 1.0] for t in input]
+
+
+def test_partition_uses_faq_fields_then_the_lexicon():
+    shards = partition(FAQS, build_documents(FAQS), ["intent", "issue", "product"])
+
+    ids = {key: [d["id"] for d in shard["docs"]] for key, shard in shards.items()}
+    assert ids == {
+        "intent:refund_request": ["faq_002", "faq_003"],
+        "product:invoice_service": ["faq_003", "faq_004"],
+        "issue:delivery_delay": ["faq_005"],
+    }
+
+
+def test_lexical_ingest_writes_shards_and_drops_stale_ones(tmp_path):
+    kb_ingest.ingest(data_path=_faq_file(tmp_path, FAQS), db_path=str(tmp_path), lexical_only=True,
+                     shard_by=["intent", "issue", "product"])
+
+    manifest = load_manifest(str(tmp_path), "faq")
+    assert manifest["shards"]["intent:refund_request"] == {"collection": "faq-intent-refund_request", "count": 2}
+    assert (tmp_path / "faq-product-invoice_service.lexical.json").exists()
+
+    kb_ingest.ingest(data_path=_faq_file(tmp_path, FAQS[:3]), db_path=str(tmp_path), lexical_only=True,
+                     shard_by=["intent", "issue", "product"])
+    assert set(load_manifest(str(tmp_path), "faq")["shards"]) == {"intent:refund_request", "product:invoice_service"}
+    assert not (tmp_path / "faq-issue-delivery_delay.lexical.json").exists()
+
+
+def test_chroma_shards_reuse_global_embeddings(tmp_path, monkeypatch):
+    fn = CountingEmbeddingFunction()
+    monkeypatch.setattr(kb_ingest, "get_embedding_function", lambda model_name: fn)
+    data = _faq_file(tmp_path, FAQS)
+
+    kb_ingest.ingest(data_path=data, db_path=str(tmp_path), shard_by=["intent", "product"])
+    assert fn.texts == len(FAQS), "Shards should not re-embed what the global collection holds"
+
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    shard = client.get_collection("faq-product-invoice_service")
+    assert sorted(shard.get()["ids"]) == ["faq_003", "faq_004"]
+    assert os.path.exists(lexical_path(str(tmp_path), "faq-intent-refund_request"))
+
+    plan = kb_ingest.ingest(data_path=data, db_path=str(tmp_path), shard_by=["intent", "product"])
+    assert plan.summary()["unchanged"] == len(FAQS) and fn.texts == len(FAQS)
+
+
+def test_router_searches_matching_shards_and_falls_back_to_global(tmp_path):
+    kb_ingest.ingest(data_path=_faq_file(tmp_path, FAQS), db_path=str(tmp_path), lexical_only=True,
+                     shard_by=["intent", "issue", "product"])
+    router = ShardRouter(db_path=str(tmp_path), mode="lexical", min_confidence=0.7)
+
+    assert router.route({"intent": "refund_request"}, 0.9) == ["faq-intent-refund_request"]
+    assert router.route({"intent": "refund_request"}, 0.5) == []
+    assert router.route({"intent": "order_status"}, 0.9) == []
+
+    routed = router.search("refund", {"intent": "refund_request"}, 0.9, top_k=2)
+    assert routed["shards"] == ["faq-intent-refund_request"]
+    assert {h["question"] for h in routed["hits"]} == {FAQS[1]["question"], FAQS[2]["question"]}
+
+    # Both shards match; an FAQ in both is returned once
+    routed = router.search("refund invoice", {"intent": "refund_request", "product": "invoice_service"}, 0.9)
+    assert len(routed["hits"]) == 3 and len({h["doc"] for h in routed["hits"]}) == 3
+
+    # Too few shard hits are topped up from the global collection
+    routed = router.search("parcel order", {"issue": "delivery_delay"}, 0.9, top_k=2)
+    assert [h["question"] for h in routed["hits"]][0] == FAQS[4]["question"] and len(routed["hits"]) == 2
+
+    assert router.search("track order", {}, 0.5)["shards"] == []
+
+
+def test_retrieve_ability_routes_by_entities(tmp_path, monkeypatch):
+    kb_ingest.ingest(data_path=_faq_file(tmp_path, FAQS), db_path=str(tmp_path), lexical_only=True,
+                     shard_by=["intent", "product"])
+    monkeypatch.setattr(mcp_client, "get_shard_router", lambda: ShardRouter(db_path=str(tmp_path), mode="lexical"))
+
+    kb = mcp_client.resolve_ability("knowledge_base_search", "ATLAS")
+    state = kb({"query": "how long for a refund", "entities": {"intent": "refund_request"}, "confidence": 0.9})
+    assert state["kb_shards"] == ["faq-intent-refund_request"]
+    assert state["kb_answer"] == FAQS[1]["answer"]
+
+
+def _faq_file(tmp_path, faqs):
+    path = tmp_path / "kb_faq.json"
+    path.write_text(json.dumps(faqs))
+    return str(path)
@@ -0,0 +1,38 @@
+import sys
+
+from benchmarks.fixtures import HashingEmbeddingFunction
+from benchmarks.startup import check, run
+from src.langie.retriever import Retriever, warmup_in_background
+
+
+def test_entry_points_import_without_heavy_dependencies():
+    report = run(runs=1)
+    assert check(report) == [], report["imports"]
+
+
+def test_warmup_loads_model_and_index(tmp_path):
+    calls = []
+
+    class Counting(HashingEmbeddingFunction):
+        def __call__(self, input):
+            calls.append(list(input))
+            return super().__call__(input)
+
+    retriever = Retriever(db_path=str(tmp_path), embedding_fn=Counting())
+    assert not retriever.warm and retriever._collection is None
+
+    warmup_in_background(retriever).join(timeout=60)
+    assert retriever.warm
+    assert retriever._collection is not None and calls == [["warmup"]]
+    assert "chromadb" in sys.modules
+
+
+def test_failed_warmup_is_logged_not_raised(tmp_path):
+    class Broken(HashingEmbeddingFunction):
+        def __call__(self, input):
+            raise OSError("model download unavailable")
+
+    retriever = Retriever(db_path=str(tmp_path), embedding_fn=Broken())
+    warmup_in_background(retriever).join(timeout=60)
+    assert not retriever.warm
+
@@ -0,0 +1,120 @@
+import json
+
+from src.langie.checkpoints import CheckpointStore
+from src.langie.pipeline import LangGraphAgent
+
+CONFIG = """
+stages:
+  - name: UNDERSTAND
+    mode: deterministic
+    abilities:
+      - { name: parse_request_text, server: COMMON }
+      - { name: extract_entities,   server: ATLAS }
+  - name: ASK
+    mode: deterministic
+    abilities:
+      - { name: clarify_question, server: ATLAS }
+  - name: WAIT
+    mode: deterministic
+    suspend_when: "exists clarifying_question and missing clarification_answer"
+    abilities:
+      - { name: extract_answer, server: ATLAS }
+  - name: CREATE
+    mode: deterministic
+    abilities:
+      - { name: response_generation, server: COMMON }
+  - name: DO
+    mode: deterministic
+    abilities:
+      - { name: execute_api_calls, server: ATLAS }
+"""
+
+CLEAR = {"customer_name": "A", "email": "a@x.com", "query": "Where is my order #123?", "ticket_id": "TKT-1"}
+VAGUE = {"customer_name": "A", "email": "a@x.com", "query": "I want a refund, it is late", "ticket_id": "TKT-2"}
+
+
+def _agent(tmp_path, store=None):
+    config = tmp_path / "stages.yaml"
+    config.write_text(CONFIG)
+    return LangGraphAgent(config_path=str(config), checkpoints=store)
+
+
+def test_stream_yields_stage_ends_then_draft_then_done(tmp_path):
+    agent = _agent(tmp_path)
+    events = list(agent.stream(CLEAR))
+
+    kinds = [(e["event"], e.get("stage")) for e in events]
+    assert kinds == [
+        ("stage_end", "UNDERSTAND"), ("stage_end", "ASK"), ("stage_end", "WAIT"),
+        ("stage_end", "CREATE"), ("draft", "CREATE"), ("stage_end", "DO"), ("done", None),
+    ]
+    assert all(e["duration_ms"] >= 0 for e in events if e["event"] == "stage_end")
+
+    final = events[-1]["state"]
+    assert events[4]["response"] == final["response"]
+    assert final["actions"] and not any(k.startswith("_") for k in final)
+
+    ran = agent.run(CLEAR)
+    assert {k: v for k, v in final.items() if k not in ("logs", "actions")} == \
+        {k: v for k, v in ran.items() if k not in ("logs", "actions")}
+
+
+def test_stream_ends_with_suspended_state(tmp_path):
+    agent = _agent(tmp_path, CheckpointStore(str(tmp_path / "c.db")))
+    events = list(agent.stream(VAGUE))
+
+    assert [e.get("stage") for e in events[:-1]] == ["UNDERSTAND", "ASK"]
+    assert events[-1]["state"]["suspended_at"] == "WAIT"
+    assert agent.checkpoints.get("TKT-2") is not None
+
+
+def test_http_run_stream_is_server_sent_events(tmp_path, monkeypatch, app_module, app_client):
+    monkeypatch.setattr(app_module, "_agent", _agent(tmp_path))
+
+    with app_client.stream("POST", "/run/stream", json=CLEAR) as res:
+        assert res.headers["content-type"].startswith("text/event-stream")
+        frames = [f for f in res.read().decode().split("\n\n") if f]
+
+    names = [f.split("\n")[0].removeprefix("event: ") for f in frames]
+    assert names == ["stage_end"] * 4 + ["draft", "stage_end", "done"]
+    done = json.loads(frames[-1].split("\n")[1].removeprefix("data: "))
+    assert done["state"]["response"]
+
+    monkeypatch.setattr(app_module, "_agent", None)
+    monkeypatch.setattr(app_module, "PIPELINE_CONFIG", str(tmp_path / "missing.yaml"))
+    error = app_client.post("/run/stream", json=CLEAR).text
+    assert error.startswith("event: error\n")
+
+
+def test_http_chat_stream_stores_the_ticket(tmp_path, monkeypatch, app_module, app_client):
+    from src.langie.retriever import Retriever
+    from src.langie.semantic_cache import SemanticCache
+    from src.langie.tickets import TicketStore
+
+    class FakeKB:
+        retriever = Retriever(db_path=str(tmp_path), mode="lexical")
+
+        def run_many(self, states):
+            for state in states:
+                state["knowledge_base"] = [{"answer": "Track it on the Orders page.", "score": 0.4}]
+            return states
+
+    store = TicketStore(str(tmp_path / "t.db"), legacy_json=None)
+    monkeypatch.setattr(app_module, "kb_search", FakeKB())
+    monkeypatch.setattr(app_module, "semantic_cache", SemanticCache(FakeKB.retriever))
+    monkeypatch.setattr(app_module, "tickets", store)
+
+    body = {"customer_name": "A", "email": "a@x.com", "query": "Where is my order?"}
+    with app_client.stream("POST", "/chat/stream", json=body) as res:
+        assert res.headers["content-type"].startswith("text/event-stream")
+        frames = [f for f in res.read().decode().split("\n\n") if f]
+
+    events = [json.loads(f.split("\n")[1].removeprefix("data: ")) for f in frames]
+    assert [(e["event"], e.get("stage")) for e in events] == [
+        ("stage_end", "RETRIEVE"), ("stage_end", "DECIDE"), ("draft", "DECIDE"), ("stage_end", "UPDATE"),
+        ("done", None),
+    ]
+    ticket = events[-1]["state"]
+    assert ticket["response"] == events[2]["response"] == "Track it on the Orders page."
+    assert store.count() == 1
+    assert app_client.get(f"/tickets/{ticket['ticket_id']}").json() == ticket
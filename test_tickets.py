@@ -0,0 +1,133 @@
+import json
+import threading
+
+import pytest
+
+from src.langie.tickets import TicketStore
+
+
+def test_migrates_legacy_json_once(tmp_path):
+    legacy = tmp_path / "tickets.json"
+    legacy.write_text(json.dumps([
+        {"ticket_id": "TKT-001", "email": "a@x.com", "status": "pending"},
+        {"ticket_id": "TKT-002", "email": "b@x.com", "status": "resolved"},
+    ]))
+    store = TicketStore(str(tmp_path / "tickets.db"), legacy_json=str(legacy))
+    assert store.count() == 2
+    assert store.get("TKT-002")["email"] == "b@x.com"
+
+    # Re-opening must not import the JSON again
+    store.close()
+    store = TicketStore(str(tmp_path / "tickets.db"), legacy_json=str(legacy))
+    assert store.count() == 2
+    assert store.create({"email": "c@x.com"})["ticket_id"] == "TKT-003"
+
+
+def test_concurrent_creates_get_unique_ids(tmp_path):
+    store = TicketStore(str(tmp_path / "tickets.db"), legacy_json=None)
+    ids = []
+
+    def worker():
+        for _ in range(25):
+            ids.append(store.create({"status": "pending"})["ticket_id"])
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(set(ids)) == 100
+    assert store.count() == 100
+    # a second handle on the same file (e.g. another worker process) continues the sequence
+    other = TicketStore(str(tmp_path / "tickets.db"), legacy_json=None)
+    assert other.create({})["ticket_id"] == "TKT-101"
+
+
+def _seed(store, n=30):
+    for i in range(n):
+        store.create({
+            "email": "Alice@X.com" if i % 3 == 0 else f"user{i}@x.com",
+            "status": "resolved" if i % 2 else "pending",
+            "timestamp": f"2026-01-{1 + i // 10:02d}T00:00:{i:02d}",
+        })
+
+
+def test_list_filters_and_pages_newest_first(tmp_path):
+    store = TicketStore(str(tmp_path / "tickets.db"), legacy_json=None)
+    _seed(store)
+
+    seen, cursor = [], None
+    while True:
+        page = store.list(status="pending", limit=4, cursor=cursor)
+        seen += page["tickets"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert [t["ticket_id"] for t in seen] == [f"TKT-{i:03d}" for i in range(29, 0, -2)]
+    assert store.count(status="pending") == len(seen) == 15
+
+    alice = store.list(email="alice@x.com")["tickets"]
+    assert len(alice) == 10 and store.count(email="ALICE@x.com") == 10
+    window = store.list(since="2026-01-02", until="2026-01-03")["tickets"]
+    assert [t["ticket_id"] for t in window] == [f"TKT-{i:03d}" for i in range(20, 10, -1)]
+    assert store.count(email="alice@x.com", status="resolved", since="2026-01-02") == 3
+    assert store.count() == 30
+
+    with pytest.raises(ValueError):
+        store.list(cursor="not-a-cursor")
+
+
+def test_filtered_queries_use_the_indexes(tmp_path):
+    store = TicketStore(str(tmp_path / "tickets.db"), legacy_json=None)
+    for email, status, since in [("a@x.com", None, None), (None, "pending", None), (None, None, "2026"),
+                                 ("a@x.com", "pending", "2026")]:
+        where, params = store._where(email, status, since, None)
+        plan = store._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT data FROM tickets WHERE " + " AND ".join(where)
+            + " ORDER BY timestamp DESC, seq DESC LIMIT 10", params
+        ).fetchall()
+        details = " ".join(row[-1] for row in plan)
+        assert "USING INDEX" in details and "TEMP B-TREE" not in details, details
+        if email:
+            assert "tickets_email_ts" in details
+
+
+def test_existing_store_gains_indexes_and_counts(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "tickets.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE tickets (seq INTEGER PRIMARY KEY, ticket_id TEXT NOT NULL UNIQUE, "
+                 "customer_name TEXT, email TEXT, status TEXT, timestamp TEXT, data TEXT NOT NULL)")
+    conn.executemany("INSERT INTO tickets VALUES (?, ?, NULL, ?, ?, ?, ?)", [
+        (1, "TKT-001", "a@x.com", "pending", None, json.dumps({"ticket_id": "TKT-001"})),
+        (2, "TKT-002", "a@x.com", "resolved", "2026-01-01", json.dumps({"ticket_id": "TKT-002"})),
+    ])
+    conn.commit()
+    conn.close()
+
+    store = TicketStore(path, legacy_json=None)
+    assert store.count() == 2 and store.count(status="pending") == 1
+    store.create({"email": "a@x.com", "status": "pending", "timestamp": "2026-02-01"})
+    assert store.count(status="pending") == 2
+    assert [t["ticket_id"] for t in store.list(email="a@x.com")["tickets"]] == ["TKT-003", "TKT-002", "TKT-001"]
+
+
+def test_http_ticket_queries(tmp_path, monkeypatch, app_module, app_client):
+    store = TicketStore(str(tmp_path / "t.db"), legacy_json=None)
+    _seed(store)
+    monkeypatch.setattr(app_module, "tickets", store)
+
+    page = app_client.get("/tickets", params={"email": "alice@x.com", "limit": 3}).json()
+    assert [t["ticket_id"] for t in page["tickets"]] == ["TKT-028", "TKT-025", "TKT-022"]
+    rest = app_client.get("/tickets", params={"email": "alice@x.com", "cursor": page["next_cursor"]}).json()
+    assert len(rest["tickets"]) == 7 and rest["next_cursor"] is None
+
+    since = app_client.get("/tickets/count", params={"since": "2026-01-03T00:00:00+00:00"}).json()
+    assert since == {"count": 10}
+    assert app_client.get("/tickets/TKT-001").json()["email"] == "Alice@X.com"
+    assert app_client.get("/tickets/TKT-999").status_code == 404
+    assert app_client.get("/tickets", params={"cursor": "bogus"}).status_code == 400
+    assert app_client.get("/tickets", params={"since": "yesterday"}).status_code == 400
+    assert app_client.get("/tickets", params={"limit": 0}).status_code == 422